@@ -0,0 +1,112 @@
+"""Benchmark: sesiune SMTP refolosită vs. o conexiune nouă pentru fiecare mesaj.
+
+Pornește un server SMTP local (aiosmtpd) care simulează latența rețelei la
+fiecare comandă și trimite același lot de mesaje prin `SMTPTransport`, o dată
+pe sesiunea partajată și o dată redeschizând conexiunea pentru fiecare mesaj.
+
+    pip install aiosmtpd
+    python benchmarks/bench_smtp.py --messages 200 --latency-ms 20
+"""
+import argparse
+import asyncio
+import os
+import smtplib
+import socket
+import sys
+import time
+from email.mime.text import MIMEText
+
+from aiosmtpd.controller import Controller
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamlit_app as app  # noqa: E402
+
+
+class SlowHandler:
+    """Acceptă orice mesaj, cu o întârziere (RTT simulat) la EHLO și DATA"""
+    
+    def __init__(self, latency):
+        self.latency = latency
+        self.received = 0
+    
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        await asyncio.sleep(self.latency)
+        session.host_name = hostname
+        return responses
+    
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.latency)
+        self.received += 1
+        return '250 OK'
+
+
+class PlainSMTPTransport(app.SMTPTransport):
+    """SMTPTransport fără STARTTLS/autentificare, pentru serverul local de test"""
+    
+    def _connect(self):
+        server = smtplib.SMTP(self.config.smtp_server, self.config.smtp_port, timeout=self.timeout)
+        server.ehlo()
+        self.connections_opened += 1
+        return server
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def build_messages(count):
+    messages = []
+    for index in range(count):
+        msg = MIMEText(f"Comanda #{index} a fost actualizată.", 'plain', 'utf-8')
+        msg['From'] = 'bench@example.ro'
+        msg['To'] = f'client{index}@example.ro'
+        msg['Subject'] = f'Comanda #{index}'
+        messages.append(msg)
+    return messages
+
+
+def run(transport, messages, batch_size, reconnect_each):
+    started = time.perf_counter()
+    errors = 0
+    for start in range(0, len(messages), batch_size):
+        batch = messages[start:start + batch_size]
+        if reconnect_each:
+            for msg in batch:
+                errors += sum(error is not None for error in transport.send([msg]))
+                transport.close()
+        else:
+            errors += sum(error is not None for error in transport.send(batch))
+    transport.close()
+    elapsed = time.perf_counter() - started
+    return elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=20, help='mesaje per lot al worker-ului de outbox')
+    parser.add_argument('--latency-ms', type=float, default=10, help='întârzierea serverului la EHLO și DATA')
+    args = parser.parse_args()
+    
+    handler = SlowHandler(args.latency_ms / 1000)
+    controller = Controller(handler, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    try:
+        config = app.EmailConfig(smtp_server='127.0.0.1', smtp_port=controller.port,
+                                 email_from='bench@example.ro', email_password='', admin_email='admin@example.ro')
+        messages = build_messages(args.messages)
+        
+        print(f"{args.messages} mesaje, loturi de {args.batch_size}, latență {args.latency_ms:g} ms")
+        for label, reconnect_each in (('conexiune per mesaj', True), ('sesiune refolosită', False)):
+            transport = PlainSMTPTransport(config)
+            elapsed, errors = run(transport, messages, args.batch_size, reconnect_each)
+            print(f"  {label:<20} {elapsed:7.2f} s  {args.messages / elapsed:8.1f} mesaje/s  "
+                  f"conexiuni: {transport.connections_opened:4d}  erori: {errors}")
+    finally:
+        controller.stop()
+
+
+if __name__ == '__main__':
+    main()
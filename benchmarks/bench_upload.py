@@ -0,0 +1,110 @@
+"""Benchmark: debitul și memoria de vârf ale încărcării reluabile (tus).
+
+Pornește serverul de încărcare pe 127.0.0.1, cu o bază de date și un depozit de
+blob-uri temporare, și încarcă un fișier generat în cereri PATCH succesive.
+Raportează debitul și creșterea memoriei de vârf (RSS) a procesului, care nu
+trebuie să depindă de mărimea fișierului.
+
+    python benchmarks/bench_upload.py --size-mb 1024 --patch-mb 64
+"""
+import argparse
+import base64
+import http.client
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamlit_app as app  # noqa: E402
+
+
+def peak_rss_mb():
+    # ru_maxrss este în KB pe Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def create_order(db):
+    with db.transaction() as conn:
+        return conn.execute('''
+            INSERT INTO orders (student_name, email, software, resolution, render_count, deadline,
+                                price_euro, estimated_days, upload_token)
+            VALUES ('Benchmark', 'bench@example.ro', 'Revit', '4-6K', 1, '2030-01-01', 70, 3, 'bench-token')
+            RETURNING id
+        ''').fetchone()[0]
+
+
+def upload(port, order_id, size, patch_size, chunk):
+    b64 = lambda value: base64.b64encode(str(value).encode()).decode()
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    conn.request('POST', '/files/', headers={
+        'Tus-Resumable': '1.0.0',
+        'Upload-Length': str(size),
+        'Upload-Metadata': f"order_id {b64(order_id)},token {b64('bench-token')},filename {b64('bench.bin')}"
+    })
+    response = conn.getresponse()
+    response.read()
+    location = response.getheader('Location')
+    
+    offset = 0
+    while offset < size:
+        length = min(patch_size, size - offset)
+        
+        def body(remaining=length):
+            while remaining:
+                part = chunk[:min(len(chunk), remaining)]
+                remaining -= len(part)
+                yield part
+        
+        conn.request('PATCH', location, body=body(), headers={
+            'Tus-Resumable': '1.0.0',
+            'Content-Type': 'application/offset+octet-stream',
+            'Upload-Offset': str(offset),
+            'Content-Length': str(length)
+        }, encode_chunked=False)
+        response = conn.getresponse()
+        response.read()
+        if response.status != 204:
+            raise RuntimeError(f"PATCH a eșuat: {response.status}")
+        offset = int(response.getheader('Upload-Offset'))
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=1024)
+    parser.add_argument('--patch-mb', type=int, default=64, help='mărimea unei cereri PATCH')
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='bench-upload-')
+    db = app.DatabaseManager(os.path.join(workdir, 'bench.db'))
+    db.migrate(app.SCHEMA_MIGRATIONS)
+    blob_store = app.BlobStore(os.path.join(workdir, 'blobs'))
+    attached = []
+    uploads = app.ResumableUploads(db, blob_store, lambda *args: attached.append(args), max_bytes=1024 ** 4)
+    server = app.UploadServer(uploads, port=0)
+    server.start()
+    try:
+        order_id = create_order(db)
+        size = args.size_mb * 1024 * 1024
+        chunk = os.urandom(1024 * 1024)
+        
+        rss_before = peak_rss_mb()
+        started = time.perf_counter()
+        upload(server.port, order_id, size, args.patch_mb * 1024 * 1024, chunk)
+        elapsed = time.perf_counter() - started
+        
+        print(f"{args.size_mb} MB în cereri de {args.patch_mb} MB: {elapsed:.2f} s, "
+              f"{size / elapsed / 1e6:.0f} MB/s")
+        print(f"RSS de vârf: {peak_rss_mb():.0f} MB (+{peak_rss_mb() - rss_before:.0f} MB în timpul încărcării)")
+        print(f"Atașat comenzii: {bool(attached)}")
+    finally:
+        server.stop()
+        db.close_all()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
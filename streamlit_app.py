@@ -4,20 +4,58 @@ import numpy as np
 import requests
 import smtplib
 import os
+import re
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from email import message_from_string
 import sqlite3
 from sqlite3 import Error
 import time
 from dotenv import load_dotenv
 import threading
-from queue import Queue
+import atexit
+import logging
+import mailbox
+import html
+from html.parser import HTMLParser
+import hashlib
+import hmac
+import secrets
+import base64
+import uuid
+import socket
+import ipaddress
+import zipfile
+import zlib
+import posixpath
+import tempfile
+import shutil
+from string import Template
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from queue import Queue, Empty, Full
+from collections import OrderedDict, Counter, deque
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, urlunsplit, urljoin, parse_qs, parse_qsl, urlencode
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Suport opțional pentru arhivele .rar (necesită pachetul `rarfile` și utilitarul `unrar`)
+try:
+    import rarfile
+except ImportError:
+    rarfile = None
 
 # Încarcă variabilele de mediu
 load_dotenv()
 
+# Jurnalul thread-urilor de fundal, care nu au acces la interfață
+logger = logging.getLogger(__name__)
+
 # Configurare pagină
 st.set_page_config(
     page_title="Rendering Service ARH",
@@ -35,188 +73,3439 @@ st.markdown("""
         text-align: center;
         margin-bottom: 2rem;
     }
-    .status-pending { background-color: #fff3cd; padding: 10px; border-radius: 5px; }
-    .status-processing { background-color: #cce5ff; padding: 10px; border-radius: 5px; }
-    .status-completed { background-color: #d4edda; padding: 10px; border-radius: 5px; }
-    .urgent { border-left: 5px solid #dc3545; padding-left: 10px; }
-    .deleted { background-color: #f8d7da; padding: 10px; border-radius: 5px; text-decoration: line-through; }
-    .progress-bar { background-color: #f0f0f0; border-radius: 10px; margin: 10px 0; }
-    .progress-fill { background-color: #28a745; height: 20px; border-radius: 10px; text-align: center; color: white; font-weight: bold; }
-    .notification { background-color: #e7f3ff; padding: 15px; border-radius: 10px; border-left: 5px solid #1f77b4; margin: 10px 0; }
-    .notification-success { background-color: #d4edda; border-left: 5px solid #28a745; }
-    .notification-warning { background-color: #fff3cd; border-left: 5px solid #ffc107; }
-    .notification-error { background-color: #f8d7da; border-left: 5px solid #dc3545; }
-</style>
-""", unsafe_allow_html=True)
+    .status-pending { background-color: #fff3cd; padding: 10px; border-radius: 5px; }
+    .status-processing { background-color: #cce5ff; padding: 10px; border-radius: 5px; }
+    .status-completed { background-color: #d4edda; padding: 10px; border-radius: 5px; }
+    .urgent { border-left: 5px solid #dc3545; padding-left: 10px; }
+    .deleted { background-color: #f8d7da; padding: 10px; border-radius: 5px; text-decoration: line-through; }
+    .progress-bar { background-color: #f0f0f0; border-radius: 10px; margin: 10px 0; }
+    .progress-fill { background-color: #28a745; height: 20px; border-radius: 10px; text-align: center; color: white; font-weight: bold; }
+    .notification { background-color: #e7f3ff; padding: 15px; border-radius: 10px; border-left: 5px solid #1f77b4; margin: 10px 0; }
+    .notification-success { background-color: #d4edda; border-left: 5px solid #28a745; }
+    .notification-warning { background-color: #fff3cd; border-left: 5px solid #ffc107; }
+    .notification-error { background-color: #f8d7da; border-left: 5px solid #dc3545; }
+</style>
+""", unsafe_allow_html=True)
+
+@dataclass(frozen=True)
+class EmailConfig:
+    """Configurația email, citită o singură dată din mediu"""
+    smtp_server: str
+    smtp_port: int
+    email_from: str
+    email_password: str
+    admin_email: str
+    transport: str = 'smtp'
+    maildir_path: str = 'mail_outbox'
+    rate_per_minute: float = 20
+    burst: int = 10
+    daily_limit: int = 450
+    digest_interval_hours: float = 24
+    digest_deadline_days: int = 2
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            smtp_server=os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
+            smtp_port=int(os.getenv('SMTP_PORT', 587)),
+            email_from=os.getenv('EMAIL_FROM', ''),
+            email_password=os.getenv('EMAIL_PASSWORD', ''),
+            admin_email=os.getenv('ADMIN_EMAIL', 'bostiogstefania@gmail.com'),
+            transport=os.getenv('MAIL_TRANSPORT', 'smtp').strip().lower(),
+            maildir_path=os.getenv('MAIL_MAILDIR_PATH', 'mail_outbox'),
+            rate_per_minute=float(os.getenv('EMAIL_RATE_PER_MINUTE', 20)),
+            burst=int(os.getenv('EMAIL_BURST', 10)),
+            daily_limit=int(os.getenv('EMAIL_DAILY_LIMIT', 450)),
+            digest_interval_hours=float(os.getenv('ADMIN_DIGEST_INTERVAL_HOURS', 24)),
+            digest_deadline_days=int(os.getenv('ADMIN_DIGEST_DEADLINE_DAYS', 2))
+        )
+
+    @property
+    def is_complete(self):
+        # Transporturile locale (memory, maildir, null) nu au nevoie de cont SMTP
+        if self.transport != 'smtp':
+            return True
+        return all([self.smtp_server, self.email_from, self.email_password])
+
+@dataclass(frozen=True)
+class OrderStats:
+    """Indicatorii agregați pentru comenzile active (neșterse)"""
+    total_orders: int
+    total_revenue: float
+    avg_progress: float
+    urgent_orders: int
+    by_status: dict
+    by_software: dict
+    by_resolution: dict
+
+    def status_count(self, status):
+        return self.by_status.get(status, 0)
+
+class DatabaseManager:
+    """Pool de conexiuni SQLite partajat de toate serviciile.
+
+    Fiecare thread împrumută o singură conexiune din pool pe durata unei
+    operații (apelurile imbricate din același thread o refolosesc), iar
+    numărul total de conexiuni deschise este limitat de `pool_size`.
+    """
+
+    def __init__(self, db_path='rendering_orders.db', pool_size=8,
+                 busy_timeout_ms=5000, cache_size_kb=20000):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kb = cache_size_kb
+        self._idle = Queue(maxsize=pool_size)
+        self._created = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _open_connection(self):
+        """Deschide o conexiune nouă cu pragmele de performanță"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            isolation_level=None,  # tranzacțiile sunt gestionate explicit
+            check_same_thread=False
+        )
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        conn.execute(f'PRAGMA cache_size = -{int(self.cache_size_kb)}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        return conn
+
+    def _acquire(self):
+        """Ia o conexiune liberă din pool sau deschide una nouă sub limită"""
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+        
+        with self._lock:
+            can_create = self._created < self.pool_size
+            if can_create:
+                self._created += 1
+        
+        if can_create:
+            try:
+                return self._open_connection()
+            except Error:
+                with self._lock:
+                    self._created -= 1
+                raise
+        
+        try:
+            return self._idle.get(timeout=self.busy_timeout_ms / 1000)
+        except Empty:
+            raise Error("Pool-ul de conexiuni la baza de date este epuizat")
+
+    def _release(self, conn):
+        """Returnează conexiunea în pool"""
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        """Împrumută conexiunea thread-ului curent"""
+        local = self._local
+        if getattr(local, 'depth', 0):
+            local.depth += 1
+            try:
+                yield local.conn
+            finally:
+                local.depth -= 1
+            return
+        
+        conn = self._acquire()
+        local.conn = conn
+        local.depth = 1
+        try:
+            yield conn
+        finally:
+            local.depth = 0
+            local.conn = None
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Rulează un bloc într-o tranzacție; blocurile imbricate se alătură tranzacției curente"""
+        with self.connection() as conn:
+            if conn.in_transaction:
+                yield conn
+                return
+            
+            conn.execute('BEGIN IMMEDIATE')
+            callbacks = self._local.after_commit = []
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self._local.after_commit = None
+            
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception:
+                    logger.exception("Eroare într-o acțiune rulată după commit")
+
+    def after_commit(self, callback):
+        """Rulează `callback` după commit-ul tranzacției curente (imediat, dacă nu există una).
+        
+        Dacă tranzacția este anulată, callback-ul nu mai rulează.
+        """
+        callbacks = getattr(self._local, 'after_commit', None)
+        if callbacks is not None and self.in_transaction():
+            callbacks.append(callback)
+        else:
+            callback()
+
+    def in_transaction(self):
+        """Indică dacă thread-ul curent are deschisă o tranzacție"""
+        conn = getattr(self._local, 'conn', None)
+        return conn is not None and conn.in_transaction
+
+    def schema_version(self):
+        """Returnează versiunea curentă a schemei"""
+        with self.connection() as conn:
+            return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+    def migrate(self, migrations):
+        """Aplică, fiecare în propria tranzacție, migrațiile încă neaplicate"""
+        with self.transaction() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+        
+        for version, description, apply in migrations:
+            with self.transaction() as conn:
+                # Verificarea se face sub lock-ul de scriere, astfel încât două
+                # procese pornite simultan să nu aplice aceeași migrație
+                current = conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+                if version <= current:
+                    continue
+                apply(conn)
+                conn.execute(
+                    'INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                    (version, description)
+                )
+        
+        return self.schema_version()
+
+    def close_all(self):
+        """Închide conexiunile libere din pool"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+def add_column_if_missing(conn, table, column, definition):
+    """Adaugă o coloană într-un tabel existent dacă aceasta lipsește"""
+    columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+    if column not in columns:
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+def _migration_initial_schema(conn):
+    """Tabelele de bază (comenzi, notificări, istoric progres)"""
+    # Tabela pentru comenzi
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            project_file TEXT,
+            project_link TEXT,
+            software TEXT NOT NULL,
+            resolution TEXT NOT NULL,
+            render_count INTEGER NOT NULL,
+            deadline TEXT,
+            requirements TEXT,
+            status TEXT DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP,
+            download_link TEXT,
+            price_euro REAL NOT NULL,
+            payment_status TEXT DEFAULT 'pending',
+            payment_date TIMESTAMP,
+            receipt_sent BOOLEAN DEFAULT FALSE,
+            estimated_days INTEGER NOT NULL,
+            is_urgent BOOLEAN DEFAULT FALSE,
+            contact_phone TEXT,
+            faculty TEXT,
+            is_deleted BOOLEAN DEFAULT FALSE,
+            deleted_at TIMESTAMP,
+            deletion_reason TEXT,
+            progress INTEGER DEFAULT 0,
+            current_stage TEXT DEFAULT 'În așteptare',
+            stages_completed INTEGER DEFAULT 0,
+            total_stages INTEGER DEFAULT 6,
+            progress_email_sent BOOLEAN DEFAULT FALSE,
+            completed_email_sent BOOLEAN DEFAULT FALSE,
+            status_email_sent BOOLEAN DEFAULT FALSE
+        )
+    ''')
+    
+    # Tabela pentru notificări
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL,
+            message TEXT NOT NULL,
+            type TEXT DEFAULT 'info',
+            recipient_email TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            read BOOLEAN DEFAULT FALSE,
+            FOREIGN KEY (order_id) REFERENCES orders (id)
+        )
+    ''')
+    
+    # Tabela pentru istoricul progresului
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS progress_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL,
+            stage TEXT NOT NULL,
+            progress INTEGER NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            notes TEXT,
+            FOREIGN KEY (order_id) REFERENCES orders (id)
+        )
+    ''')
+
+def _migration_query_indexes(conn):
+    """Indexuri compuse pentru interogările frecvente"""
+    # get_orders: filtrare după is_deleted/status, sortare după created_at
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_created ON orders (created_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_deleted_created ON orders (is_deleted, created_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_deleted_status_created ON orders (is_deleted, status, created_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_status_created ON orders (status, created_at)')
+    
+    # get_notifications: filtrare după order_id/read, sortare după timestamp
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_notifications_order_timestamp ON notifications (order_id, timestamp)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_notifications_order_read_timestamp ON notifications (order_id, read, timestamp)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_notifications_read_timestamp ON notifications (read, timestamp)')
+    
+    # get_progress_history: filtrare după order_id, sortare după timestamp
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_progress_history_order_timestamp ON progress_history (order_id, timestamp)')
+
+def _migration_email_index(conn):
+    """Index pentru căutarea comenzilor după email, fără diferențe de majuscule"""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_email_nocase ON orders (email COLLATE NOCASE, created_at)')
+
+def _migration_email_outbox(conn):
+    """Coada persistentă de email-uri, golită de worker-ul de livrare"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER,
+            kind TEXT NOT NULL,
+            recipient TEXT NOT NULL,
+            subject TEXT,
+            message TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sent_at TIMESTAMP
+        )
+    ''')
+    
+    # Worker-ul caută mesajele scadente; admin-ul filtrează după status
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_email_outbox_status_next ON email_outbox (status, next_attempt_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_email_outbox_order ON email_outbox (order_id)')
+
+def _migration_notification_coalescing(conn):
+    """Cheia după care notificările repetate ale unei comenzi pot fi comasate"""
+    add_column_if_missing(conn, 'notifications', 'coalesce_key', 'TEXT')
+
+def _migration_notification_email_index(conn):
+    """Index pentru marcarea ca citite a tuturor notificărilor unui client"""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_notifications_recipient_read ON notifications (recipient_email COLLATE NOCASE, read)')
+
+def _migration_sent_emails(conn):
+    """Registrul email-urilor deja puse în coadă, după cheia de idempotență"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sent_emails (
+            idempotency_key TEXT PRIMARY KEY,
+            order_id INTEGER,
+            kind TEXT NOT NULL,
+            outbox_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+    ''')
+    
+    # Email-urile trimise deja înainte de registru nu trebuie retrimise
+    conn.execute('''
+        INSERT OR IGNORE INTO sent_emails (idempotency_key, order_id, kind)
+        SELECT id || ':receipt', id, 'receipt' FROM orders WHERE receipt_sent = 1
+        UNION ALL
+        SELECT id || ':progress:started', id, 'progress' FROM orders WHERE progress_email_sent = 1
+        UNION ALL
+        SELECT id || ':completion', id, 'completion' FROM orders WHERE completed_email_sent = 1
+    ''')
+
+# Ordinea de livrare când limita de trimitere este atinsă (valoare mai mică = mai urgent)
+EMAIL_PRIORITIES = {
+    'receipt': 0,
+    'receipt_admin': 0,
+    'completion': 0,
+    'upload_token': 0,
+    'status': 1,
+    'digest': 1,
+    'progress': 2
+}
+
+def _migration_email_priority(conn):
+    """Prioritatea mesajelor din outbox, folosită de limitatorul de trimitere"""
+    add_column_if_missing(conn, 'email_outbox', 'priority', 'INTEGER NOT NULL DEFAULT 1')
+    conn.executemany('UPDATE email_outbox SET priority = ? WHERE kind = ?',
+                     [(priority, kind) for kind, priority in EMAIL_PRIORITIES.items()])
+    conn.execute('DROP INDEX IF EXISTS idx_email_outbox_status_next')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_email_outbox_status_priority_next ON email_outbox (status, priority, next_attempt_at)')
+
+def _migration_admin_digest(conn):
+    """Starea job-urilor periodice și indexul pentru termenele comenzilor active"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS job_state (
+            name TEXT PRIMARY KEY,
+            last_run_at TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_orders_open_deadline ON orders (deadline)
+        WHERE is_deleted = 0 AND status != 'completed'
+    ''')
+
+def _migration_project_blobs(conn):
+    """Referința comenzii către fișierul proiectului din depozitul de blob-uri"""
+    add_column_if_missing(conn, 'orders', 'project_blob_sha256', 'TEXT')
+    add_column_if_missing(conn, 'orders', 'project_blob_size', 'INTEGER')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_project_blob ON orders (project_blob_sha256)')
+
+def _migration_resumable_uploads(conn):
+    """Încărcările reluabile și token-ul cu care clientul își atașează fișierul la comandă"""
+    add_column_if_missing(conn, 'orders', 'upload_token', 'TEXT')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS uploads (
+            id TEXT PRIMARY KEY,
+            order_id INTEGER NOT NULL,
+            filename TEXT,
+            length INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'uploading',
+            sha256 TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_uploads_order ON uploads (order_id)')
+
+def _migration_link_prefetch(conn):
+    """Starea preluării automate a fișierelor din link-urile externe"""
+    add_column_if_missing(conn, 'orders', 'link_fetch_status', 'TEXT')
+    add_column_if_missing(conn, 'orders', 'link_fetch_bytes', 'INTEGER')
+    add_column_if_missing(conn, 'orders', 'link_fetch_error', 'TEXT')
+    add_column_if_missing(conn, 'orders', 'link_fetched_at', 'TIMESTAMP')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_orders_link_fetch ON orders (link_fetch_status)
+        WHERE link_fetch_status IS NOT NULL
+    ''')
+
+def _migration_archive_summary(conn):
+    """Rezumatul arhivei proiectului, calculat o singură dată per blob"""
+    add_column_if_missing(conn, 'orders', 'archive_summary', 'TEXT')
+
+def _migration_link_checks(conn):
+    """Rezultatele verificării link-urilor (cache persistent, cu TTL)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS link_checks (
+            url TEXT PRIMARY KEY,
+            ok INTEGER NOT NULL,
+            status_code INTEGER,
+            error TEXT,
+            elapsed_ms REAL,
+            checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_download_link ON orders (download_link) WHERE download_link IS NOT NULL')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_project_link ON orders (project_link) WHERE project_link IS NOT NULL')
+
+def _migration_order_link_checks(conn):
+    """Starea link-urilor fiecărei comenzi, pentru filtrul „link-uri nefuncționale”"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS order_link_checks (
+            order_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            url TEXT NOT NULL,
+            status TEXT NOT NULL,
+            checked_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (order_id, kind),
+            FOREIGN KEY (order_id) REFERENCES orders (id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_order_link_checks_status
+        ON order_link_checks (order_id, status, checked_at)
+    ''')
+    # Un link schimbat nu moștenește starea celui vechi
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_order_link_checks_reset
+        AFTER UPDATE OF download_link, project_link ON orders
+        BEGIN
+            DELETE FROM order_link_checks
+            WHERE order_id = NEW.id
+              AND url IS NOT (CASE kind WHEN 'download' THEN NEW.download_link ELSE NEW.project_link END);
+        END
+    ''')
+    # Filtrul nu mai caută comenzile după URL
+    conn.execute('DROP INDEX IF EXISTS idx_orders_download_link')
+    conn.execute('DROP INDEX IF EXISTS idx_orders_project_link')
+
+# Recalculare completă a agregatelor din `order_stats` pornind de la `orders`
+ORDER_STATS_RECOMPUTE_SQL = '''
+    SELECT COALESCE(status, ''), COALESCE(software, ''), COALESCE(resolution, ''),
+           CASE WHEN is_urgent THEN 1 ELSE 0 END AS urgent,
+           COUNT(*), COALESCE(SUM(price_euro), 0), COALESCE(SUM(progress), 0)
+    FROM orders
+    WHERE COALESCE(is_deleted, 0) = 0
+    GROUP BY 1, 2, 3, 4
+'''
+
+def _order_stats_delta_sql(row, sign):
+    """Upsert care adaugă (sign=1) sau scade (sign=-1) o comandă din `order_stats`"""
+    return f'''
+        INSERT INTO order_stats (status, software, resolution, is_urgent, order_count, revenue_sum, progress_sum)
+        VALUES (COALESCE({row}.status, ''), COALESCE({row}.software, ''), COALESCE({row}.resolution, ''),
+                CASE WHEN {row}.is_urgent THEN 1 ELSE 0 END,
+                {sign}, {sign} * COALESCE({row}.price_euro, 0), {sign} * COALESCE({row}.progress, 0))
+        ON CONFLICT (status, software, resolution, is_urgent) DO UPDATE SET
+            order_count = order_count + excluded.order_count,
+            revenue_sum = revenue_sum + excluded.revenue_sum,
+            progress_sum = progress_sum + excluded.progress_sum;
+    '''
+
+def _migration_order_stats(conn):
+    """Tabela de statistici agregate, menținută exact de triggere pe `orders`"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS order_stats (
+            status TEXT NOT NULL,
+            software TEXT NOT NULL,
+            resolution TEXT NOT NULL,
+            is_urgent INTEGER NOT NULL,
+            order_count INTEGER NOT NULL DEFAULT 0,
+            revenue_sum REAL NOT NULL DEFAULT 0,
+            progress_sum INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (status, software, resolution, is_urgent)
+        ) WITHOUT ROWID
+    ''')
+    
+    # Comenzile șterse (soft delete) nu intră în statistici
+    cleanup = 'DELETE FROM order_stats WHERE order_count = 0;'
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_order_stats_insert
+        AFTER INSERT ON orders WHEN COALESCE(NEW.is_deleted, 0) = 0
+        BEGIN {_order_stats_delta_sql('NEW', 1)} END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_order_stats_delete
+        AFTER DELETE ON orders WHEN COALESCE(OLD.is_deleted, 0) = 0
+        BEGIN {_order_stats_delta_sql('OLD', -1)} {cleanup} END
+    ''')
+    tracked_columns = 'status, software, resolution, is_urgent, is_deleted, price_euro, progress'
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_order_stats_update_old
+        AFTER UPDATE OF {tracked_columns} ON orders WHEN COALESCE(OLD.is_deleted, 0) = 0
+        BEGIN {_order_stats_delta_sql('OLD', -1)} {cleanup} END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_order_stats_update_new
+        AFTER UPDATE OF {tracked_columns} ON orders WHEN COALESCE(NEW.is_deleted, 0) = 0
+        BEGIN {_order_stats_delta_sql('NEW', 1)} END
+    ''')
+    
+    # Populare inițială pentru bazele de date existente
+    conn.execute('DELETE FROM order_stats')
+    conn.execute(f'INSERT INTO order_stats {ORDER_STATS_RECOMPUTE_SQL}')
+
+# Migrațiile se aplică o singură dată, în ordinea versiunii; o migrație nouă
+# se adaugă mereu la finalul listei, fără a le modifica pe cele existente.
+SCHEMA_MIGRATIONS = [
+    (1, "Schema inițială", _migration_initial_schema),
+    (2, "Indexuri pentru comenzi, notificări și istoric progres", _migration_query_indexes),
+    (3, "Statistici agregate întreținute prin triggere", _migration_order_stats),
+    (4, "Index pentru căutarea după email", _migration_email_index),
+    (5, "Coadă persistentă pentru email-uri", _migration_email_outbox),
+    (6, "Comasarea notificărilor de progres", _migration_notification_coalescing),
+    (7, "Index pentru notificările unui client", _migration_notification_email_index),
+    (8, "Registru de idempotență pentru email-uri", _migration_sent_emails),
+    (9, "Prioritatea mesajelor din outbox", _migration_email_priority),
+    (10, "Digest pentru administrator", _migration_admin_digest),
+    (11, "Fișierele proiectelor în depozitul de blob-uri", _migration_project_blobs),
+    (12, "Încărcări reluabile", _migration_resumable_uploads),
+    (13, "Preluarea link-urilor externe", _migration_link_prefetch),
+    (14, "Rezumatul arhivelor încărcate", _migration_archive_summary),
+    (15, "Verificarea link-urilor", _migration_link_checks),
+    (16, "Starea link-urilor pe comandă", _migration_order_link_checks),
+]
+
+class NotificationService:
+    """Notificările pentru clienți, scrise în SQLite în loturi de un thread consumator.
+
+    `add_notification` doar pune notificarea într-un buffer limitat; consumatorul
+    o salvează cu `executemany` când lotul ajunge la `batch_size` sau după
+    `flush_interval` secunde. Când buffer-ul este plin, notificările care nu mai
+    încap sunt scrise direct în baza de date, fără ca apelantul să aștepte.
+    Notificările adăugate într-o tranzacție intră în buffer abia după commit, iar
+    loturile care nu au putut fi salvate sunt reîncercate, cu backoff exponențial.
+    """
+    
+    def __init__(self, db, max_pending=1000, batch_size=200, flush_interval=0.5,
+                 coalesce_window=60, start_consumer=True,
+                 flush_timeout=5.0, retry_delay=0.5, max_retry_delay=30):
+        self.db = db
+        self.coalesce_window = timedelta(seconds=coalesce_window)
+        self.notification_queue = Queue(maxsize=max_pending)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.flush_timeout = flush_timeout
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        
+        # Loturile eșuate, păstrate în ordine pentru reîncercare
+        self._retry = deque()
+        self._retry_lock = threading.Lock()
+        self._retry_in_flight = 0
+        self._retry_attempts = 0
+        self._progress = threading.Condition()
+        
+        self._metrics_lock = threading.Lock()
+        self.flushes = 0
+        self.flushed_notifications = 0
+        self.total_flush_ms = 0.0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.direct_writes = 0
+        self.coalesced_writes = 0
+        self.failed_writes = 0
+        
+        # Contoare de notificări necitite, actualizate la inserare și la citire
+        self._unread_lock = threading.Lock()
+        self._unread_by_order = Counter()
+        self._unread_by_email = Counter()
+        self._unread_total = 0
+        self._load_unread_counts()
+        
+        self._flush_requested = threading.Event()
+        self._stopping = threading.Event()
+        self._consumer = threading.Thread(target=self._consume, name="notification-writer", daemon=True)
+        if start_consumer:
+            self._consumer.start()
+            atexit.register(self.stop)
+    
+    def add_notification(self, order_id, message, type="info", recipient_email=None, coalesce_key=None):
+        """Adaugă o notificare în coadă.
+
+        Notificările cu aceeași `coalesce_key`, venite pentru aceeași comandă la mai
+        puțin de `coalesce_window` secunde una de alta, sunt comasate într-una singură
+        (ultimul mesaj câștigă), cât timp clientul nu a citit-o.
+        """
+        self.add_notifications([(order_id, message, type, recipient_email, coalesce_key)])
+    
+    def add_notifications(self, items):
+        """Adaugă mai multe notificări (order_id, mesaj, tip, email[, coalesce_key]) în buffer"""
+        timestamp = datetime.now()
+        notifications = [{
+            'order_id': int(order_id),
+            'message': message,
+            'type': type,
+            'recipient_email': recipient_email,
+            'timestamp': timestamp,
+            'read': False,
+            'coalesce_key': coalesce_key[0] if coalesce_key else None
+        } for order_id, message, type, recipient_email, *coalesce_key in items]
+        
+        # Notificările unei tranzacții anulate nu trebuie să ajungă la client
+        self.db.after_commit(lambda: self._enqueue(notifications))
+    
+    def _enqueue(self, notifications):
+        """Pune notificările în buffer, cu scriere directă în baza de date la buffer plin"""
+        queued_at = time.monotonic()
+        for notification in notifications:
+            notification['queued_at'] = queued_at
+        
+        for index, notification in enumerate(notifications):
+            try:
+                self.notification_queue.put_nowait(notification)
+            except Full:
+                remaining = notifications[index:]
+                with self._metrics_lock:
+                    self.direct_writes += len(remaining)
+                try:
+                    self.save_notifications_to_db(remaining)
+                except Error as e:
+                    self._requeue(remaining, e)
+                return
+    
+    def _requeue(self, batch, error):
+        """Păstrează un lot nesalvat pentru reîncercare, înaintea notificărilor mai noi"""
+        with self._metrics_lock:
+            self.failed_writes += 1
+        with self._retry_lock:
+            self._retry.extendleft(reversed(batch))
+            pending = len(self._retry)
+        logger.warning("Salvarea a %d notificări a eșuat (%s); %d notificări așteaptă reîncercarea",
+                       len(batch), error, pending)
+    
+    def _take_retry(self):
+        """Scoate primul lot de notificări de reîncercat"""
+        with self._retry_lock:
+            batch = [self._retry.popleft() for _ in range(min(self.batch_size, len(self._retry)))]
+            self._retry_in_flight += len(batch)
+            return batch
+    
+    def _consume(self):
+        """Bucla consumatorului: adună un lot (după mărime sau timp) și îl salvează"""
+        while not self._stopping.is_set():
+            if self._retry:
+                delay = min(self.retry_delay * 2 ** max(0, self._retry_attempts - 1), self.max_retry_delay)
+                if self._retry_attempts and self._stopping.wait(delay):
+                    break
+                retry = self._take_retry()
+                if retry:
+                    self._write(retry)
+                continue
+            
+            try:
+                batch = [self.notification_queue.get(timeout=self.flush_interval)]
+            except Empty:
+                continue
+            
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and not self._flush_requested.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.notification_queue.get(timeout=remaining))
+                except Empty:
+                    break
+            
+            self._write(batch, queued=len(batch))
+            if self.notification_queue.empty():
+                self._flush_requested.clear()
+    
+    def _write(self, batch, queued=0):
+        """Salvează un lot; `queued` notificări din el provin din buffer. Returnează succesul"""
+        try:
+            self._write_batch(batch)
+            self._retry_attempts = 0
+            return True
+        except Error as e:
+            self._retry_attempts += 1
+            self._requeue(batch, e)
+            return False
+        finally:
+            for _ in range(queued):
+                self.notification_queue.task_done()
+            with self._retry_lock:
+                self._retry_in_flight -= len(batch) - queued
+            with self._progress:
+                self._progress.notify_all()
+    
+    def _write_batch(self, batch):
+        """Salvează un lot și actualizează metricile"""
+        started = time.monotonic()
+        self.save_notifications_to_db(batch)
+        
+        finished = time.monotonic()
+        flush_ms = (finished - started) * 1000
+        with self._metrics_lock:
+            self.flushes += 1
+            self.flushed_notifications += len(batch)
+            self.total_flush_ms += flush_ms
+            self.last_flush_ms = flush_ms
+            self.max_flush_ms = max(self.max_flush_ms, flush_ms)
+            self.max_wait_ms = max(self.max_wait_ms, (finished - batch[0]['queued_at']) * 1000)
+    
+    def _drain(self):
+        """Golește buffer-ul în thread-ul curent; se oprește la primul lot eșuat"""
+        while True:
+            batch = self._take_retry()
+            queued = 0
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.notification_queue.get_nowait())
+                    queued += 1
+                except Empty:
+                    break
+            if not batch:
+                return True
+            if not self._write(batch, queued):
+                return False
+    
+    def _pending(self):
+        """Indică dacă mai există notificări nesalvate (în buffer sau de reîncercat)"""
+        return self.notification_queue.unfinished_tasks or self._retry or self._retry_in_flight
+    
+    def flush(self, timeout=None):
+        """Scrie notificările deja din buffer, ca citirile ulterioare să le vadă.
+        
+        Așteaptă cel mult `timeout` secunde (implicit `flush_timeout`); returnează
+        False dacă buffer-ul nu a fost golit în acest timp.
+        """
+        # Scrierile de acum ar intra în tranzacția apelantului și s-ar pierde la rollback
+        if self.db.in_transaction():
+            return False
+        if not self._consumer.is_alive():
+            return self._drain()
+        
+        self._flush_requested.set()
+        deadline = time.monotonic() + (self.flush_timeout if timeout is None else timeout)
+        with self._progress:
+            while self._pending():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning("Flush-ul notificărilor a expirat; %d notificări încă în buffer",
+                                   self.notification_queue.qsize() + len(self._retry))
+                    return False
+                self._progress.wait(remaining)
+        return True
+    
+    def stop(self, timeout=10):
+        """Oprește consumatorul după ce salvează tot ce a rămas în buffer"""
+        self._stopping.set()
+        if self._consumer.is_alive():
+            self._consumer.join(timeout)
+        if not self._drain():
+            logger.error("%d notificări nu au putut fi salvate la oprire",
+                         self.notification_queue.qsize() + len(self._retry))
+    
+    def metrics(self):
+        """Adâncimea buffer-ului și latențele de scriere"""
+        with self._metrics_lock:
+            return {
+                'depth': self.notification_queue.qsize(),
+                'capacity': self.notification_queue.maxsize,
+                'flushes': self.flushes,
+                'written': self.flushed_notifications,
+                'avg_flush_ms': round(self.total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+                'last_flush_ms': round(self.last_flush_ms, 2),
+                'max_flush_ms': round(self.max_flush_ms, 2),
+                'max_wait_ms': round(self.max_wait_ms, 2),
+                'direct_writes': self.direct_writes,
+                'coalesced': self.coalesced_writes,
+                'failed_writes': self.failed_writes,
+                'retry_pending': len(self._retry)
+            }
+    
+    def save_notification_to_db(self, notification):
+        """Salvează notificarea în baza de date"""
+        self.save_notifications_to_db([notification])
+    
+    def save_notifications_to_db(self, notifications):
+        """Salvează un lot de notificări în baza de date, comasând progresul repetat; ridică `Error` la eșec"""
+        notifications, saved = self._coalesce(notifications)
+        with self.db.transaction() as conn:
+            # Prima notificare comasabilă a unei comenzi din lot poate actualiza
+            # ultima notificare (necitită) a comenzii, deja salvată
+            pending = []
+            seen_orders = set()
+            for notification in notifications:
+                first_of_order = notification['order_id'] not in seen_orders
+                seen_orders.add(notification['order_id'])
+                if first_of_order and notification['coalesce_key'] and conn.execute('''
+                    UPDATE notifications SET message = ?, timestamp = ?
+                    WHERE id = (
+                        SELECT id FROM notifications WHERE order_id = ?
+                        ORDER BY timestamp DESC, id DESC LIMIT 1
+                    )
+                    AND coalesce_key = ? AND read = 0 AND timestamp >= ?
+                ''', (
+                    notification['message'],
+                    notification['timestamp'],
+                    notification['order_id'],
+                    notification['coalesce_key'],
+                    notification['timestamp'] - self.coalesce_window
+                )).rowcount:
+                    saved += 1
+                    continue
+                pending.append(notification)
+            
+            conn.executemany('''
+                INSERT INTO notifications 
+                (order_id, message, type, recipient_email, timestamp, read, coalesce_key)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [(
+                notification['order_id'],
+                notification['message'],
+                notification['type'],
+                notification['recipient_email'],
+                notification['timestamp'],
+                notification['read'],
+                notification['coalesce_key']
+            ) for notification in pending])
+        with self._metrics_lock:
+            self.coalesced_writes += saved
+        self._count_unread([(notification['order_id'], notification['recipient_email'])
+                            for notification in pending if not notification['read']], 1)
+    
+    def _coalesce(self, notifications):
+        """Comasează, în cadrul lotului, notificările succesive cu aceeași cheie ale unei comenzi"""
+        merged = []
+        latest = {}
+        saved = 0
+        for notification in notifications:
+            previous = latest.get(notification['order_id'])
+            if (previous is not None and notification['coalesce_key']
+                    and previous['coalesce_key'] == notification['coalesce_key']
+                    and notification['timestamp'] - previous['timestamp'] <= self.coalesce_window):
+                previous.update(message=notification['message'], timestamp=notification['timestamp'])
+                saved += 1
+                continue
+            notification = dict(notification)
+            merged.append(notification)
+            latest[notification['order_id']] = notification
+        return merged, saved
+    
+    def get_notifications(self, order_id=None, unread_only=False, limit=None):
+        """Returnează notificările (cele mai recente primele)"""
+        self.flush()
+        try:
+            query = "SELECT * FROM notifications"
+            conditions, params = [], []
+            if order_id:
+                conditions.append("order_id = ?")
+                params.append(int(order_id))
+            if unread_only:
+                conditions.append("read = 0")
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            query += " ORDER BY timestamp DESC"
+            if limit:
+                query += " LIMIT ?"
+                params.append(int(limit))
+            
+            with self.db.connection() as conn:
+                return pd.read_sql_query(query, conn, params=params)
+        except Error as e:
+            print(f"Eroare la citirea notificărilor: {e}")
+            return pd.DataFrame()
+    
+    def get_notifications_for_email(self, email, unread_only=False):
+        """Returnează notificările pentru toate comenzile active ale unui client"""
+        self.flush()
+        try:
+            query = '''
+                SELECT n.* FROM orders o
+                JOIN notifications n ON n.order_id = o.id
+                WHERE o.email = ? COLLATE NOCASE AND o.is_deleted = 0
+            '''
+            if unread_only:
+                query += " AND n.read = 0"
+            query += " ORDER BY n.timestamp DESC"
+            
+            with self.db.connection() as conn:
+                return pd.read_sql_query(query, conn, params=[email.strip()])
+        except Error as e:
+            print(f"Eroare la citirea notificărilor: {e}")
+            return pd.DataFrame()
+    
+    def mark_as_read(self, notification_id):
+        """Marchează o notificare ca citită"""
+        return self.mark_read([notification_id]) is not None
+    
+    def mark_read(self, notification_ids):
+        """Marchează mai multe notificări ca citite, cu un singur UPDATE; returnează câte erau necitite"""
+        ids = json.dumps([int(notification_id) for notification_id in notification_ids])
+        return self._mark_read_where('id IN (SELECT value FROM json_each(?))', ids)
+    
+    def mark_all_read(self, order_id=None, email=None):
+        """Marchează ca citite toate notificările unei comenzi sau ale unui client (după email)"""
+        self.flush()
+        if order_id is not None:
+            return self._mark_read_where('order_id = ?', int(order_id))
+        if email:
+            return self._mark_read_where('recipient_email = ? COLLATE NOCASE', email.strip())
+        return self._mark_read_where('1 = 1')
+    
+    def _mark_read_where(self, condition, *params):
+        """Rulează UPDATE-ul de citire și scade din contoare exact rândurile modificate"""
+        try:
+            with self.db.transaction() as conn:
+                rows = conn.execute(f'''
+                    UPDATE notifications SET read = 1
+                    WHERE read = 0 AND {condition}
+                    RETURNING order_id, recipient_email
+                ''', params).fetchall()
+            self._count_unread(rows, -1)
+            return len(rows)
+        except Error as e:
+            print(f"Eroare la marcarea notificărilor ca citite: {e}")
+            return None
+    
+    def _load_unread_counts(self):
+        """Inițializează contoarele cu o singură interogare grupată"""
+        try:
+            with self.db.connection() as conn:
+                rows = conn.execute('''
+                    SELECT order_id, recipient_email, COUNT(*) FROM notifications
+                    WHERE read = 0 GROUP BY order_id, recipient_email
+                ''').fetchall()
+        except Error as e:
+            print(f"Eroare la citirea notificărilor necitite: {e}")
+            return
+        with self._unread_lock:
+            self._unread_by_order.clear()
+            self._unread_by_email.clear()
+            self._unread_total = sum(row[2] for row in rows)
+            for order_id, recipient_email, count in rows:
+                self._unread_by_order[order_id] += count
+                if recipient_email:
+                    self._unread_by_email[recipient_email.lower()] += count
+    
+    def _count_unread(self, rows, delta):
+        """Aplică o modificare contoarelor pentru perechile (order_id, email)"""
+        with self._unread_lock:
+            for order_id, recipient_email in rows:
+                self._unread_total += delta
+                self._bump(self._unread_by_order, order_id, delta)
+                if recipient_email:
+                    self._bump(self._unread_by_email, recipient_email.lower(), delta)
+    
+    @staticmethod
+    def _bump(counter, key, delta):
+        """Modifică un contor; cheile ajunse la zero nu mai sunt păstrate"""
+        counter[key] += delta
+        if counter[key] <= 0:
+            del counter[key]
+    
+    def unread_count(self, order_id=None, email=None):
+        """Numărul de notificări necitite (al unei comenzi, al unui client sau total), fără interogare"""
+        with self._unread_lock:
+            if order_id is not None:
+                return self._unread_by_order[int(order_id)]
+            if email:
+                return self._unread_by_email[email.strip().lower()]
+            return self._unread_total
+
+# Etichetele statusurilor, așa cum apar în email-urile către clienți
+STATUS_LABELS = {
+    'pending': '⏳ În așteptare procesare',
+    'processing': '🚀 Procesare în curs',
+    'completed': '✅ Finalizat'
+}
+
+# Părți comune tuturor email-urilor; `${header}` (cu titlul șablonului) și `${footer}`
+# sunt inserate la compilare, o singură dată
+EMAIL_PARTIALS = {
+    'text': {
+        'header': "$title\n\n",
+        'footer': """
+📞 SUPPORT:
+• Email: bostiogstefania@gmail.com
+• Telefon: +40 724 911 299
+
+$closing
+🏗️ Echipa Rendering Service ARH
+""",
+    },
+    'html': {
+        'header': """<html><body style="font-family: Arial, sans-serif; color: #222; max-width: 640px; margin: auto;">
+<h2 style="color: #1f77b4;">$title</h2>
+""",
+        'footer': """<hr>
+<p>📞 <b>SUPPORT</b><br>Email: bostiogstefania@gmail.com<br>Telefon: +40 724 911 299</p>
+<p>$closing<br>🏗️ Echipa Rendering Service ARH</p>
+</body></html>
+""",
+    },
+}
+
+# Șabloanele fără `subject` sunt fragmente, inserate în alte email-uri
+EMAIL_TEMPLATES = {
+    'receipt': {
+        'title': "🧾 CHIȚANȚĂ PLATĂ RENDERING SERVICE",
+        'subject': "🧾 Chitanță Rendering #$id - $price_euro EUR",
+        'text': """${header}Mulțumim pentru comanda ta, $student_name!
+
+📋 DETALII COMANDA:
+• ID Comandă: #$id
+• Data: $order_date
+• Sumă plătită: $price_euro EUR
+• Rezoluție: $resolution
+• Număr randări: $render_count
+• Software: $software
+
+💳 DETALII PLATĂ:
+• Revolut: https://revolut.me/stefanxuhy
+• Transfer Bancar:
+  - Beneficiar: STEFANIA BOSTIOG
+  - IBAN: RO60 BREL 0002 0036 6187 0100
+  - Bancă: Libra Bank
+  - Sumă: $price_euro EUR
+
+⏰ DETALII LIVRARE:
+• Timp estimat: $estimated_days zile lucrătoare
+• Data estimată livrare: $delivery_date
+• Status: ⏳ În așteptare procesare
+
+🔔 NOTIFICĂRI:
+• Vei primi o notificare când începe procesarea
+• Vei primi o notificare când rendering-ul este gata
+• Link download va fi trimis la finalizare
+
+📋 SPECIFICAȚII:
+$requirements
+${footer}""",
+        'html': """${header}<p>Mulțumim pentru comanda ta, <b>$student_name</b>!</p>
+<h3>📋 Detalii comandă</h3>
+<ul>
+<li>ID Comandă: <b>#$id</b></li>
+<li>Data: $order_date</li>
+<li>Sumă plătită: <b>$price_euro EUR</b></li>
+<li>Rezoluție: $resolution</li>
+<li>Număr randări: $render_count</li>
+<li>Software: $software</li>
+</ul>
+<h3>💳 Detalii plată</h3>
+<ul>
+<li>Revolut: <a href="https://revolut.me/stefanxuhy">revolut.me/stefanxuhy</a></li>
+<li>Transfer bancar: STEFANIA BOSTIOG • RO60 BREL 0002 0036 6187 0100 • Libra Bank • $price_euro EUR</li>
+</ul>
+<h3>⏰ Detalii livrare</h3>
+<ul>
+<li>Timp estimat: $estimated_days zile lucrătoare</li>
+<li>Data estimată livrare: $delivery_date</li>
+<li>Status: ⏳ În așteptare procesare</li>
+</ul>
+<h3>🔔 Notificări</h3>
+<ul>
+<li>Vei primi o notificare când începe procesarea</li>
+<li>Vei primi o notificare când rendering-ul este gata</li>
+<li>Link download va fi trimis la finalizare</li>
+</ul>
+<h3>📋 Specificații</h3>
+<p>$requirements</p>
+${footer}""",
+    },
+    'receipt_admin': {
+        'title': "💰 COMANDA NOUĂ PLĂTITĂ!",
+        'subject': "💰 COMANDA NOUĂ #$id - $price_euro EUR",
+        'text': """${header}📋 DETALII CLIENT:
+• Nume: $student_name
+• Email: $email
+• Telefon: $contact_phone
+• Facultate: $faculty
+
+💶 DETALII FINANCIARE:
+• ID Comandă: #$id
+• Sumă: $price_euro EUR
+• Rezoluție: $resolution
+• Randări: $render_count
+• Zile estimare: $estimated_days
+• Urgent: $urgent_label
+
+🛠️ DETALII PROIECT:
+• Software: $software
+• Cerințe: $requirements
+• Fișier: $project_source
+
+⚡ ACȚIUNE NECESARĂ:
+1. Verifică fișierul/link-ul proiectului
+2. Confirmă clientului primirea
+3. Începe procesarea
+
+⏰ Termen limită: $delivery_date
+""",
+        'html': """${header}<h3>📋 Detalii client</h3>
+<ul>
+<li>Nume: <b>$student_name</b></li>
+<li>Email: $email</li>
+<li>Telefon: $contact_phone</li>
+<li>Facultate: $faculty</li>
+</ul>
+<h3>💶 Detalii financiare</h3>
+<ul>
+<li>ID Comandă: <b>#$id</b></li>
+<li>Sumă: <b>$price_euro EUR</b></li>
+<li>Rezoluție: $resolution</li>
+<li>Randări: $render_count</li>
+<li>Zile estimare: $estimated_days</li>
+<li>Urgent: $urgent_label</li>
+</ul>
+<h3>🛠️ Detalii proiect</h3>
+<ul>
+<li>Software: $software</li>
+<li>Cerințe: $requirements</li>
+<li>Fișier: $project_source</li>
+</ul>
+<h3>⚡ Acțiune necesară</h3>
+<ol>
+<li>Verifică fișierul/link-ul proiectului</li>
+<li>Confirmă clientului primirea</li>
+<li>Începe procesarea</li>
+</ol>
+<p>⏰ Termen limită: <b>$delivery_date</b></p>
+</body></html>
+""",
+    },
+    'status': {
+        'title': "🔔 ACTUALIZARE STATUS - Rendering #$id",
+        'subject': "🔔 Status Actualizat - Rendering #$id - $new_status_label",
+        'text': """${header}Bună $student_name,
+
+Statusul comenzii tale s-a actualizat!
+
+📊 STATUS NOU:
+• De la: $old_status_label
+• La: $new_status_label
+
+🎯 DETALII COMANDA:
+• ID Comandă: #$id
+• Software: $software
+• Rezoluție: $resolution
+• Număr randări: $render_count
+• Progres curent: $progress%
+
+⏰ TERMEN ESTIMAT:
+Data estimată de finalizare: $deadline
+$download_section${footer}""",
+        'html': """${header}<p>Bună <b>$student_name</b>,</p>
+<p>Statusul comenzii tale s-a actualizat!</p>
+<h3>📊 Status nou</h3>
+<ul>
+<li>De la: $old_status_label</li>
+<li>La: <b>$new_status_label</b></li>
+</ul>
+<h3>🎯 Detalii comandă</h3>
+<ul>
+<li>ID Comandă: <b>#$id</b></li>
+<li>Software: $software</li>
+<li>Rezoluție: $resolution</li>
+<li>Număr randări: $render_count</li>
+<li>Progres curent: $progress%</li>
+</ul>
+<h3>⏰ Termen estimat</h3>
+<p>Data estimată de finalizare: $deadline</p>
+$download_section${footer}""",
+    },
+    'progress': {
+        'title': "🚀 PROCESARE ÎN CURS - Rendering #$id",
+        'subject': "🚀 Procesare Rendering #$id - În curs",
+        'text': """${header}Bună $student_name,
+
+Procesarea rendering-ului tău a început!
+
+📊 STADIUL ACTUAL:
+• Progres: $progress%
+• Etapă: $current_stage
+• Status: Procesare în curs
+
+🎯 DETALII COMANDA:
+• ID Comandă: #$id
+• Software: $software
+• Rezoluție: $resolution
+• Număr randări: $render_count
+
+⏰ TERMEN ESTIMAT:
+Data estimată de finalizare: $deadline
+
+📝 DETALII PROIECT:
+$notes
+
+🔔 URMĂTOAREA NOTIFICARE:
+Vei primi un email când rendering-ul va fi complet finalizat și gata pentru descărcare.
+${footer}""",
+        'html': """${header}<p>Bună <b>$student_name</b>,</p>
+<p>Procesarea rendering-ului tău a început!</p>
+<h3>📊 Stadiul actual</h3>
+<ul>
+<li>Progres: <b>$progress%</b></li>
+<li>Etapă: $current_stage</li>
+<li>Status: Procesare în curs</li>
+</ul>
+<h3>🎯 Detalii comandă</h3>
+<ul>
+<li>ID Comandă: <b>#$id</b></li>
+<li>Software: $software</li>
+<li>Rezoluție: $resolution</li>
+<li>Număr randări: $render_count</li>
+</ul>
+<h3>⏰ Termen estimat</h3>
+<p>Data estimată de finalizare: $deadline</p>
+<h3>📝 Detalii proiect</h3>
+<p>$notes</p>
+<h3>🔔 Următoarea notificare</h3>
+<p>Vei primi un email când rendering-ul va fi complet finalizat și gata pentru descărcare.</p>
+${footer}""",
+    },
+    'completion': {
+        'title': "✅ RENDERING FINALIZAT - #$id",
+        'subject': "✅ Rendering Finalizat #$id - Gata pentru descărcare",
+        'text': """${header}Bună $student_name,
+
+Rendering-ul tău este finalizat și gata!
+
+🎉 PROIECT FINALIZAT:
+• Status: 100% Complet
+• Data finalizare: $completed_date
+• Calitate: Conform specificațiilor
+
+🎯 DETALII COMANDA:
+• ID Comandă: #$id
+• Software: $software
+• Rezoluție: $resolution
+• Număr randări: $render_count
+$download_section
+📋 SPECIFICAȚII PROCESATE:
+$requirements
+
+⭐ FEEDBACK:
+Dacă ești mulțumit de rezultat, te rugăm să ne lași un review!
+${footer}""",
+        'html': """${header}<p>Bună <b>$student_name</b>,</p>
+<p>Rendering-ul tău este finalizat și gata!</p>
+<h3>🎉 Proiect finalizat</h3>
+<ul>
+<li>Status: <b>100% Complet</b></li>
+<li>Data finalizare: $completed_date</li>
+<li>Calitate: Conform specificațiilor</li>
+</ul>
+<h3>🎯 Detalii comandă</h3>
+<ul>
+<li>ID Comandă: <b>#$id</b></li>
+<li>Software: $software</li>
+<li>Rezoluție: $resolution</li>
+<li>Număr randări: $render_count</li>
+</ul>
+$download_section<h3>📋 Specificații procesate</h3>
+<p>$requirements</p>
+<h3>⭐ Feedback</h3>
+<p>Dacă ești mulțumit de rezultat, te rugăm să ne lași un review!</p>
+${footer}""",
+    },
+    'admin_digest': {
+        'title': "📰 DIGEST COMENZI - $period",
+        'subject': "📰 Digest Rendering Service - $new_count comenzi noi, $deadline_count termene, $failed_count email-uri eșuate",
+        'text': """${header}🆕 COMENZI NOI ($new_count):
+$new_orders
+
+⏰ TERMENE APROPIATE SAU DEPĂȘITE ($deadline_count):
+$deadline_orders
+
+📧 EMAIL-URI NELIVRATE ($failed_count):
+$failed_emails
+
+🔔 Notificări necitite de clienți: $unread_notifications
+""",
+        'html': """${header}<h3>🆕 Comenzi noi ($new_count)</h3>
+$new_orders
+<h3>⏰ Termene apropiate sau depășite ($deadline_count)</h3>
+$deadline_orders
+<h3>📧 Email-uri nelivrate ($failed_count)</h3>
+$failed_emails
+<p>🔔 Notificări necitite de clienți: <b>$unread_notifications</b></p>
+</body></html>
+""",
+    },
+    'upload_token': {
+        'title': "📤 ÎNCĂRCARE FIȘIER PROIECT - Comanda #$id",
+        'subject': "📤 Datele pentru încărcarea fișierului - Comanda #$id",
+        'text': """${header}Bună $student_name,
+
+$intro
+
+🔑 DATE DE ÎNCĂRCARE:
+• Adresă: $upload_url
+• Comandă: $id
+• Token: $token
+
+Orice client tus 1.0 (de ex. tus-js-client, Uppy, tuspy) poate relua încărcarea
+după o întrerupere. Trimite `order_id`, `token` și `filename` în Upload-Metadata.
+
+⚠️ Nu trimite token-ul altcuiva: cu el se poate înlocui fișierul comenzii.
+${footer}""",
+        'html': """${header}<p>Bună <b>$student_name</b>,</p>
+<p>$intro</p>
+<h3>🔑 Date de încărcare</h3>
+<ul>
+<li>Adresă: <code>$upload_url</code></li>
+<li>Comandă: <b>$id</b></li>
+<li>Token: <code>$token</code></li>
+</ul>
+<p>Orice client tus 1.0 (de ex. tus-js-client, Uppy, tuspy) poate relua încărcarea după o întrerupere.
+Trimite <code>order_id</code>, <code>token</code> și <code>filename</code> în Upload-Metadata.</p>
+<p>⚠️ Nu trimite token-ul altcuiva: cu el se poate înlocui fișierul comenzii.</p>
+${footer}""",
+    },
+    'download_ready': {
+        'text': """
+📥 DESCĂRCARE:
+Proiectul tău este gata! Poți descărca fișierele de aici:
+$download_link
+""",
+        'html': """<h3>📥 Descărcare</h3>
+<p>Proiectul tău este gata! Poți descărca fișierele de aici:<br><a href="$download_link">$download_link</a></p>
+""",
+    },
+    'download_pending': {
+        'text': """
+📥 DESCĂRCARE:
+Proiectul tău este gata! Vei primi link-ul de descărcare în scurt timp.
+""",
+        'html': """<h3>📥 Descărcare</h3>
+<p>Proiectul tău este gata! Vei primi link-ul de descărcare în scurt timp.</p>
+""",
+    },
+}
+
+@dataclass(frozen=True)
+class OrderSnapshot:
+    """Datele unei comenzi folosite în email-uri, imuabile și hashable"""
+    id: int
+    student_name: str
+    email: str
+    software: str
+    resolution: str
+    render_count: int
+    price_euro: float
+    estimated_days: int
+    deadline: str
+    requirements: str
+    progress: int = 0
+    download_link: str = ""
+    contact_phone: str = ""
+    faculty: str = ""
+    is_urgent: bool = False
+    project_file: str = ""
+    project_link: str = ""
+    
+    @classmethod
+    def from_order(cls, order_data, order_id=None):
+        """Construiește snapshot-ul dintr-un rând `orders` sau din datele formularului"""
+        return cls(
+            id=int(order_data['id'] if order_id is None else order_id),
+            student_name=order_data['student_name'],
+            email=order_data['email'],
+            software=order_data['software'],
+            resolution=order_data['resolution'],
+            render_count=int(order_data['render_count']),
+            price_euro=order_data['price_euro'],
+            estimated_days=int(order_data['estimated_days']),
+            deadline=str(order_data['deadline']),
+            requirements=order_data.get('requirements') or "",
+            progress=int(order_data.get('progress') or 0),
+            download_link=order_data.get('download_link') or "",
+            contact_phone=order_data.get('contact_phone') or "",
+            faculty=order_data.get('faculty') or "",
+            is_urgent=bool(order_data.get('is_urgent')),
+            project_file=order_data.get('project_file') or "",
+            project_link=order_data.get('project_link') or ""
+        )
+
+@dataclass(frozen=True)
+class EmailFragment:
+    """Bucată de email deja randată, inserată ca atare în partea text și în cea HTML"""
+    text: str = ""
+    html: str = ""
+
+@dataclass(frozen=True)
+class RenderedEmail:
+    subject: str
+    text: str
+    html: str
+
+class EmailTemplates:
+    """Șabloanele de email, compilate o singură dată, cu cache LRU pentru randări"""
+    
+    DEFAULTS = {'closing': "Mulțumim pentru încredere!"}
+    
+    def __init__(self, templates=EMAIL_TEMPLATES, partials=EMAIL_PARTIALS, cache_size=512):
+        self._compiled = {
+            name: {
+                part: self._compile(template[part], partials.get(part, {}), template.get('title', ""),
+                                    escape=part == 'html')
+                for part in ('subject', 'text', 'html') if part in template
+            }
+            for name, template in templates.items()
+        }
+        self._render_cached = lru_cache(maxsize=cache_size)(self._render)
+    
+    @staticmethod
+    def _compile(source, partials, title, escape=False):
+        """Inserează părțile comune și titlul, apoi compilează șablonul"""
+        title = html.escape(title) if escape else title
+        partials = {key: Template(partial).safe_substitute(title=title) for key, partial in partials.items()}
+        return Template(Template(source).safe_substitute(partials))
+    
+    def render(self, name, **context):
+        """Randează un email complet (subiect, text, HTML)"""
+        return self._render_cached(name, tuple(sorted(context.items())))
+    
+    def fragment(self, name, **context):
+        """Randează un fragment, de inserat în contextul altui șablon"""
+        rendered = self.render(name, **context)
+        return EmailFragment(rendered.text, rendered.html)
+    
+    def cache_info(self):
+        return self._render_cached.cache_info()
+    
+    def _render(self, name, items):
+        context = dict(self.DEFAULTS, **dict(items))
+        text_context = {
+            key: value.text if isinstance(value, EmailFragment) else value
+            for key, value in context.items()
+        }
+        html_context = {
+            key: value.html if isinstance(value, EmailFragment)
+            else html.escape(str(value)).replace("\n", "<br>")
+            for key, value in context.items()
+        }
+        template = self._compiled[name]
+        return RenderedEmail(
+            subject=template['subject'].substitute(text_context) if 'subject' in template else "",
+            text=template['text'].substitute(text_context),
+            html=template['html'].substitute(html_context)
+        )
+
+class MailTransport:
+    """Interfața comună a transporturilor de email folosite de worker-ul din outbox"""
+    
+    name = "base"
+    
+    def send(self, messages):
+        """Livrează mesajele; returnează eroarea (sau None) pentru fiecare mesaj"""
+        raise NotImplementedError
+    
+    def close_if_idle(self):
+        pass
+    
+    def close(self):
+        pass
+    
+    def stats(self):
+        return {}
+
+class RecordingTransport(MailTransport):
+    """Transport local care măsoară momentul și durata fiecărei livrări"""
+    
+    def __init__(self, max_timings=100000):
+        self._lock = threading.Lock()
+        self.timings = deque(maxlen=max_timings)
+    
+    def _store(self, msg):
+        raise NotImplementedError
+    
+    def send(self, messages):
+        errors = []
+        with self._lock:
+            for msg in messages:
+                started = time.perf_counter()
+                try:
+                    self._store(msg)
+                    errors.append(None)
+                except Exception as e:
+                    errors.append(str(e))
+                    continue
+                self.timings.append((time.time(), time.perf_counter() - started))
+        return errors
+    
+    def stats(self):
+        """Numărul de mesaje livrate, debitul (mesaje/s) și durata medie a unei livrări"""
+        with self._lock:
+            timings = list(self.timings)
+        if not timings:
+            return {'messages': 0}
+        elapsed = timings[-1][0] - timings[0][0]
+        return {
+            'messages': len(timings),
+            'per_second': round(len(timings) / elapsed, 1) if elapsed > 0 else None,
+            'avg_store_ms': round(1000 * sum(duration for _, duration in timings) / len(timings), 3)
+        }
+    
+    def reset(self):
+        with self._lock:
+            self.timings.clear()
+
+class MemoryTransport(RecordingTransport):
+    """Păstrează mesajele în memorie; util pentru teste de încărcare fără server SMTP"""
+    
+    name = "memory"
+    
+    def __init__(self, max_messages=10000):
+        super().__init__()
+        self.messages = deque(maxlen=max_messages)
+    
+    def _store(self, msg):
+        self.messages.append(msg)
+
+class MaildirTransport(RecordingTransport):
+    """Scrie fiecare mesaj ca fișier într-un Maildir local"""
+    
+    name = "maildir"
+    
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.maildir = mailbox.Maildir(path, create=True)
+    
+    def _store(self, msg):
+        self.maildir.add(msg)
+
+class NullTransport(MailTransport):
+    """Acceptă și ignoră toate mesajele"""
+    
+    name = "null"
+    
+    def __init__(self):
+        self.messages_discarded = 0
+    
+    def send(self, messages):
+        self.messages_discarded += len(messages)
+        return [None] * len(messages)
+    
+    def stats(self):
+        return {'messages': self.messages_discarded}
+
+class SMTPTransport(MailTransport):
+    """Sesiune SMTP autentificată, refolosită între loturi de mesaje.
+
+    Sesiunea este închisă după `idle_timeout` secunde fără trafic și verificată
+    cu NOOP înainte de refolosire, dacă a stat nefolosită mai mult de
+    `noop_after` secunde; o sesiune căzută este redeschisă automat.
+    """
+    
+    name = "smtp"
+    
+    def __init__(self, config, idle_timeout=60, noop_after=10, timeout=30):
+        self.config = config
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self.timeout = timeout
+        self._server = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.messages_sent = 0
+    
+    def _connect(self):
+        """Deschide o sesiune nouă: conectare, STARTTLS, autentificare"""
+        config = self.config
+        server = smtplib.SMTP(config.smtp_server, config.smtp_port, timeout=self.timeout)
+        try:
+            server.starttls()
+            server.login(config.email_from, config.email_password)
+        except Exception:
+            server.close()
+            raise
+        self.connections_opened += 1
+        return server
+    
+    def _disconnect(self):
+        """Închide sesiunea curentă, dacă există"""
+        server, self._server = self._server, None
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+    
+    def _session(self):
+        """Returnează o sesiune validă, refolosind-o pe cea existentă când este posibil"""
+        idle = time.monotonic() - self._last_used
+        if self._server is not None and idle > self.idle_timeout:
+            self._disconnect()
+        elif self._server is not None and idle > self.noop_after:
+            try:
+                if self._server.noop()[0] != 250:
+                    self._disconnect()
+            except Exception:
+                self._disconnect()
+        if self._server is None:
+            self._server = self._connect()
+        return self._server
+    
+    def send(self, messages):
+        """Trimite mesajele pe sesiunea partajată; returnează eroarea (sau None) pentru fiecare mesaj"""
+        with self._lock:
+            try:
+                server = self._session()
+            except Exception as e:
+                return [f"Conectare SMTP eșuată: {e}"] * len(messages)
+            
+            errors = []
+            for msg in messages:
+                try:
+                    try:
+                        server.send_message(msg)
+                    except smtplib.SMTPServerDisconnected:
+                        # Serverul a închis sesiunea între timp: o singură reconectare
+                        self._server = None
+                        server = self._session()
+                        server.send_message(msg)
+                    errors.append(None)
+                    self.messages_sent += 1
+                except Exception as e:
+                    errors.append(str(e))
+                self._last_used = time.monotonic()
+            return errors
+    
+    def close_if_idle(self):
+        """Închide sesiunea dacă a depășit timpul de inactivitate"""
+        with self._lock:
+            if self._server is not None and time.monotonic() - self._last_used > self.idle_timeout:
+                self._disconnect()
+    
+    def close(self):
+        """Închide sesiunea, indiferent de starea ei"""
+        with self._lock:
+            self._disconnect()
+    
+    def stats(self):
+        return {'messages': self.messages_sent, 'connections': self.connections_opened}
+
+def create_mail_transport(config):
+    """Transportul de email ales prin `MAIL_TRANSPORT` (smtp, memory, maildir, null)"""
+    if config.transport == 'memory':
+        return MemoryTransport()
+    if config.transport == 'maildir':
+        return MaildirTransport(config.maildir_path)
+    if config.transport == 'null':
+        return NullTransport()
+    if config.transport != 'smtp':
+        print(f"⚠️ MAIL_TRANSPORT necunoscut: {config.transport}; se folosește SMTP")
+    return SMTPTransport(config)
+
+class TokenBucket:
+    """Limitator de tip token bucket, cu plafon zilnic, pentru trimiterea de email-uri.
+
+    Bucket-ul se umple continuu cu `rate_per_minute` tokeni pe minut, până la
+    `burst`; fiecare mesaj trimis consumă un token.
+    """
+    
+    def __init__(self, rate_per_minute, burst, daily_limit=None):
+        self.rate_per_second = rate_per_minute / 60
+        self.burst = max(1, burst)
+        self.daily_limit = daily_limit
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._day = datetime.now().date()
+        self._sent_today = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+        today = datetime.now().date()
+        if today != self._day:
+            self._day = today
+            self._sent_today = 0
+        while self._recent and now - self._recent[0] > 60:
+            self._recent.popleft()
+    
+    def available(self):
+        """Câte mesaje pot fi trimise acum"""
+        with self._lock:
+            self._refill()
+            available = int(self._tokens)
+            if self.daily_limit:
+                available = min(available, self.daily_limit - self._sent_today)
+            return max(0, available)
+    
+    def consume(self, count):
+        """Consumă tokenii pentru `count` mesaje trimise"""
+        with self._lock:
+            self._refill()
+            self._tokens -= count
+            self._sent_today += count
+            now = time.monotonic()
+            self._recent.extend([now] * count)
+    
+    def seconds_until_available(self):
+        """Cât trebuie așteptat până la următorul token"""
+        with self._lock:
+            self._refill()
+            if self.daily_limit and self._sent_today >= self.daily_limit:
+                tomorrow = datetime.combine(self._day + timedelta(days=1), datetime.min.time())
+                return (tomorrow - datetime.now()).total_seconds()
+            if self._tokens >= 1 or self.rate_per_second <= 0:
+                return 0.0
+            return (1 - self._tokens) / self.rate_per_second
+    
+    def stats(self):
+        with self._lock:
+            self._refill()
+            return {
+                'tokens': round(self._tokens, 2),
+                'burst': self.burst,
+                'rate_per_minute': round(self.rate_per_second * 60, 2),
+                'sent_last_minute': len(self._recent),
+                'sent_today': self._sent_today,
+                'daily_limit': self.daily_limit
+            }
+    
+    def day_start(self):
+        """Începutul zilei (ora locală) pentru care se numără plafonul zilnic"""
+        with self._lock:
+            self._refill()
+            return datetime.combine(self._day, datetime.min.time())
+    
+    def seed_sent_today(self, count):
+        """Preia numărul de mesaje deja trimise azi (de ex. înainte de o repornire)"""
+        with self._lock:
+            self._refill()
+            self._sent_today = max(self._sent_today, int(count))
+
+class EmailOutbox:
+    """Coada persistentă de email-uri (tabela `email_outbox`).
+
+    Cererile din interfață doar pun mesajele în coadă; livrarea, reîncercările
+    și starea fiecărui mesaj sunt gestionate de `EmailOutboxWorker`.
+    """
+    
+    # Coloana din `orders` marcată abia după livrarea efectivă a mesajului
+    SENT_FLAGS = {'receipt': 'receipt_sent'}
+    
+    def __init__(self, db, max_attempts=6, retry_base_seconds=30, retry_max_seconds=3600):
+        self.db = db
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self.duplicates_skipped = 0
+    
+    @staticmethod
+    def idempotency_key(order_id, kind, transition=None):
+        """Cheia unui email: comandă, șablon și (opțional) tranziția care l-a declanșat"""
+        key = f"{int(order_id)}:{kind}"
+        return f"{key}:{transition}" if transition else key
+    
+    def enqueue(self, messages):
+        """Pune în coadă mesaje (tip, order_id, mesaj MIME[, cheie de idempotență]).
+
+        Rulează în tranzacția apelantului, dacă există. Un mesaj a cărui cheie se
+        află deja în `sent_emails` este ignorat; pentru el se returnează None.
+        """
+        ids = []
+        with self.db.transaction() as conn:
+            for kind, order_id, msg, *key in messages:
+                key = key[0] if key else None
+                if key and not conn.execute(
+                    'INSERT OR IGNORE INTO sent_emails (idempotency_key, order_id, kind) VALUES (?, ?, ?)',
+                    (key, order_id, kind)
+                ).rowcount:
+                    with self._lock:
+                        self.duplicates_skipped += 1
+                    ids.append(None)
+                    continue
+                
+                outbox_id = conn.execute('''
+                    INSERT INTO email_outbox (order_id, kind, priority, recipient, subject, message)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (
+                    int(order_id) if order_id is not None else None,
+                    kind,
+                    EMAIL_PRIORITIES.get(kind, 1),
+                    msg['To'],
+                    msg['Subject'],
+                    msg.as_string()
+                )).lastrowid
+                if key:
+                    conn.execute('UPDATE sent_emails SET outbox_id = ? WHERE idempotency_key = ?', (outbox_id, key))
+                ids.append(outbox_id)
+        
+        if any(outbox_id is not None for outbox_id in ids):
+            self.wakeup.set()
+        return ids
+    
+    def claim_due(self, limit=20):
+        """Rezervă mesajele scadente pentru livrare (status `sending`)"""
+        with self.db.transaction() as conn:
+            rows = conn.execute('''
+                SELECT id, order_id, kind, message, attempts FROM email_outbox
+                WHERE status = 'pending' AND next_attempt_at <= CURRENT_TIMESTAMP
+                ORDER BY priority, next_attempt_at, id
+                LIMIT ?
+            ''', (limit,)).fetchall()
+            conn.executemany("UPDATE email_outbox SET status = 'sending' WHERE id = ?",
+                             [(row[0],) for row in rows])
+        return rows
+    
+    def mark_sent(self, rows):
+        """Marchează mesajele livrate și comenzile pentru care livrarea contează"""
+        with self.db.transaction() as conn:
+            conn.executemany('''
+                UPDATE email_outbox
+                SET status = 'sent', attempts = attempts + 1, sent_at = CURRENT_TIMESTAMP, last_error = NULL
+                WHERE id = ?
+            ''', [(row[0],) for row in rows])
+            for row in rows:
+                column = self.SENT_FLAGS.get(row[2])
+                if column and row[1] is not None:
+                    conn.execute(f'UPDATE orders SET {column} = 1 WHERE id = ?', (row[1],))
+    
+    def mark_failed(self, failures):
+        """Reprogramează mesajele eșuate cu backoff exponențial, până la `max_attempts`"""
+        updates = []
+        for row, error in failures:
+            attempts = row[4] + 1
+            if attempts >= self.max_attempts:
+                status, delay = 'failed', 0
+            else:
+                status = 'pending'
+                delay = min(self.retry_base_seconds * 2 ** (attempts - 1), self.retry_max_seconds)
+            updates.append((status, attempts, error[:500], f'+{delay} seconds', row[0]))
+        with self.db.transaction() as conn:
+            conn.executemany('''
+                UPDATE email_outbox
+                SET status = ?, attempts = ?, last_error = ?, next_attempt_at = datetime('now', ?)
+                WHERE id = ?
+            ''', updates)
+    
+    def sent_since(self, since):
+        """Numărul de mesaje livrate începând cu `since` (oră locală; `sent_at` este în UTC)"""
+        since_utc = since.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        with self.db.connection() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM email_outbox WHERE status = 'sent' AND sent_at >= ?", (since_utc,)
+            ).fetchone()[0]
+    
+    def due_count(self):
+        """Numărul de mesaje scadente care așteaptă livrarea"""
+        with self.db.connection() as conn:
+            return conn.execute('''
+                SELECT COUNT(*) FROM email_outbox
+                WHERE status = 'pending' AND next_attempt_at <= CURRENT_TIMESTAMP
+            ''').fetchone()[0]
+    
+    def recover_interrupted(self):
+        """Readuce în coadă mesajele rămase în `sending` după o oprire bruscă"""
+        with self.db.transaction() as conn:
+            return conn.execute("UPDATE email_outbox SET status = 'pending' WHERE status = 'sending'").rowcount
+    
+    def retry(self, message_ids=None):
+        """Repune în coadă mesajele eșuate (toate sau doar cele indicate)"""
+        with self.db.transaction() as conn:
+            query = '''
+                UPDATE email_outbox
+                SET status = 'pending', attempts = 0, next_attempt_at = CURRENT_TIMESTAMP
+                WHERE status = 'failed'
+            '''
+            if message_ids is None:
+                retried = conn.execute(query).rowcount
+            else:
+                retried = conn.executemany(query + ' AND id = ?',
+                                           [(int(message_id),) for message_id in message_ids]).rowcount
+        self.wakeup.set()
+        return retried
+    
+    def status_counts(self):
+        """Numărul de mesaje pentru fiecare status"""
+        with self.db.connection() as conn:
+            return dict(conn.execute('SELECT status, COUNT(*) FROM email_outbox GROUP BY status').fetchall())
+    
+    def get_messages(self, status=None, limit=100):
+        """Cele mai recente mesaje din coadă, fără conținutul serializat"""
+        query = '''
+            SELECT id, order_id, kind, priority, recipient, subject, status, attempts,
+                   next_attempt_at, last_error, created_at, sent_at
+            FROM email_outbox
+        '''
+        params = []
+        if status:
+            query += ' WHERE status = ?'
+            params.append(status)
+        query += ' ORDER BY id DESC LIMIT ?'
+        params.append(limit)
+        with self.db.connection() as conn:
+            return pd.read_sql_query(query, conn, params=params)
+
+class EmailOutboxWorker(threading.Thread):
+    """Thread de fundal care golește `email_outbox`, în loturi, cu reîncercări"""
+    
+    def __init__(self, outbox, deliver, on_sent=None, on_idle=None, rate_limiter=None,
+                 poll_interval=5.0, batch_size=20):
+        super().__init__(name="email-outbox-worker", daemon=True)
+        self.outbox = outbox
+        self.deliver = deliver
+        self.on_sent = on_sent
+        self.on_idle = on_idle
+        self.rate_limiter = rate_limiter
+        self.deferred = 0
+        self.rate_limited_waits = 0
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._stopping = threading.Event()
+    
+    def run(self):
+        try:
+            self.outbox.recover_interrupted()
+        except Error as e:
+            print(f"⚠️ Eroare la recuperarea cozii de email: {e}")
+        
+        while not self._stopping.is_set():
+            # Semnalul este resetat înainte de citire, ca un enqueue concurent să nu se piardă
+            self.outbox.wakeup.clear()
+            try:
+                processed = self.process_once()
+            except Exception as e:
+                print(f"⚠️ Eroare în worker-ul de email: {e}")
+                processed = 0
+            
+            # Cât timp există mesaje scadente, lotul următor pornește imediat;
+            # la limita de trimitere se așteaptă doar până la următorul token
+            if not processed:
+                if self.on_idle:
+                    self.on_idle()
+                wait = self.poll_interval
+                if self.deferred:
+                    wait = min(wait, max(0.1, self.rate_limiter.seconds_until_available()))
+                self.outbox.wakeup.wait(wait)
+    
+    def process_once(self):
+        """Livrează un lot de mesaje scadente; returnează numărul de mesaje procesate"""
+        limit = self.batch_size
+        if self.rate_limiter:
+            limit = min(limit, self.rate_limiter.available())
+            if limit < 1:
+                # Mesajele rămân în coadă și pleacă, în ordinea priorității, când apar tokeni
+                self.deferred = self.outbox.due_count()
+                if self.deferred:
+                    self.rate_limited_waits += 1
+                return 0
+        
+        rows = self.outbox.claim_due(limit)
+        self.deferred = 0
+        if not rows:
+            return 0
+        
+        if self.rate_limiter:
+            self.rate_limiter.consume(len(rows))
+        errors = self.deliver([message_from_string(row[3]) for row in rows])
+        sent = [row for row, error in zip(rows, errors) if error is None]
+        failed = [(row, error) for row, error in zip(rows, errors) if error is not None]
+        
+        if sent:
+            self.outbox.mark_sent(sent)
+            if self.on_sent:
+                self.on_sent(sent)
+        if failed:
+            self.outbox.mark_failed(failed)
+            print(f"⚠️ {len(failed)} email-uri nelivrate, vor fi reîncercate")
+        return len(rows)
+    
+    def stop(self, timeout=10):
+        """Oprește worker-ul după lotul curent"""
+        self._stopping.set()
+        self.outbox.wakeup.set()
+        if self.is_alive():
+            self.join(timeout)
+
+class PeriodicJob(threading.Thread):
+    """Thread de fundal care apelează periodic o funcție"""
+    
+    def __init__(self, name, func, check_interval=300):
+        super().__init__(name=name, daemon=True)
+        self.func = func
+        self.check_interval = check_interval
+        self._stopping = threading.Event()
+    
+    def run(self):
+        while not self._stopping.wait(self.check_interval):
+            try:
+                self.func()
+            except Exception as e:
+                print(f"⚠️ Eroare în job-ul {self.name}: {e}")
+    
+    def stop(self, timeout=10):
+        self._stopping.set()
+        if self.is_alive():
+            self.join(timeout)
+
+class BlobStore:
+    """Depozit de fișiere adresat prin conținut (SHA-256), scris pe bucăți de dimensiune fixă.
+
+    Un blob este salvat la `root/ab/cd/<sha256>`; o reîncărcare a aceluiași fișier
+    nu mai ocupă spațiu. Memoria folosită nu depinde de mărimea fișierului.
+    Data modificării unui blob este momentul ultimei încărcări: un blob încărcat
+    recent, dar încă neatașat unei comenzi, nu este șters de colectarea blob-urilor orfane.
+    """
+    
+    def __init__(self, root='project_blobs', chunk_size=8 * 1024 * 1024):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.tmp_dir = os.path.join(root, 'tmp')
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.stored = 0
+        self.deduplicated = 0
+        self.deleted = 0
+        # Spațiul ocupat de blob-uri, calculat la prima cerere și apoi ținut la zi
+        self._used_bytes = None
+    
+    @staticmethod
+    def _validate(sha256):
+        if len(sha256) != 64 or any(c not in '0123456789abcdef' for c in sha256):
+            raise ValueError(f"Hash SHA-256 invalid: {sha256!r}")
+        return sha256
+    
+    def path(self, sha256):
+        sha256 = self._validate(sha256)
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+    
+    def exists(self, sha256):
+        return os.path.exists(self.path(sha256))
+    
+    def size(self, sha256):
+        return os.path.getsize(self.path(sha256))
+    
+    def open(self, sha256):
+        return open(self.path(sha256), 'rb')
+    
+    def hash_prefix(self, path, length):
+        """Starea SHA-256 pentru primii `length` octeți ai unui fișier parțial"""
+        hasher = hashlib.sha256()
+        with open(path, 'rb') as partial:
+            remaining = length
+            while remaining:
+                chunk = partial.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                remaining -= len(chunk)
+        return hasher
+    
+    def temp_file(self):
+        """Fișier temporar în același sistem de fișiere ca blob-urile (pentru `commit`)"""
+        return tempfile.NamedTemporaryFile(dir=self.tmp_dir, prefix='upload-', delete=False)
+    
+    def put(self, fileobj):
+        """Copiază un flux în depozit; returnează (sha256, mărime)"""
+        digest = hashlib.sha256()
+        size = 0
+        with self.temp_file() as tmp:
+            try:
+                while True:
+                    chunk = fileobj.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            except BaseException:
+                tmp.close()
+                os.unlink(tmp.name)
+                raise
+        return self.commit(tmp.name, digest.hexdigest()), size
+    
+    def commit(self, tmp_path, sha256):
+        """Mută un fișier temporar complet sub hash-ul său; duplicatele sunt șterse"""
+        target = self.path(sha256)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with self._lock:
+            if os.path.exists(target):
+                os.unlink(tmp_path)
+                os.utime(target)
+                self.deduplicated += 1
+            else:
+                size = os.path.getsize(tmp_path)
+                os.replace(tmp_path, target)
+                self.stored += 1
+                if self._used_bytes is not None:
+                    self._used_bytes += size
+        return sha256
+    
+    def delete(self, sha256, min_age=0):
+        """Șterge un blob neatins de cel puțin `min_age` secunde; returnează dacă a fost șters"""
+        path = self.path(sha256)
+        with self._lock:
+            try:
+                stat = os.stat(path)
+                if time.time() - stat.st_mtime < min_age:
+                    return False
+                os.unlink(path)
+            except FileNotFoundError:
+                return False
+            self.deleted += 1
+            if self._used_bytes is not None:
+                self._used_bytes -= stat.st_size
+        return True
+    
+    def _scan(self):
+        for level1 in os.scandir(self.root):
+            if not level1.is_dir() or len(level1.name) != 2:
+                continue
+            for level2 in os.scandir(level1.path):
+                if not level2.is_dir():
+                    continue
+                for entry in os.scandir(level2.path):
+                    if entry.is_file() and len(entry.name) == 64:
+                        yield entry
+    
+    def list_blobs(self):
+        """Hash-urile și vârsta (în secunde) tuturor blob-urilor din depozit"""
+        now = time.time()
+        return [(entry.name, now - entry.stat().st_mtime) for entry in self._scan()]
+    
+    def used_bytes(self):
+        """Octeții ocupați de blob-uri (parcurge depozitul doar la primul apel)"""
+        with self._lock:
+            if self._used_bytes is None:
+                self._used_bytes = sum(entry.stat().st_size for entry in self._scan())
+            return self._used_bytes
+    
+    def stats(self):
+        with self._lock:
+            return {'stored': self.stored, 'deduplicated': self.deduplicated, 'deleted': self.deleted}
+
+class ArchiveInspector:
+    """Rezumă o arhivă .zip/.rar din directorul central, fără extragere.
+    
+    Sunt citite doar metadatele intrărilor (mărimi, nume) și, pentru verificarea
+    referințelor, fișierele text mici de materiale (.mtl, .gltf). O intrare care nu
+    poate fi citită (compresie nesuportată, parolă, date corupte) este doar trecută
+    în lista `uninspectable`.
+    """
+    
+    SCENE_EXTENSIONS = {'.skp', '.max', '.rvt', '.blend', '.dwg', '.3ds', '.fbx', '.obj', '.c4d', '.pln', '.ls', '.gltf', '.glb'}
+    TEXTURE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.tif', '.tiff', '.tga', '.bmp', '.exr', '.hdr', '.psd', '.webp', '.dds'}
+    ARCHIVE_EXTENSIONS = {'.zip', '.rar', '.7z', '.gz', '.tar'}
+    MAX_REFERENCE_FILE = 1024 * 1024
+    # Erori de citire a unei arhive sau a unei intrări din ea
+    READ_ERRORS = (NotImplementedError, RuntimeError, EOFError, zipfile.BadZipFile, zlib.error) + (
+        (rarfile.Error,) if rarfile is not None else ()
+    )
+    
+    def __init__(self, max_ratio=100, max_entry_ratio=1000, max_total_bytes=100 * 1024 ** 3, max_entries=200000):
+        self.max_ratio = max_ratio
+        self.max_entry_ratio = max_entry_ratio
+        self.max_total_bytes = max_total_bytes
+        self.max_entries = max_entries
+    
+    def inspect(self, path):
+        """Returnează rezumatul arhivei (dict serializabil JSON) sau None dacă nu este o arhivă"""
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                entries = [(info.filename, info.file_size, info.compress_size, info.is_dir(), bool(info.flag_bits & 0x1))
+                           for info in archive.infolist()]
+                summary = self._summarize('zip', entries, os.path.getsize(path))
+                self._check_references(summary, archive, entries)
+            return summary
+        if rarfile is not None and rarfile.is_rarfile(path):
+            with rarfile.RarFile(path) as archive:
+                entries = [(info.filename, info.file_size, info.compress_size, info.is_dir(), info.needs_password())
+                           for info in archive.infolist()]
+                summary = self._summarize('rar', entries, os.path.getsize(path))
+                self._check_references(summary, archive, entries)
+            return summary
+        with open(path, 'rb') as f:
+            if f.read(6) == b'Rar!\x1a\x07':
+                return {'format': 'rar', 'error': "Pachetul `rarfile` nu este instalat: arhiva .rar nu poate fi inspectată"}
+        return None
+    
+    def _summarize(self, archive_format, entries, archive_size):
+        files = [entry for entry in entries if not entry[3]]
+        total_size = sum(entry[1] for entry in files)
+        compressed_size = sum(entry[2] for entry in files)
+        extensions = Counter(posixpath.splitext(entry[0])[1].lower() or '(fără extensie)' for entry in files)
+        scene_files = [entry[0] for entry in files if posixpath.splitext(entry[0])[1].lower() in self.SCENE_EXTENSIONS]
+        texture_count = sum(count for extension, count in extensions.items() if extension in self.TEXTURE_EXTENSIONS)
+        
+        warnings = []
+        ratio = total_size / compressed_size if compressed_size else 0
+        if ratio > self.max_ratio and total_size > 1024 ** 3:
+            warnings.append(f"💣 Posibil zip bomb: raport de compresie {ratio:.0f}:1")
+        suspicious = [entry[0] for entry in files if entry[2] and entry[1] / entry[2] > self.max_entry_ratio]
+        if suspicious:
+            warnings.append(f"💣 {len(suspicious)} fișiere cu raport de compresie peste {self.max_entry_ratio}:1 (ex. {suspicious[0]})")
+        if total_size > self.max_total_bytes:
+            warnings.append(f"💣 Dimensiune necomprimată de {total_size / 1024 ** 3:.1f} GB")
+        if len(entries) > self.max_entries:
+            warnings.append(f"💣 Prea multe intrări în arhivă ({len(entries)})")
+        unsafe = [entry[0] for entry in entries
+                  if entry[0].startswith(('/', '\\')) or '..' in entry[0].replace('\\', '/').split('/')]
+        if unsafe:
+            warnings.append(f"⚠️ Căi nesigure în arhivă (ex. {unsafe[0]})")
+        if any(entry[4] for entry in files):
+            warnings.append("🔒 Arhiva conține fișiere protejate cu parolă")
+        nested = sum(count for extension, count in extensions.items() if extension in self.ARCHIVE_EXTENSIONS)
+        if nested:
+            warnings.append(f"📦 {nested} arhive în interiorul arhivei (neinspectate)")
+        if not scene_files:
+            warnings.append("⚠️ Niciun fișier de scenă 3D/CAD în arhivă")
+        elif not texture_count and any(not name.lower().endswith(('.dwg', '.rvt')) for name in scene_files):
+            warnings.append("🖼️ Nicio textură în arhivă: materialele scenei pot lipsi")
+        
+        return {
+            'format': archive_format,
+            'archive_size': archive_size,
+            'entries': len(entries),
+            'files': len(files),
+            'total_size': total_size,
+            'compressed_size': compressed_size,
+            'extensions': dict(extensions.most_common()),
+            'scene_files': scene_files[:20],
+            'texture_count': texture_count,
+            'warnings': warnings
+        }
+    
+    def _check_references(self, summary, archive, entries):
+        """Completează rezumatul cu texturile lipsă și fișierele de materiale necitibile"""
+        summary['missing_references'], uninspectable = self._missing_references(archive, entries)
+        summary['uninspectable'] = uninspectable[:20]
+        if uninspectable:
+            summary['warnings'].append(
+                f"⚠️ {len(uninspectable)} fișiere de materiale nu au putut fi citite (ex. {uninspectable[0]})"
+            )
+    
+    def _missing_references(self, archive, entries):
+        """Texturile referite de fișierele .mtl/.gltf din arhivă, dar absente din ea; și intrările necitibile"""
+        basenames = {posixpath.basename(entry[0].replace('\\', '/')).lower() for entry in entries if not entry[3]}
+        missing = set()
+        uninspectable = []
+        for name, size, _, is_dir, encrypted in entries:
+            extension = posixpath.splitext(name)[1].lower()
+            if is_dir or encrypted or size > self.MAX_REFERENCE_FILE or extension not in ('.mtl', '.gltf'):
+                continue
+            try:
+                with archive.open(name) as reference_file:
+                    content = reference_file.read(self.MAX_REFERENCE_FILE).decode('utf-8', errors='replace')
+            except self.READ_ERRORS:
+                uninspectable.append(name)
+                continue
+            if extension == '.mtl':
+                references = [line.split()[-1] for line in content.splitlines()
+                              if line.strip().lower().startswith(('map_', 'bump', 'disp', 'refl')) and len(line.split()) > 1]
+            else:
+                try:
+                    references = [image.get('uri', '') for image in json.loads(content).get('images', [])]
+                except (ValueError, AttributeError):
+                    references = []
+            for reference in references:
+                if reference and not reference.startswith('data:'):
+                    basename = posixpath.basename(reference.replace('\\', '/')).lower()
+                    if basename not in basenames:
+                        missing.add(basename)
+        return sorted(missing)[:50], uninspectable
+
+class UploadError(Exception):
+    """Eroare de protocol la o încărcare reluabilă, cu codul HTTP corespunzător"""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class ResumableUploads:
+    """Încărcări reluabile (protocol tus 1.0.0), asamblate direct în depozitul de blob-uri.
+    
+    Offset-ul unei încărcări este mărimea fișierului parțial de pe disc, deci o
+    încărcare întreruptă (sau un restart al serverului) continuă de unde a rămas.
+    """
+    
+    def __init__(self, db, blob_store, on_complete, on_attached=None, max_bytes=20 * 1024 ** 3):
+        self.db = db
+        self.blob_store = blob_store
+        self.on_complete = on_complete
+        self.on_attached = on_attached
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._busy = set()
+        # Starea SHA-256 a încărcărilor active: (hasher, offset)
+        self._hashers = {}
+    
+    def _partial_path(self, upload_id):
+        return os.path.join(self.blob_store.tmp_dir, f'tus-{upload_id}')
+    
+    def create(self, order_id, token, filename, length):
+        """Creează o încărcare pentru comanda `order_id`; returnează ID-ul ei"""
+        if length > self.max_bytes:
+            raise UploadError(413, f"Fișierul depășește limita de {self.max_bytes} octeți")
+        with self.db.connection() as conn:
+            row = conn.execute('SELECT upload_token FROM orders WHERE id = ? AND is_deleted = 0',
+                               (order_id,)).fetchone()
+        if not row or not row[0] or not hmac.compare_digest(row[0], token or ''):
+            raise UploadError(403, "Comandă sau token de încărcare invalid")
+        
+        upload_id = uuid.uuid4().hex
+        open(self._partial_path(upload_id), 'wb').close()
+        with self.db.transaction() as conn:
+            conn.execute('INSERT INTO uploads (id, order_id, filename, length) VALUES (?, ?, ?, ?)',
+                         (upload_id, order_id, filename, length))
+        if length == 0:
+            self._finalize(upload_id)
+        return upload_id
+    
+    def get(self, upload_id):
+        """Returnează starea încărcării (dict cu `offset`) sau None"""
+        with self.db.connection() as conn:
+            row = conn.execute(
+                'SELECT id, order_id, filename, length, status, sha256 FROM uploads WHERE id = ?',
+                (upload_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        upload = dict(zip(('id', 'order_id', 'filename', 'length', 'status', 'sha256'), row))
+        if upload['status'] == 'completed':
+            upload['offset'] = upload['length']
+        else:
+            try:
+                upload['offset'] = os.path.getsize(self._partial_path(upload_id))
+            except OSError:
+                upload['offset'] = 0
+        return upload
+    
+    @contextmanager
+    def _exclusive(self, upload_id):
+        """Un singur PATCH poate scrie o încărcare la un moment dat"""
+        with self._lock:
+            if upload_id in self._busy:
+                raise UploadError(409, "Încărcarea este scrisă de o altă cerere")
+            self._busy.add(upload_id)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._busy.discard(upload_id)
+    
+    def _hasher(self, upload_id, offset):
+        """Starea SHA-256 pentru primii `offset` octeți; recalculată de pe disc după un restart"""
+        hasher, hashed = self._hashers.get(upload_id, (None, None))
+        if hashed != offset:
+            hasher = self.blob_store.hash_prefix(self._partial_path(upload_id), offset)
+        return hasher
+    
+    def append(self, upload_id, offset, stream, content_length):
+        """Scrie `content_length` octeți din flux la `offset`; returnează noul offset"""
+        with self._exclusive(upload_id):
+            upload = self.get(upload_id)
+            if upload is None:
+                raise UploadError(404, "Încărcare inexistentă")
+            if upload['status'] == 'completed':
+                raise UploadError(409, "Încărcarea este deja finalizată")
+            if offset != upload['offset']:
+                raise UploadError(409, f"Upload-Offset trebuie să fie {upload['offset']}")
+            if offset + content_length > upload['length']:
+                raise UploadError(413, "Datele depășesc Upload-Length")
+            
+            hasher = self._hasher(upload_id, offset)
+            written = offset
+            try:
+                with open(self._partial_path(upload_id), 'r+b') as partial:
+                    partial.seek(offset)
+                    remaining = content_length
+                    while remaining:
+                        chunk = stream.read(min(self.blob_store.chunk_size, remaining))
+                        if not chunk:
+                            break
+                        partial.write(chunk)
+                        hasher.update(chunk)
+                        written += len(chunk)
+                        remaining -= len(chunk)
+            finally:
+                # Octeții primiți înainte de o deconectare rămân valabili pentru reluare
+                self._hashers[upload_id] = (hasher, written)
+            
+            if written == upload['length']:
+                self._finalize(upload_id)
+            return written
+    
+    def _finalize(self, upload_id):
+        """Atașează fișierul complet comenzii și îl mută în depozit, ca o singură operație.
+        
+        Dacă tranzacția eșuează, încărcarea rămâne `uploading` cu fișierul parțial
+        complet, iar un PATCH gol la offset-ul final reia finalizarea.
+        """
+        partial_path = self._partial_path(upload_id)
+        hasher, size = self._hashers.get(upload_id, (None, None))
+        if hasher is None:
+            size = os.path.getsize(partial_path)
+            hasher = self._hasher(upload_id, size)
+        sha256 = hasher.hexdigest()
+        try:
+            with self.db.transaction() as conn:
+                order_id, filename = conn.execute('''
+                    UPDATE uploads SET status = 'completed', sha256 = ?, completed_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                    RETURNING order_id, filename
+                ''', (sha256, upload_id)).fetchone()
+                self.on_complete(order_id, filename, sha256, size)
+                # Ultimul pas din tranzacție: o mutare eșuată anulează și actualizările de mai sus
+                self.blob_store.commit(partial_path, sha256)
+        except BaseException:
+            if not os.path.exists(partial_path) and self.blob_store.exists(sha256):
+                # Commit-ul SQLite a eșuat după mutare: fișierul parțial este refăcut din blob
+                shutil.copyfile(self.blob_store.path(sha256), partial_path)
+            raise
+        self._hashers.pop(upload_id, None)
+        if self.on_attached:
+            self.on_attached(order_id)
+    
+    def cancel_unfinished(self, order_id):
+        """Anulează încărcările neterminate ale unei comenzi; returnează câte au fost anulate"""
+        with self.db.connection() as conn:
+            upload_ids = [row[0] for row in conn.execute(
+                "SELECT id FROM uploads WHERE order_id = ? AND status != 'completed'", (order_id,)
+            )]
+        cancelled = 0
+        for upload_id in upload_ids:
+            try:
+                self.terminate(upload_id)
+                cancelled += 1
+            except UploadError as e:
+                print(f"⚠️ Încărcarea {upload_id} nu a putut fi anulată: {e}")
+        return cancelled
+    
+    def terminate(self, upload_id):
+        """Renunță la o încărcare neterminată (extensia `termination`)"""
+        with self._exclusive(upload_id):
+            upload = self.get(upload_id)
+            if upload is None:
+                raise UploadError(404, "Încărcare inexistentă")
+            if upload['status'] == 'completed':
+                raise UploadError(409, "Încărcarea este deja finalizată")
+            self._hashers.pop(upload_id, None)
+            with self.db.transaction() as conn:
+                conn.execute('DELETE FROM uploads WHERE id = ?', (upload_id,))
+            try:
+                os.unlink(self._partial_path(upload_id))
+            except OSError:
+                pass
+
+class TusRequestHandler(BaseHTTPRequestHandler):
+    """Endpoint HTTP tus 1.0.0 (core, creation, termination) peste `ResumableUploads`"""
+    
+    TUS_VERSION = '1.0.0'
+    protocol_version = 'HTTP/1.1'
+    uploads = None
+    # Originile (aplicația) din care un browser poate apela serverul
+    allowed_origins = frozenset()
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _send(self, status, headers=None, body=b''):
+        self.send_response(status)
+        self.send_header('Tus-Resumable', self.TUS_VERSION)
+        origin = self.headers.get('Origin')
+        if origin and origin in self.allowed_origins:
+            self.send_header('Access-Control-Allow-Origin', origin)
+            self.send_header('Access-Control-Expose-Headers', 'Location, Upload-Offset, Upload-Length, Tus-Resumable')
+        self.send_header('Vary', 'Origin')
+        self.send_header('Cache-Control', 'no-store')
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+    
+    def _upload_id(self):
+        parts = urlsplit(self.path).path.rstrip('/').split('/')
+        if len(parts) != 3 or parts[1] != 'files':
+            raise UploadError(404, "Resursă inexistentă")
+        return parts[2]
+    
+    def _header_int(self, name):
+        try:
+            value = int(self.headers.get(name, ''))
+        except ValueError:
+            raise UploadError(400, f"Header-ul {name} lipsește sau este invalid")
+        if value < 0:
+            raise UploadError(400, f"Header-ul {name} este invalid")
+        return value
+    
+    def _metadata(self):
+        metadata = {}
+        for pair in filter(None, (item.strip() for item in self.headers.get('Upload-Metadata', '').split(','))):
+            key, _, value = pair.partition(' ')
+            try:
+                metadata[key] = base64.b64decode(value, validate=True).decode('utf-8')
+            except ValueError:
+                raise UploadError(400, f"Upload-Metadata invalid pentru `{key}`")
+        return metadata
+    
+    def _handle(self, action):
+        try:
+            if self.command != 'OPTIONS' and self.headers.get('Tus-Resumable') != self.TUS_VERSION:
+                raise UploadError(412, "Versiune tus nesuportată")
+            action()
+        except UploadError as e:
+            # Corpul necitit al cererii ar fi interpretat ca o cerere nouă pe aceeași conexiune
+            self.close_connection = True
+            self._send(e.status, {'Content-Type': 'text/plain; charset=utf-8', 'Connection': 'close'},
+                       str(e).encode('utf-8'))
+        except Exception as e:
+            print(f"⚠️ Eroare în serverul de încărcare: {e}")
+            self.close_connection = True
+            self._send(500, {'Connection': 'close'})
+    
+    def do_OPTIONS(self):
+        self._handle(lambda: self._send(204, {
+            'Tus-Version': self.TUS_VERSION,
+            'Tus-Extension': 'creation,termination',
+            'Tus-Max-Size': self.uploads.max_bytes,
+            'Access-Control-Allow-Methods': 'POST, HEAD, PATCH, DELETE, OPTIONS',
+            'Access-Control-Allow-Headers': 'Tus-Resumable, Upload-Length, Upload-Metadata, Upload-Offset, Content-Type'
+        }))
+    
+    def do_POST(self):
+        def create():
+            if urlsplit(self.path).path.rstrip('/') != '/files':
+                raise UploadError(404, "Resursă inexistentă")
+            metadata = self._metadata()
+            try:
+                order_id = int(metadata.get('order_id', ''))
+            except ValueError:
+                raise UploadError(400, "Upload-Metadata trebuie să conțină `order_id`")
+            upload_id = self.uploads.create(order_id, metadata.get('token'),
+                                            metadata.get('filename'), self._header_int('Upload-Length'))
+            self._send(201, {'Location': f"/files/{upload_id}", 'Upload-Offset': 0})
+        self._handle(create)
+    
+    def do_HEAD(self):
+        def status():
+            upload = self.uploads.get(self._upload_id())
+            if upload is None:
+                raise UploadError(404, "Încărcare inexistentă")
+            self._send(200, {'Upload-Offset': upload['offset'], 'Upload-Length': upload['length']})
+        self._handle(status)
+    
+    def do_PATCH(self):
+        def append():
+            if self.headers.get('Content-Type') != 'application/offset+octet-stream':
+                raise UploadError(415, "Content-Type trebuie să fie application/offset+octet-stream")
+            offset = self.uploads.append(self._upload_id(), self._header_int('Upload-Offset'),
+                                         self.rfile, self._header_int('Content-Length'))
+            self._send(204, {'Upload-Offset': offset})
+        self._handle(append)
+    
+    def do_DELETE(self):
+        def terminate():
+            self.uploads.terminate(self._upload_id())
+            self._send(204)
+        self._handle(terminate)
+
+class UploadServer(threading.Thread):
+    """Serverul tus, rulat într-un thread de fundal lângă aplicația Streamlit.
+    
+    Ascultă implicit doar pe 127.0.0.1; clienții ajung la el prin adresa publică
+    `UPLOAD_PUBLIC_URL`, servită de un reverse proxy cu TLS.
+    """
+    
+    LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+    
+    def __init__(self, uploads, host='127.0.0.1', port=8502, allowed_origins=()):
+        super().__init__(name="upload-server", daemon=True)
+        handler = type('BoundTusRequestHandler', (TusRequestHandler,), {
+            'uploads': uploads,
+            'allowed_origins': frozenset(allowed_origins)
+        })
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+    
+    @classmethod
+    def public_url(cls, url):
+        """Adresa publică validată: HTTPS, sau HTTP doar pentru testare pe localhost; altfel None"""
+        if not url:
+            return None
+        parts = urlsplit(url.strip())
+        if parts.hostname and (parts.scheme == 'https' or parts.scheme == 'http' and parts.hostname in cls.LOCAL_HOSTS):
+            return url.strip().rstrip('/') + '/'
+        print("⚠️ UPLOAD_PUBLIC_URL trebuie să fie o adresă https://; încărcarea reluabilă este dezactivată")
+        return None
+    
+    @staticmethod
+    def origins(value):
+        """Originile (schemă://gazdă[:port]) dintr-o listă de URL-uri separate prin virgulă"""
+        origins = set()
+        for url in filter(None, (item.strip() for item in (value or '').split(','))):
+            parts = urlsplit(url)
+            if parts.scheme in ('http', 'https') and parts.netloc:
+                origins.add(f"{parts.scheme}://{parts.netloc}")
+        return origins
+    
+    def run(self):
+        self.httpd.serve_forever(poll_interval=0.5)
+    
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class PrefetchError(Exception):
+    """Eroare definitivă la preluarea unui link (nu are rost reîncercarea)"""
+
+class ManualDownloadRequired(PrefetchError):
+    """Link-ul duce la o pagină web din care fișierul nu poate fi preluat automat"""
+
+class UnsafeURLError(PrefetchError):
+    """Link refuzat: schemă nepermisă sau gazdă cu adresă internă (protecție SSRF)"""
+
+def is_public_address(address):
+    """Adresa IP este publică: nu este privată, loopback, link-local, rezervată sau multicast"""
+    ip = ipaddress.ip_address(address.split('%')[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+def check_public_url(url, allow_private=False):
+    """Permite doar link-uri http(s) către gazde care se rezolvă exclusiv la adrese publice"""
+    parts = urlsplit(url)
+    try:
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+    except ValueError:
+        raise UnsafeURLError(f"Port invalid în link: {url[:200]}")
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise UnsafeURLError(f"Sunt permise doar link-uri http(s): {url[:200]}")
+    if allow_private:
+        return
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)}
+    except socket.gaierror as e:
+        raise requests.ConnectionError(f"Gazda {parts.hostname} nu poate fi rezolvată: {e}")
+    internal = sorted(address for address in addresses if not is_public_address(address))
+    if internal:
+        raise UnsafeURLError(f"Gazda {parts.hostname} se rezolvă la o adresă internă ({internal[0]})")
+
+def open_public_url(session, url, method='GET', headers=None, json=None, timeout=30, allow_private=False,
+                    max_redirects=5):
+    """Trimite cererea urmând manual redirecționările, cu verificarea SSRF la fiecare pas"""
+    for _ in range(max_redirects + 1):
+        check_public_url(url, allow_private)
+        response = session.request(method, url, headers=headers, json=json, stream=True,
+                                   timeout=timeout, allow_redirects=False)
+        if not response.is_redirect:
+            return response
+        response.close()
+        url = urljoin(url, response.headers['Location'])
+    raise PrefetchError(f"Prea multe redirecționări (peste {max_redirects})")
+
+class _PublicPeerConnection:
+    """Verifică adresa la care s-a conectat efectiv socket-ul (protecție și la DNS rebinding)"""
+    
+    def _new_conn(self):
+        sock = super()._new_conn()
+        peer = sock.getpeername()[0]
+        if not is_public_address(peer):
+            sock.close()
+            raise UnsafeURLError(f"Conexiune refuzată către adresa internă {peer}")
+        return sock
+
+class PublicAddressAdapter(HTTPAdapter):
+    """Adaptor `requests` care refuză conexiunile către adrese interne"""
+    
+    POOL_CLASSES = {
+        scheme: type(f'Public{pool.__name__}', (pool,), {
+            'ConnectionCls': type(f'Public{pool.ConnectionCls.__name__}', (_PublicPeerConnection, pool.ConnectionCls), {})
+        })
+        for scheme, pool in (('http', HTTPConnectionPool), ('https', HTTPSConnectionPool))
+    }
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = dict(self.POOL_CLASSES)
 
-class NotificationService:
+class DownloadPageParser(HTMLParser):
+    """Extrage formularul sau link-ul de confirmare dintr-o pagină de avertizare Google Drive"""
+    
     def __init__(self):
-        self.notification_queue = Queue()
+        super().__init__()
+        self.form_action = None
+        self.fields = {}
+        self.confirm_href = None
+        self._in_form = False
     
-    def add_notification(self, order_id, message, type="info", recipient_email=None):
-        """Adaugă o notificare în coadă"""
-        notification = {
-            'order_id': order_id,
-            'message': message,
-            'type': type,
-            'recipient_email': recipient_email,
-            'timestamp': datetime.now(),
-            'read': False
-        }
-        self.notification_queue.put(notification)
-        self.save_notification_to_db(notification)
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'form' and self.form_action is None and 'download' in (attrs.get('action') or ''):
+            self.form_action = attrs['action']
+            self._in_form = True
+        elif tag == 'input' and self._in_form and attrs.get('name'):
+            self.fields[attrs['name']] = attrs.get('value') or ''
+        elif tag == 'a' and self.confirm_href is None and 'confirm=' in (attrs.get('href') or ''):
+            self.confirm_href = attrs['href']
     
-    def save_notification_to_db(self, notification):
-        """Salvează notificarea în baza de date"""
-        try:
-            conn = sqlite3.connect('rendering_orders.db')
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO notifications 
-                (order_id, message, type, recipient_email, timestamp, read)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                notification['order_id'],
-                notification['message'],
-                notification['type'],
-                notification['recipient_email'],
-                notification['timestamp'],
-                notification['read']
-            ))
-            
-            conn.commit()
-            conn.close()
-        except Error as e:
-            print(f"Eroare la salvarea notificării: {e}")
+    def handle_endtag(self, tag):
+        if tag == 'form':
+            self._in_form = False
+
+class LinkPrefetcher:
+    """Descarcă în fundal fișierele din link-urile externe ale comenzilor, în depozitul de blob-uri.
     
-    def get_notifications(self, order_id=None, unread_only=False):
-        """Returnează notificările"""
-        try:
-            conn = sqlite3.connect('rendering_orders.db')
-            
-            if order_id:
-                if unread_only:
-                    df = pd.read_sql_query(
-                        "SELECT * FROM notifications WHERE order_id = ? AND read = 0 ORDER BY timestamp DESC", 
-                        conn, params=[order_id]
-                    )
-                else:
-                    df = pd.read_sql_query(
-                        "SELECT * FROM notifications WHERE order_id = ? ORDER BY timestamp DESC", 
-                        conn, params=[order_id]
-                    )
-            else:
-                if unread_only:
-                    df = pd.read_sql_query(
-                        "SELECT * FROM notifications WHERE read = 0 ORDER BY timestamp DESC", 
-                        conn
-                    )
-                else:
-                    df = pd.read_sql_query(
-                        "SELECT * FROM notifications ORDER BY timestamp DESC", 
-                        conn
-                    )
-            
-            conn.close()
-            return df
-        except Error as e:
-            print(f"Eroare la citirea notificărilor: {e}")
-            return pd.DataFrame()
+    Toate descărcările folosesc aceeași `requests.Session`, deci conexiunile sunt
+    refolosite, cu un număr limitat de descărcări simultane per host. O descărcare
+    întreruptă continuă cu un header `Range` de la octeții deja salvați pe disc.
+    Sunt acceptate doar link-uri http(s) către adrese publice, verificate înaintea
+    fiecărei cereri și la fiecare redirecționare (`allow_private` doar pentru teste).
+    O descărcare este refuzată (înainte și în timpul transferului) dacă depășește
+    limita per comandă, bugetul total al depozitului, cota clientului sau dacă pe
+    disc ar rămâne mai puțin de `min_free_bytes`.
     
-    def mark_as_read(self, notification_id):
-        """Marchează o notificare ca citită"""
+    Paginile de confirmare Google Drive și paginile WeTransfer sunt urmate până la
+    fișier; orice altă pagină web marchează comanda ca `manual` (descărcare de mână).
+    """
+    
+    # Bucăți mici de citire: la o deconectare se pierde cel mult o bucată
+    READ_SIZE = 1024 * 1024
+    PROGRESS_INTERVAL = 64 * 1024 * 1024
+    MAX_REDIRECTS = 5
+    PAGE_MAX_BYTES = 1024 * 1024
+    DRIVE_HOSTS = ('google.com',)
+    WETRANSFER_HOSTS = ('wetransfer.com',)
+    WETRANSFER_API = 'https://wetransfer.com/api/v4/transfers/{}/download'
+    
+    def __init__(self, db, blob_store, on_change=None, on_fetched=None, workers=4, per_host=2, timeout=30,
+                 max_bytes=2 * 1024 ** 3, max_attempts=3, retry_delay=5.0, allow_private=False,
+                 total_budget=None, min_free_bytes=0, per_submitter_bytes=None):
+        self.db = db
+        self.blob_store = blob_store
+        self.on_change = on_change
+        self.on_fetched = on_fetched
+        self.workers = workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.total_budget = total_budget
+        self.min_free_bytes = min_free_bytes
+        self.per_submitter_bytes = per_submitter_bytes
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.allow_private = allow_private
+        
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = 'RenderingServiceARH-prefetch/1.0'
+        adapter_class = HTTPAdapter if allow_private else PublicAddressAdapter
+        adapter = adapter_class(pool_connections=16, pool_maxsize=max(workers, 1))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        self._queue = Queue()
+        self._queued = set()
+        self._host_limits = {}
+        # Octeții scriși de descărcările în curs, încă neajunși în depozit
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self.completed = 0
+        self.failed = 0
+        self.resumed = 0
+        self.downloaded_bytes = 0
+    
+    @staticmethod
+    def direct_url(url):
+        """Transformă link-urile de partajare cunoscute în link-uri de descărcare directă"""
+        parts = urlsplit(url.strip())
+        host = parts.netloc.lower()
+        if host.endswith('drive.google.com'):
+            match = re.search(r'/file/d/([^/]+)', parts.path)
+            file_id = match.group(1) if match else parse_qs(parts.query).get('id', [None])[0]
+            if file_id:
+                return f"https://drive.google.com/uc?export=download&id={file_id}"
+        elif host.endswith('dropbox.com'):
+            query = [(key, value) for key, value in parse_qsl(parts.query) if key != 'dl'] + [('dl', '1')]
+            return urlunsplit(parts._replace(query=urlencode(query)))
+        return url.strip()
+    
+    def start(self):
+        """Pornește worker-ii și reia preluările rămase de la rularea anterioară"""
+        self._threads = [
+            threading.Thread(target=self._run, name=f"link-prefetch-{index}", daemon=True)
+            for index in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        self.recover_interrupted()
+    
+    def stop(self, timeout=5):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self.session.close()
+    
+    def enqueue(self, order_id):
+        order_id = int(order_id)
+        with self._lock:
+            if order_id in self._queued:
+                return
+            self._queued.add(order_id)
+        self._queue.put(order_id)
+    
+    def recover_interrupted(self):
+        """Preluările întrerupte de o oprire sunt puse din nou în coadă"""
+        with self.db.transaction() as conn:
+            conn.execute("UPDATE orders SET link_fetch_status = 'pending' WHERE link_fetch_status = 'downloading'")
+            order_ids = [row[0] for row in conn.execute(
+                "SELECT id FROM orders WHERE link_fetch_status = 'pending' AND is_deleted = 0"
+            )]
+        for order_id in order_ids:
+            self.enqueue(order_id)
+        return len(order_ids)
+    
+    def retry(self, order_ids):
+        """Programează din nou preluarea pentru comenzile date (de ex. după un eșec)"""
+        order_ids = [int(order_id) for order_id in order_ids]
+        with self.db.transaction() as conn:
+            placeholders = ','.join('?' * len(order_ids))
+            retried = [row[0] for row in conn.execute(f'''
+                UPDATE orders SET link_fetch_status = 'pending', link_fetch_error = NULL
+                WHERE id IN ({placeholders}) AND is_deleted = 0
+                  AND project_link IS NOT NULL AND project_link != ''
+                  AND link_fetch_status IS NOT 'downloading'
+                RETURNING id
+            ''', order_ids)]
+        for order_id in retried:
+            self.enqueue(order_id)
+        return len(retried)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'queued': len(self._queued),
+                'completed': self.completed,
+                'failed': self.failed,
+                'resumed': self.resumed,
+                'downloaded_bytes': self.downloaded_bytes
+            }
+    
+    def _host_limit(self, host):
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_limits[host]
+    
+    def _partial_path(self, order_id):
+        return os.path.join(self.blob_store.tmp_dir, f'fetch-{order_id}')
+    
+    def _run(self):
+        while True:
+            order_id = self._queue.get()
+            if order_id is None:
+                return
+            try:
+                self._fetch(order_id)
+            except Exception as e:
+                print(f"⚠️ Eroare la preluarea link-ului pentru comanda #{order_id}: {e}")
+            finally:
+                with self._lock:
+                    self._queued.discard(order_id)
+    
+    def _fetch(self, order_id):
+        with self.db.transaction() as conn:
+            row = conn.execute('''
+                UPDATE orders SET link_fetch_status = 'downloading', link_fetch_error = NULL
+                WHERE id = ? AND link_fetch_status = 'pending' AND is_deleted = 0
+                RETURNING project_link, email
+            ''', (order_id,)).fetchone()
+        if row is None or not row[0]:
+            return
+        self._notify_change(order_id)
+        
+        url = self.direct_url(row[0])
+        with self._host_limit(urlsplit(url).netloc.lower()):
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    sha256, size = self._download(order_id, url, row[1])
+                    break
+                except PrefetchError as e:
+                    # Eroare definitivă: fișierul parțial nu mai este păstrat
+                    if os.path.exists(self._partial_path(order_id)):
+                        os.unlink(self._partial_path(order_id))
+                    status = 'manual' if isinstance(e, ManualDownloadRequired) else 'failed'
+                    return self._record_failure(order_id, str(e), status)
+                except (requests.RequestException, OSError) as e:
+                    status = getattr(getattr(e, 'response', None), 'status_code', None)
+                    retriable = status is None or status >= 500 or status in (408, 429)
+                    if not retriable or attempt == self.max_attempts:
+                        return self._record_failure(order_id, str(e))
+                    time.sleep(self.retry_delay * attempt)
+        
+        with self.db.transaction() as conn:
+            conn.execute('''
+                UPDATE orders
+                SET link_fetch_status = 'done', link_fetch_bytes = ?, link_fetched_at = CURRENT_TIMESTAMP,
+                    project_blob_sha256 = ?, project_blob_size = ?
+                WHERE id = ?
+            ''', (size, sha256, size, order_id))
+        with self._lock:
+            self.completed += 1
+        if self.on_fetched:
+            self.on_fetched(order_id)
+        self._notify_change(order_id)
+    
+    def open_url(self, url, method='GET', headers=None, json=None):
+        """Trimite cererea urmând manual redirecționările, cu verificarea SSRF la fiecare pas"""
+        return open_public_url(self.session, url, method, headers, json, self.timeout, self.allow_private,
+                               self.MAX_REDIRECTS)
+    
+    def _check_quota(self, order_id, email, size, on_disk):
+        """Refuză descărcarea dacă fișierul comenzii, ajuns la `size` octeți, ar depăși o limită.
+        
+        `on_disk` sunt octeții deja scriși pe disc pentru comanda aceasta.
+        """
+        if size > self.max_bytes:
+            raise PrefetchError(f"Fișierul depășește limita de {self.max_bytes} octeți per comandă")
+        if self.total_budget is not None:
+            with self._lock:
+                in_flight = sum(written for other, written in self._in_flight.items() if other != order_id)
+            if self.blob_store.used_bytes() + in_flight + size > self.total_budget:
+                raise PrefetchError(f"Depozitul de fișiere a atins bugetul total de {self.total_budget} octeți")
+        if self.per_submitter_bytes is not None and email:
+            with self.db.connection() as conn:
+                used = conn.execute('''
+                    SELECT COALESCE(SUM(link_fetch_bytes), 0) FROM orders
+                    WHERE email = ? COLLATE NOCASE AND id != ? AND is_deleted = 0
+                      AND link_fetch_status IN ('done', 'downloading')
+                ''', (email, order_id)).fetchone()[0]
+            if used + size > self.per_submitter_bytes:
+                raise PrefetchError(f"Clientul a depășit cota de descărcare de {self.per_submitter_bytes} octeți")
+        if self.min_free_bytes:
+            free = shutil.disk_usage(self.blob_store.tmp_dir).free
+            if free - (size - on_disk) < self.min_free_bytes:
+                raise PrefetchError(f"Spațiu liber insuficient pe disc (se păstrează minimum {self.min_free_bytes} octeți)")
+    
+    def _download(self, order_id, url, email=None):
+        """Descarcă (sau continuă) fișierul în depozit; returnează (sha256, mărime)"""
+        partial_path = self._partial_path(order_id)
+        offset = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+        self._check_quota(order_id, email, offset, offset)
         try:
-            conn = sqlite3.connect('rendering_orders.db')
-            cursor = conn.cursor()
-            
-            cursor.execute('UPDATE notifications SET read = 1 WHERE id = ?', (notification_id,))
-            
-            conn.commit()
-            conn.close()
-            return True
-        except Error as e:
-            print(f"Eroare la marcarea notificării ca citită: {e}")
-            return False
+            with self._lock:
+                self._in_flight[order_id] = offset
+            return self._transfer(order_id, url, email, partial_path, offset, headers)
+        finally:
+            with self._lock:
+                self._in_flight.pop(order_id, None)
+    
+    def _transfer(self, order_id, url, email, partial_path, offset, headers):
+        # Paginile intermediare (confirmare, WeTransfer) duc la link-ul fișierului
+        for _ in range(self.MAX_REDIRECTS + 1):
+            with self.open_url(url, headers=headers) as response:
+                if response.status_code == 416 and offset:
+                    # Fișierul parțial nu mai corespunde celui de pe server: se reia de la zero
+                    os.unlink(partial_path)
+                    raise requests.ConnectionError("Range nesatisfăcut, descărcarea este reluată de la început")
+                response.raise_for_status()
+                if 'text/html' in response.headers.get('Content-Type', ''):
+                    url = self._page_link(response.url, self._read_page(response))
+                    continue
+                digest, size = self._save(order_id, email, response, partial_path, offset)
+            return self.blob_store.commit(partial_path, digest), size
+        raise PrefetchError(f"Prea multe pagini intermediare (peste {self.MAX_REDIRECTS})")
+    
+    def _save(self, order_id, email, response, partial_path, offset):
+        """Scrie corpul răspunsului în fișierul parțial; returnează (sha256, mărime)"""
+        if offset and response.status_code == 206:
+            with self._lock:
+                self.resumed += 1
+            hasher = self.blob_store.hash_prefix(partial_path, offset)
+        else:
+            # Serverul a ignorat `Range`: răspunsul conține tot fișierul
+            offset = 0
+            hasher = hashlib.sha256()
+        expected = response.headers.get('Content-Length')
+        expected = offset + int(expected) if expected and expected.isdigit() else None
+        if expected is not None:
+            self._check_quota(order_id, email, expected, offset)
+        
+        reported = offset
+        with open(partial_path, 'ab' if offset else 'wb') as partial:
+            for chunk in response.iter_content(self.READ_SIZE):
+                partial.write(chunk)
+                hasher.update(chunk)
+                offset += len(chunk)
+                with self._lock:
+                    self.downloaded_bytes += len(chunk)
+                    self._in_flight[order_id] = offset
+                if offset > self.max_bytes:
+                    raise PrefetchError(f"Fișierul depășește limita de {self.max_bytes} octeți per comandă")
+                if offset - reported >= self.PROGRESS_INTERVAL:
+                    # Cotele comune se schimbă pe parcurs (alte descărcări, spațiul liber)
+                    self._check_quota(order_id, email, offset, offset)
+                    self._record_progress(order_id, offset)
+                    reported = offset
+        if expected is not None and offset != expected:
+            raise requests.ConnectionError(f"Descărcare incompletă: {offset} din {expected} octeți")
+        return hasher.hexdigest(), offset
+    
+    def _read_page(self, response):
+        """Primii `PAGE_MAX_BYTES` octeți ai unei pagini web, ca text"""
+        page = b''
+        for chunk in response.iter_content(64 * 1024):
+            page += chunk
+            if len(page) >= self.PAGE_MAX_BYTES:
+                break
+        return page.decode(response.encoding or 'utf-8', errors='replace')
+    
+    def _page_link(self, page_url, page):
+        """Link-ul fișierului dintr-o pagină intermediară cunoscută; altfel `ManualDownloadRequired`"""
+        parts = urlsplit(page_url)
+        host = (parts.hostname or '').lower()
+        if any(host == known or host.endswith('.' + known) for known in self.WETRANSFER_HOSTS):
+            return self._wetransfer_link(parts.path)
+        if any(host == known or host.endswith('.' + known) for known in self.DRIVE_HOSTS):
+            parser = DownloadPageParser()
+            parser.feed(page)
+            # Fișier mare: Google cere confirmarea că nu a fost scanat antivirus
+            if parser.form_action and 'confirm' in parser.fields:
+                action = urljoin(page_url, parser.form_action)
+                return action + ('&' if '?' in action else '?') + urlencode(parser.fields)
+            if parser.confirm_href:
+                return urljoin(page_url, parser.confirm_href)
+        raise ManualDownloadRequired("Link-ul duce la o pagină web, nu la un fișier: descarcă fișierul manual")
+    
+    def _wetransfer_link(self, path):
+        """Link-ul direct al unui transfer WeTransfer (/downloads/<id>/[<destinatar>/]<hash>)"""
+        segments = [segment for segment in path.split('/') if segment]
+        if segments[:1] != ['downloads'] or len(segments) not in (3, 4):
+            raise ManualDownloadRequired("Link WeTransfer nerecunoscut: descarcă fișierul manual")
+        payload = {'security_hash': segments[-1], 'intent': 'entire_transfer'}
+        if len(segments) == 4:
+            payload['recipient_id'] = segments[2]
+        with self.open_url(self.WETRANSFER_API.format(segments[1]), 'POST', json=payload) as response:
+            response.raise_for_status()
+            try:
+                link = response.json().get('direct_link')
+            except ValueError:
+                link = None
+        if not link:
+            raise ManualDownloadRequired("WeTransfer nu a oferit un link de descărcare: descarcă fișierul manual")
+        return link
+    
+    def _record_progress(self, order_id, size):
+        with self.db.transaction() as conn:
+            conn.execute('UPDATE orders SET link_fetch_bytes = ? WHERE id = ?', (size, order_id))
+    
+    def _record_failure(self, order_id, error, status='failed'):
+        partial_path = self._partial_path(order_id)
+        size = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+        with self.db.transaction() as conn:
+            conn.execute('''
+                UPDATE orders SET link_fetch_status = ?, link_fetch_error = ?, link_fetch_bytes = ?
+                WHERE id = ?
+            ''', (status, error[:500], size, order_id))
+        with self._lock:
+            self.failed += 1
+        self._notify_change(order_id)
+    
+    def _notify_change(self, order_id):
+        if self.on_change:
+            self.on_change(order_id)
 
-class RenderingService:
-    def __init__(self):
-        self.init_database()
-        self.notification_service = NotificationService()
+class LinkHealthChecker:
+    """Verifică dacă link-urile comenzilor (download și proiect) mai răspund.
     
-    def init_database(self):
-        """Initializează baza de date SQLite"""
+    Fiecare URL este verificat cu HEAD (cu GET pe primul octet dacă serverul nu
+    acceptă HEAD), în paralel, cu un număr limitat de cereri simultane per host.
+    Rezultatele rămân valabile `ttl_seconds` în tabela `link_checks`, iar starea
+    link-urilor fiecărei comenzi este copiată în `order_link_checks`. Ca la preluare,
+    sunt verificate doar adrese publice, inclusiv la fiecare redirecționare.
+    """
+    
+    def __init__(self, db, session, on_checked=None, workers=8, per_host=2, ttl_seconds=3600, timeout=10,
+                 allow_private=False):
+        self.db = db
+        self.session = session
+        self.allow_private = allow_private
+        self.on_checked = on_checked
+        self.workers = workers
+        self.per_host = per_host
+        self.ttl_seconds = ttl_seconds
+        self.timeout = timeout
+        self._host_limits = {}
+        self._lock = threading.Lock()
+        self.probes = 0
+        self.cache_hits = 0
+    
+    def _host_limit(self, host):
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_limits[host]
+    
+    def probe(self, url):
+        """Verifică un URL; returnează (ok, cod HTTP, eroare, durată în ms)"""
+        started = time.perf_counter()
         try:
-            conn = sqlite3.connect('rendering_orders.db')
-            cursor = conn.cursor()
-            
-            # Tabela pentru comenzi
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS orders (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    student_name TEXT NOT NULL,
-                    email TEXT NOT NULL,
-                    project_file TEXT,
-                    project_link TEXT,
-                    software TEXT NOT NULL,
-                    resolution TEXT NOT NULL,
-                    render_count INTEGER NOT NULL,
-                    deadline TEXT,
-                    requirements TEXT,
-                    status TEXT DEFAULT 'pending',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    completed_at TIMESTAMP,
-                    download_link TEXT,
-                    price_euro REAL NOT NULL,
-                    payment_status TEXT DEFAULT 'pending',
-                    payment_date TIMESTAMP,
-                    receipt_sent BOOLEAN DEFAULT FALSE,
-                    estimated_days INTEGER NOT NULL,
-                    is_urgent BOOLEAN DEFAULT FALSE,
-                    contact_phone TEXT,
-                    faculty TEXT,
-                    is_deleted BOOLEAN DEFAULT FALSE,
-                    deleted_at TIMESTAMP,
-                    deletion_reason TEXT,
-                    progress INTEGER DEFAULT 0,
-                    current_stage TEXT DEFAULT 'În așteptare',
-                    stages_completed INTEGER DEFAULT 0,
-                    total_stages INTEGER DEFAULT 6,
-                    progress_email_sent BOOLEAN DEFAULT FALSE,
-                    completed_email_sent BOOLEAN DEFAULT FALSE,
-                    status_email_sent BOOLEAN DEFAULT FALSE
-                )
+            with self._host_limit(urlsplit(url).netloc.lower()):
+                response = open_public_url(self.session, url, 'HEAD', timeout=self.timeout,
+                                           allow_private=self.allow_private)
+                response.close()
+                if response.status_code in (403, 405, 501) or response.status_code >= 500:
+                    # Unele servere (WeTransfer, S3 semnat) nu acceptă HEAD: se cere doar primul octet
+                    with open_public_url(self.session, url, headers={'Range': 'bytes=0-0'}, timeout=self.timeout,
+                                         allow_private=self.allow_private) as response:
+                        pass
+            error = None if response.status_code < 400 else response.reason
+            result = (response.status_code < 400, response.status_code, error)
+        except (requests.RequestException, PrefetchError) as e:
+            result = (False, None, str(e)[:300])
+        with self._lock:
+            self.probes += 1
+        return result + (round((time.perf_counter() - started) * 1000, 1),)
+    
+    def check_urls(self, urls, force=False, notify=True):
+        """Verifică URL-urile al căror rezultat a expirat; returnează numărul de verificări făcute"""
+        urls = sorted({url.strip() for url in urls if url and url.strip().lower().startswith(('http://', 'https://'))})
+        if not urls:
+            return 0
+        if not force:
+            with self.db.connection() as conn:
+                fresh = {row[0] for row in conn.execute('''
+                    SELECT url FROM link_checks
+                    WHERE url IN (SELECT value FROM json_each(?))
+                      AND checked_at > datetime('now', ?)
+                ''', (json.dumps(urls), f'-{int(self.ttl_seconds)} seconds'))}
+            with self._lock:
+                self.cache_hits += len(fresh)
+            urls = [url for url in urls if url not in fresh]
+        if not urls:
+            return 0
+        
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="link-check") as pool:
+            results = list(pool.map(self.probe, urls))
+        
+        with self.db.transaction() as conn:
+            conn.executemany('''
+                INSERT INTO link_checks (url, ok, status_code, error, elapsed_ms, checked_at)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (url) DO UPDATE SET
+                    ok = excluded.ok, status_code = excluded.status_code, error = excluded.error,
+                    elapsed_ms = excluded.elapsed_ms, checked_at = excluded.checked_at
+            ''', [(url, int(ok), status_code, error, elapsed_ms)
+                  for url, (ok, status_code, error, elapsed_ms) in zip(urls, results)])
+        if notify and self.on_checked:
+            self.on_checked()
+        return len(urls)
+    
+    def check_orders(self, force=False):
+        """Verifică link-urile de download ale comenzilor livrate și link-urile de proiect"""
+        with self.db.connection() as conn:
+            urls = [row[0] for row in conn.execute('''
+                SELECT download_link FROM orders
+                WHERE is_deleted = 0 AND status = 'completed' AND download_link IS NOT NULL
+                UNION
+                SELECT project_link FROM orders
+                WHERE is_deleted = 0 AND project_link IS NOT NULL
+            ''')]
+        # Cache-ul este invalidat o singură dată, după ce starea comenzilor este la zi
+        checked = self.check_urls(urls, force=force, notify=False)
+        self.sync_order_links()
+        if self.on_checked:
+            self.on_checked()
+        return checked
+    
+    def sync_order_links(self):
+        """Copiază rezultatele din `link_checks` pe comenzi (`order_link_checks`)"""
+        with self.db.transaction() as conn:
+            conn.execute('''
+                INSERT INTO order_link_checks (order_id, kind, url, status, checked_at)
+                SELECT links.id, links.kind, links.url, CASE WHEN link_checks.ok THEN 'ok' ELSE 'broken' END,
+                       link_checks.checked_at
+                FROM (SELECT id, 'download' AS kind, download_link AS url FROM orders
+                      WHERE is_deleted = 0 AND download_link IS NOT NULL
+                      UNION ALL
+                      SELECT id, 'project', project_link FROM orders
+                      WHERE is_deleted = 0 AND project_link IS NOT NULL) AS links
+                JOIN link_checks ON link_checks.url = links.url
+                WHERE true
+                ON CONFLICT (order_id, kind) DO UPDATE SET
+                    url = excluded.url, status = excluded.status, checked_at = excluded.checked_at
             ''')
-            
-            # Tabela pentru notificări
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS notifications (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    order_id INTEGER NOT NULL,
-                    message TEXT NOT NULL,
-                    type TEXT DEFAULT 'info',
-                    recipient_email TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    read BOOLEAN DEFAULT FALSE,
-                    FOREIGN KEY (order_id) REFERENCES orders (id)
+            # Link-uri schimbate sau comenzi șterse
+            conn.execute('''
+                DELETE FROM order_link_checks
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM orders
+                    WHERE orders.id = order_link_checks.order_id AND orders.is_deleted = 0
+                      AND order_link_checks.url = CASE order_link_checks.kind
+                          WHEN 'download' THEN orders.download_link ELSE orders.project_link END
                 )
             ''')
-            
-            # Tabela pentru istoricul progresului
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS progress_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    order_id INTEGER NOT NULL,
-                    stage TEXT NOT NULL,
-                    progress INTEGER NOT NULL,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    notes TEXT,
-                    FOREIGN KEY (order_id) REFERENCES orders (id)
+    
+    def results(self, urls):
+        """Rezultatele salvate pentru URL-uri: {url: (ok, cod HTTP, eroare, verificat la)}"""
+        urls = [url for url in set(urls) if isinstance(url, str) and url]
+        if not urls:
+            return {}
+        with self.db.connection() as conn:
+            return {row[0]: row[1:] for row in conn.execute('''
+                SELECT url, ok, status_code, error, checked_at FROM link_checks
+                WHERE url IN (SELECT value FROM json_each(?))
+            ''', (json.dumps(urls),))}
+    
+    def stats(self):
+        with self.db.connection() as conn:
+            checked, broken = conn.execute('SELECT COUNT(*), COALESCE(SUM(ok = 0), 0) FROM link_checks').fetchone()
+        with self._lock:
+            return {'checked': checked, 'broken': broken, 'probes': self.probes, 'cache_hits': self.cache_hits}
+
+class RenderingService:
+    def __init__(self, email_config=None, db=None, cache_max_entries=64, start_email_worker=True, blob_store=None,
+                 upload_port=None, start_link_prefetch=True, start_link_checker=True, start_blob_gc=True):
+        # Cache pentru citirile de comenzi, invalidat de orice scriere; există înaintea
+        # oricărui thread de fundal care îl poate invalida
+        self.cache_max_entries = cache_max_entries
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._generation = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+        self.email_config = email_config or EmailConfig.from_env()
+        self.db = db or DatabaseManager()
+        self.init_database()
+        self.notification_service = NotificationService(self.db)
+        self.blob_store = blob_store or BlobStore(os.getenv('PROJECT_BLOB_PATH', 'project_blobs'))
+        # Un blob fără comandă este păstrat atât cât poate dura finalizarea unei comenzi
+        self.blob_ttl_seconds = float(os.getenv('BLOB_PENDING_TTL_HOURS', 24)) * 3600
+        self.blob_gc_job = PeriodicJob("blob-gc", self.collect_orphan_blobs, check_interval=3600)
+        self.templates = EmailTemplates()
+        self.archive_inspector = ArchiveInspector()
+        # Un singur worker: inspectarea nu concurează cu descărcările și încărcările
+        self.archive_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="archive-inspect")
+        
+        # Email-urile sunt livrate în fundal, din coada persistentă
+        self.mail_transport = create_mail_transport(self.email_config)
+        self.outbox = EmailOutbox(self.db)
+        config = self.email_config
+        self.email_rate_limiter = TokenBucket(config.rate_per_minute, config.burst, config.daily_limit)
+        try:
+            # Plafonul zilnic continuă de unde a rămas înainte de o repornire
+            self.email_rate_limiter.seed_sent_today(self.outbox.sent_since(self.email_rate_limiter.day_start()))
+        except Error as e:
+            print(f"⚠️ Nu s-au putut număra email-urile trimise azi: {e}")
+        self.email_worker = EmailOutboxWorker(self.outbox, self._deliver_messages,
+                                              on_sent=lambda rows: self._invalidate_cache(),
+                                              on_idle=self.mail_transport.close_if_idle,
+                                              rate_limiter=self.email_rate_limiter)
+        # Digest-ul periodic pentru administrator, trimis tot prin outbox
+        self.digest_job = PeriodicJob("admin-digest", self.run_admin_digest_if_due,
+                                      check_interval=min(300, max(60, config.digest_interval_hours * 3600 / 4)))
+        
+        # Încărcări reluabile pentru fișierele prea mari pentru formularul Streamlit
+        self.uploads = ResumableUploads(self.db, self.blob_store, self.attach_project_blob,
+                                        on_attached=self.schedule_archive_inspection,
+                                        max_bytes=int(os.getenv('UPLOAD_MAX_BYTES', 20 * 1024 ** 3)))
+        self.upload_server = None
+        if upload_port is None:
+            upload_port = int(os.getenv('UPLOAD_SERVER_PORT', 8502))
+        self.upload_url = None
+        
+        # Fișierele din link-urile externe sunt descărcate în fundal, imediat după comandă
+        self.link_prefetcher = LinkPrefetcher(self.db, self.blob_store,
+                                              on_change=lambda order_id: self._invalidate_cache(),
+                                              on_fetched=self.schedule_archive_inspection,
+                                              workers=int(os.getenv('LINK_PREFETCH_WORKERS', 4)),
+                                              per_host=int(os.getenv('LINK_PREFETCH_PER_HOST', 2)),
+                                              max_bytes=int(os.getenv('LINK_PREFETCH_MAX_BYTES', 2 * 1024 ** 3)),
+                                              total_budget=int(os.getenv('BLOB_STORE_MAX_BYTES', 200 * 1024 ** 3)),
+                                              min_free_bytes=int(os.getenv('BLOB_STORE_MIN_FREE_BYTES', 5 * 1024 ** 3)),
+                                              per_submitter_bytes=int(os.getenv('LINK_PREFETCH_PER_SUBMITTER_BYTES', 10 * 1024 ** 3)))
+        
+        # Verificarea periodică a link-urilor, pe aceeași sesiune HTTP ca preluarea
+        self.link_checker = LinkHealthChecker(self.db, self.link_prefetcher.session,
+                                              on_checked=self._invalidate_cache,
+                                              workers=int(os.getenv('LINK_CHECK_WORKERS', 8)),
+                                              per_host=int(os.getenv('LINK_CHECK_PER_HOST', 2)),
+                                              ttl_seconds=int(os.getenv('LINK_CHECK_TTL_SECONDS', 3600)))
+        self.link_check_job = PeriodicJob("link-health", self.link_checker.check_orders,
+                                          check_interval=min(300, self.link_checker.ttl_seconds))
+        
+        # Thread-urile de fundal pornesc ultimele, după ce toată starea serviciului există
+        if start_email_worker:
+            self.email_worker.start()
+            atexit.register(self.mail_transport.close)
+            atexit.register(self.email_worker.stop)
+            if config.digest_interval_hours > 0:
+                self.digest_job.start()
+                atexit.register(self.digest_job.stop)
+        # Serverul de încărcare pornește doar dacă are o adresă publică (HTTPS) pentru clienți
+        upload_public_url = UploadServer.public_url(os.getenv('UPLOAD_PUBLIC_URL'))
+        if upload_port and upload_public_url:
+            try:
+                self.upload_server = UploadServer(
+                    self.uploads, os.getenv('UPLOAD_SERVER_HOST', '127.0.0.1'), upload_port,
+                    allowed_origins=UploadServer.origins(os.getenv('UPLOAD_ALLOWED_ORIGINS') or os.getenv('APP_PUBLIC_URL'))
                 )
-            ''')
-            
-            conn.commit()
-            conn.close()
+                self.upload_server.start()
+                atexit.register(self.upload_server.stop)
+                self.upload_url = upload_public_url
+            except OSError as e:
+                print(f"⚠️ Serverul de încărcare nu a putut porni pe portul {upload_port}: {e}")
+        if start_link_prefetch and self.link_prefetcher.workers > 0:
+            self.link_prefetcher.start()
+            atexit.register(self.link_prefetcher.stop)
+        if start_link_checker and self.link_checker.ttl_seconds > 0:
+            self.link_check_job.start()
+            atexit.register(self.link_check_job.stop)
+        if start_blob_gc:
+            self.blob_gc_job.start()
+            atexit.register(self.blob_gc_job.stop)
+    
+    def _cached_read(self, key, loader):
+        """Returnează rezultatul din cache pentru generația curentă sau îl încarcă din SQLite"""
+        with self._cache_lock:
+            generation = self._generation
+            cached = self._cache.get((generation, key))
+            if cached is not None:
+                self._cache.move_to_end((generation, key))
+                self.cache_hits += 1
+                return self._detached(cached)
+            self.cache_misses += 1
+        
+        value = loader()
+        
+        with self._cache_lock:
+            # Un rezultat citit înaintea unei scrieri concurente nu mai este valid
+            if generation == self._generation:
+                self._cache[(generation, key)] = value
+                while len(self._cache) > self.cache_max_entries:
+                    self._cache.popitem(last=False)
+        return self._detached(value)
+    
+    @staticmethod
+    def _detached(value):
+        """Apelantul primește o copie, ca intrarea din cache să nu poată fi modificată"""
+        return value.copy() if isinstance(value, pd.DataFrame) else value
+    
+    def _invalidate_cache(self):
+        """Trece la o generație nouă după o scriere în tabela de comenzi"""
+        with self._cache_lock:
+            self._generation += 1
+            self._cache.clear()
+    
+    def cache_stats(self):
+        """Statistici despre cache-ul de comenzi"""
+        with self._cache_lock:
+            return {
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'entries': len(self._cache),
+                'generation': self._generation
+            }
+    
+    def init_database(self):
+        """Initializează baza de date SQLite și aplică migrațiile de schemă"""
+        try:
+            self.db.migrate(SCHEMA_MIGRATIONS)
         except Error as e:
             st.error(f"❌ Eroare la initializarea bazei de date: {e}")
     
@@ -256,65 +3545,270 @@ class RenderingService:
         
         return round(final_price), estimated_days
     
+    def store_project_file(self, uploaded_file):
+        """Salvează fișierul încărcat în depozitul de blob-uri; returnează (sha256, mărime)"""
+        if uploaded_file is None:
+            return None, None
+        try:
+            uploaded_file.seek(0)
+            return self.blob_store.put(uploaded_file)
+        except (OSError, ValueError) as e:
+            st.error(f"❌ Eroare la salvarea fișierului: {e}")
+            return None, None
+    
     def add_order(self, order_data):
         """Adaugă o comandă nouă în baza de date"""
         try:
-            conn = sqlite3.connect('rendering_orders.db')
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO orders 
-                (student_name, email, project_file, project_link, software, resolution, 
-                 render_count, deadline, requirements, price_euro, estimated_days,
-                 is_urgent, contact_phone, faculty, total_stages)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                order_data['student_name'],
-                order_data['email'],
-                order_data.get('project_file'),
-                order_data.get('project_link'),
-                order_data['software'],
-                order_data['resolution'],
-                order_data['render_count'],
-                order_data['deadline'],
-                order_data['requirements'],
-                order_data['price_euro'],
-                order_data['estimated_days'],
-                order_data.get('is_urgent', False),
-                order_data.get('contact_phone', ''),
-                order_data.get('faculty', ''),
-                6  # total_stages
-            ))
-            
-            order_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
-            
-            # Adaugă notificare pentru noua comandă
-            self.notification_service.add_notification(
-                order_id,
-                f"🎉 Comanda #{order_id} a fost plasată cu succes! Timp de procesare estimat: {order_data['estimated_days']} zile.",
-                "success",
-                order_data['email']
-            )
+            with self.db.transaction() as conn:
+                cursor = conn.execute('''
+                    INSERT INTO orders 
+                    (student_name, email, project_file, project_link, software, resolution, 
+                     render_count, deadline, requirements, price_euro, estimated_days,
+                     is_urgent, contact_phone, faculty, total_stages,
+                     project_blob_sha256, project_blob_size, upload_token, link_fetch_status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    order_data['student_name'],
+                    order_data['email'],
+                    order_data.get('project_file'),
+                    order_data.get('project_link'),
+                    order_data['software'],
+                    order_data['resolution'],
+                    order_data['render_count'],
+                    order_data['deadline'],
+                    order_data['requirements'],
+                    order_data['price_euro'],
+                    order_data['estimated_days'],
+                    order_data.get('is_urgent', False),
+                    order_data.get('contact_phone', ''),
+                    order_data.get('faculty', ''),
+                    6,  # total_stages
+                    order_data.get('project_blob_sha256'),
+                    order_data.get('project_blob_size'),
+                    secrets.token_urlsafe(16),
+                    'pending' if order_data.get('project_link') else None
+                ))
+                order_id = cursor.lastrowid
+                
+                # Adaugă notificare pentru noua comandă
+                self.notification_service.add_notification(
+                    order_id,
+                    f"🎉 Comanda #{order_id} a fost plasată cu succes! Timp de procesare estimat: {order_data['estimated_days']} zile.",
+                    "success",
+                    order_data['email']
+                )
+                
+                # Chitanța intră în coada de email odată cu comanda
+                self.send_receipt_email(order_data, order_id)
+                if order_data.get('project_blob_sha256'):
+                    self.schedule_archive_inspection(order_id)
+            self._invalidate_cache()
             
-            # Trimite email cu chitanță
-            self.send_receipt_email(order_data, order_id)
+            if order_data.get('project_link'):
+                self.link_prefetcher.enqueue(order_id)
             
             return order_id
         except Error as e:
             st.error(f"❌ Eroare la adăugarea comenzii: {e}")
             return None
     
-    def send_receipt_email(self, order_data, order_id):
-        """Trimite email cu chitanță și detalii comanda"""
+    def release_project_blobs(self, sha256s, min_age=None):
+        """Șterge blob-urile la care nu mai face referire nicio comandă; returnează câte au fost șterse"""
+        sha256s = sorted({sha256 for sha256 in sha256s if sha256})
+        min_age = self.blob_ttl_seconds if min_age is None else min_age
+        deleted = 0
+        for start in range(0, len(sha256s), 500):
+            chunk = sha256s[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            # Lock-ul de scriere ține pe loc o comandă nouă care ar refolosi același blob
+            with self.db.transaction() as conn:
+                referenced = {row[0] for row in conn.execute(
+                    f'SELECT DISTINCT project_blob_sha256 FROM orders WHERE project_blob_sha256 IN ({placeholders})',
+                    chunk
+                )}
+                for sha256 in chunk:
+                    if sha256 not in referenced:
+                        deleted += self.blob_store.delete(sha256, min_age=min_age)
+        return deleted
+    
+    def collect_orphan_blobs(self):
+        """Șterge blob-urile fără comandă mai vechi de `blob_ttl_seconds` (de ex. formulare abandonate)"""
+        candidates = [sha256 for sha256, age in self.blob_store.list_blobs() if age >= self.blob_ttl_seconds]
+        return self.release_project_blobs(candidates)
+    
+    def _release_deleted_blobs(self, sha256s):
+        """Eliberează blob-urile comenzilor șterse definitiv, fără să afecteze ștergerea"""
+        try:
+            self.release_project_blobs(sha256s)
+        except (Error, OSError, ValueError) as e:
+            print(f"⚠️ Eroare la ștergerea fișierelor comenzilor șterse: {e}")
+    
+    def attach_project_blob(self, order_id, filename, sha256, size):
+        """Atașează comenzii fișierul primit prin încărcarea reluabilă (rulează în tranzacția apelantului)"""
+        with self.db.transaction() as conn:
+            row = conn.execute('''
+                UPDATE orders
+                SET project_file = COALESCE(?, project_file, ?), project_blob_sha256 = ?, project_blob_size = ?
+                WHERE id = ?
+                RETURNING email
+            ''', (filename, sha256, sha256, size, order_id)).fetchone()
+            if row:
+                self.notification_service.add_notification(
+                    order_id,
+                    f"📦 Fișierul proiectului pentru comanda #{order_id} a fost primit ({size / (1024 * 1024):.1f} MB).",
+                    "success",
+                    row[0]
+                )
+        self._invalidate_cache()
+    
+    def schedule_archive_inspection(self, order_id):
+        """Programează inspectarea arhivei în fundal, după commit-ul tranzacției curente"""
+        self.db.after_commit(lambda: self._submit_archive_inspection(order_id))
+    
+    def _submit_archive_inspection(self, order_id):
+        try:
+            self.archive_executor.submit(self._inspect_in_background, order_id)
+        except RuntimeError as e:
+            # Executorul este oprit (ieșire din proces): arhiva rămâne de inspectat manual
+            print(f"⚠️ Inspectarea arhivei comenzii #{order_id} nu a putut fi programată: {e}")
+    
+    def _inspect_in_background(self, order_id):
+        try:
+            self.inspect_project_archive(order_id)
+        except Exception:
+            logger.exception("Inspectarea arhivei comenzii #%s a eșuat", order_id)
+    
+    def inspect_project_archive(self, order_id):
+        """Calculează și salvează pe comandă rezumatul arhivei proiectului; returnează rezumatul"""
         try:
-            smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-            smtp_port = int(os.getenv('SMTP_PORT', 587))
-            email_from = os.getenv('EMAIL_FROM', '')
-            email_password = os.getenv('EMAIL_PASSWORD', '')
+            with self.db.connection() as conn:
+                row = conn.execute('SELECT project_blob_sha256 FROM orders WHERE id = ?', (int(order_id),)).fetchone()
+            if not row or not row[0]:
+                return None
+            
+            # Același blob poate aparține mai multor comenzi: rezumatul nu se recalculează
+            with self.db.connection() as conn:
+                cached = conn.execute('''
+                    SELECT archive_summary FROM orders
+                    WHERE project_blob_sha256 = ? AND archive_summary IS NOT NULL
+                    LIMIT 1
+                ''', (row[0],)).fetchone()
+            if cached:
+                summary = json.loads(cached[0])
+            else:
+                started = time.perf_counter()
+                try:
+                    summary = self.archive_inspector.inspect(self.blob_store.path(row[0])) or {'format': None}
+                except ArchiveInspector.READ_ERRORS as e:
+                    summary = {'format': 'arhivă', 'error': f"Arhiva nu a putut fi inspectată: {e}"}
+                summary['inspect_ms'] = round((time.perf_counter() - started) * 1000, 1)
             
-            if not all([smtp_server, email_from, email_password]):
+            with self.db.transaction() as conn:
+                conn.execute('UPDATE orders SET archive_summary = ? WHERE id = ?',
+                             (json.dumps(summary, ensure_ascii=False), int(order_id)))
+            self._invalidate_cache()
+            return summary
+        except (Error, OSError, zipfile.BadZipFile, ValueError) as e:
+            print(f"⚠️ Eroare la inspectarea arhivei comenzii #{order_id}: {e}")
+            return None
+    
+    def check_links(self, force=False):
+        """Verifică acum link-urile comenzilor; returnează numărul de URL-uri verificate"""
+        try:
+            return self.link_checker.check_orders(force=force)
+        except Error as e:
+            st.error(f"❌ Eroare la verificarea link-urilor: {e}")
+            return 0
+    
+    def get_link_health(self, urls):
+        """Ultimul rezultat al verificării pentru fiecare URL"""
+        try:
+            return self.link_checker.results(urls)
+        except Error as e:
+            st.error(f"❌ Eroare la citirea verificărilor de link-uri: {e}")
+            return {}
+    
+    def retry_link_prefetch(self, order_id):
+        """Reia preluarea link-ului extern al unei comenzi"""
+        try:
+            return self.link_prefetcher.retry([order_id]) > 0
+        except Error as e:
+            st.error(f"❌ Eroare la reluarea preluării link-ului: {e}")
+            return False
+    
+    def get_upload_token(self, order_id):
+        """Token-ul cu care clientul încarcă fișierul comenzii (doar pentru sesiunea care a plasat comanda)"""
+        try:
+            with self.db.connection() as conn:
+                row = conn.execute('SELECT upload_token FROM orders WHERE id = ? AND is_deleted = 0',
+                                   (int(order_id),)).fetchone()
+            return row[0] if row else None
+        except Error as e:
+            st.error(f"❌ Eroare la citirea token-ului de încărcare: {e}")
+            return None
+    
+    def send_upload_token_email(self, order_id, reissued=False):
+        """Pune în coadă email-ul cu token-ul de încărcare, doar către adresa comenzii (rulează în tranzacția apelantului)"""
+        if not self.email_config.is_complete or not self.upload_url:
+            return False
+        try:
+            with self.db.transaction() as conn:
+                cursor = conn.execute('SELECT * FROM orders WHERE id = ? AND is_deleted = 0', (int(order_id),))
+                row = cursor.fetchone()
+                if not row:
+                    return False
+                order = dict(zip([column[0] for column in cursor.description], row))
+                intro = ("Token-ul de încărcare al comenzii a fost înlocuit; cel vechi nu mai este valabil."
+                         if reissued else "Acestea sunt datele pentru încărcarea fișierului proiectului tău.")
+                msg = self._build_message('upload_token', order['email'], OrderSnapshot.from_order(order),
+                                          intro=intro, upload_url=self.upload_url, token=order['upload_token'])
+                # Cel mult un email pe oră pentru același token
+                fingerprint = hashlib.sha256(order['upload_token'].encode()).hexdigest()[:16]
+                queued = self.outbox.enqueue([(
+                    'upload_token', order['id'], msg,
+                    EmailOutbox.idempotency_key(order['id'], 'upload_token', f"{fingerprint}:{datetime.now():%Y%m%d%H}")
+                )])
+            return queued[0] is not None
+        except Error as e:
+            print(f"⚠️ Eroare la punerea în coadă a email-ului cu token-ul de încărcare: {e}")
+            return False
+    
+    def reissue_upload_token(self, order_id):
+        """Înlocuiește token-ul de încărcare (doar din administrare) și îl trimite pe email-ul comenzii"""
+        if not self.email_config.is_complete:
+            st.warning("⚠️ Configurația email nu este completă: token-ul nou nu ar putea fi trimis clientului.")
+            return False
+        token = secrets.token_urlsafe(16)
+        try:
+            with self.db.transaction() as conn:
+                row = conn.execute('''
+                    UPDATE orders SET upload_token = ?
+                    WHERE id = ? AND is_deleted = 0
+                    RETURNING id
+                ''', (token, int(order_id))).fetchone()
+                if row:
+                    self.send_upload_token_email(order_id, reissued=True)
+            if not row:
+                return False
+            # Încărcările începute cu token-ul vechi nu mai pot fi continuate
+            self.uploads.cancel_unfinished(int(order_id))
+            self._invalidate_cache()
+            return True
+        except Error as e:
+            st.error(f"❌ Eroare la generarea token-ului de încărcare: {e}")
+            return False
+    
+    def _deliver_messages(self, messages):
+        """Livrează mesajele prin transportul configurat; returnează eroarea (sau None) pentru fiecare mesaj"""
+        if not self.email_config.is_complete:
+            return ["Configurația email nu este completă"] * len(messages)
+        return self.mail_transport.send(messages)
+
+    def send_receipt_email(self, order_data, order_id):
+        """Pune în coadă email-ul cu chitanță și detalii comanda"""
+        try:
+            config = self.email_config
+            if not config.is_complete:
                 st.warning("""
                 ⚠️ **Configurația email nu este completă.** 
                 
@@ -325,398 +3819,479 @@ class RenderingService:
                 EMAIL_FROM=emailul.tau@gmail.com
                 EMAIL_PASSWORD=parola_ta_de_aplicatie
                 ```
+                
+                Pentru teste locale, fără cont SMTP: `MAIL_TRANSPORT=maildir` (sau `memory`, `null`).
                 """)
                 return
             
-            # Email către client
-            msg_client = MIMEMultipart()
-            msg_client.attach(MIMEText(f"""
-            🧾 CHIȚANȚĂ PLATĂ RENDERING SERVICE
-
-            Mulțumim pentru comanda ta, {order_data['student_name']}!
-            
-            📋 DETALII COMANDA:
-            • ID Comandă: #{order_id}
-            • Data: {datetime.now().strftime('%d.%m.%Y %H:%M')}
-            • Sumă plătită: {order_data['price_euro']} EUR
-            • Rezoluție: {order_data['resolution']}
-            • Număr randări: {order_data['render_count']}
-            • Software: {order_data['software']}
-            
-            💳 DETALII PLATĂ:
-            • Revolut: https://revolut.me/stefanxuhy
-            • Transfer Bancar:
-              - Beneficiar: STEFANIA BOSTIOG
-              - IBAN: RO60 BREL 0002 0036 6187 0100
-              - Bancă: Libra Bank
-              - Sumă: {order_data['price_euro']} EUR
-            
-            ⏰ DETALII LIVRARE:
-            • Timp estimat: {order_data['estimated_days']} zile lucrătoare
-            • Data estimată livrare: {(datetime.now() + timedelta(days=order_data['estimated_days'])).strftime('%d.%m.%Y')}
-            • Status: ⏳ În așteptare procesare
-            
-            🔔 NOTIFICĂRI:
-            • Vei primi o notificare când începe procesarea
-            • Vei primi o notificare când rendering-ul este gata
-            • Link download va fi trimis la finalizare
+            msg_client, msg_admin = self.build_receipt_emails(order_data, order_id)
             
-            📋 SPECIFICAȚII:
-            {order_data['requirements'] or 'Niciune specificate'}
+            # `receipt_sent` este marcat de worker, după livrarea chitanței
+            self.outbox.enqueue([
+                ('receipt', order_id, msg_client, EmailOutbox.idempotency_key(order_id, 'receipt')),
+                ('receipt_admin', order_id, msg_admin, EmailOutbox.idempotency_key(order_id, 'receipt_admin'))
+            ])
             
-            📞 SUPPORT:
-            • Email: bostiogstefania@gmail.com
-            • Telefon: +40 724 911 299
-            
-            Mulțumim pentru încredere!
-            🏗️ Echipa Rendering Service ARH
-            """, 'plain', 'utf-8'))
-            
-            msg_client['From'] = email_from
-            msg_client['To'] = order_data['email']
-            msg_client['Subject'] = f"🧾 Chitanță Rendering #{order_id} - {order_data['price_euro']} EUR"
-            
-            # Email către administrator
-            msg_admin = MIMEMultipart()
-            msg_admin.attach(MIMEText(f"""
-            💰 COMANDA NOUĂ PLĂTITĂ!
-
-            📋 DETALII CLIENT:
-            • Nume: {order_data['student_name']}
-            • Email: {order_data['email']}
-            • Telefon: {order_data.get('contact_phone', 'Nespecificat')}
-            • Facultate: {order_data.get('faculty', 'Nespecificată')}
-            
-            💶 DETALII FINANCIARE:
-            • ID Comandă: #{order_id}
-            • Sumă: {order_data['price_euro']} EUR
-            • Rezoluție: {order_data['resolution']}
-            • Randări: {order_data['render_count']}
-            • Zile estimare: {order_data['estimated_days']}
-            • Urgent: {'DA' if order_data.get('is_urgent') else 'NU'}
-            
-            🛠️ DETALII PROIECT:
-            • Software: {order_data['software']}
-            • Cerințe: {order_data['requirements'] or 'Niciune'}
-            • Fișier: {'Încărcat' if order_data.get('project_file') else 'Link: ' + order_data.get('project_link', 'N/A')}
-            
-            ⚡ ACȚIUNE NECESARĂ:
-            1. Verifică fișierul/link-ul proiectului
-            2. Confirmă clientului primirea
-            3. Începe procesarea
-            
-            ⏰ Termen limită: {(datetime.now() + timedelta(days=order_data['estimated_days'])).strftime('%d.%m.%Y')}
-            """, 'plain', 'utf-8'))
-            
-            msg_admin['From'] = email_from
-            msg_admin['To'] = "bostiogstefania@gmail.com"
-            msg_admin['Subject'] = f"💰 COMANDA NOUĂ #{order_id} - {order_data['price_euro']} EUR"
-            
-            # Trimite ambele email-uri
-            server = smtplib.SMTP(smtp_server, smtp_port)
-            server.starttls()
-            server.login(email_from, email_password)
-            server.send_message(msg_client)
-            server.send_message(msg_admin)
-            server.quit()
-            
-            # Marchează chitanța trimisă
-            conn = sqlite3.connect('rendering_orders.db')
-            cursor = conn.cursor()
-            cursor.execute('UPDATE orders SET receipt_sent = 1 WHERE id = ?', (order_id,))
-            conn.commit()
-            conn.close()
-            
-            st.success("📧 Chitanță trimisă pe email!")
+            st.success("📧 Chitanța va fi trimisă pe email în câteva momente!")
             
         except Exception as e:
-            st.warning(f"⚠️ Emailurile nu au putut fi trimise: {e}")
+            st.warning(f"⚠️ Emailurile nu au putut fi puse în coadă: {e}")
+
+    def build_receipt_emails(self, order_data, order_id):
+        """Construiește chitanța pentru client și anunțul pentru administrator"""
+        snapshot = OrderSnapshot.from_order(order_data, order_id)
+        delivery_date = (datetime.now() + timedelta(days=snapshot.estimated_days)).strftime('%d.%m.%Y')
+        
+        msg_client = self._build_message('receipt', snapshot.email, snapshot,
+                                         order_date=datetime.now().strftime('%d.%m.%Y %H:%M'),
+                                         delivery_date=delivery_date,
+                                         requirements=snapshot.requirements or 'Niciune specificate')
+        msg_admin = self._build_message('receipt_admin', self.email_config.admin_email, snapshot,
+                                        delivery_date=delivery_date,
+                                        contact_phone=snapshot.contact_phone or 'Nespecificat',
+                                        faculty=snapshot.faculty or 'Nespecificată',
+                                        urgent_label='DA' if snapshot.is_urgent else 'NU',
+                                        requirements=snapshot.requirements or 'Niciune',
+                                        project_source='Încărcat' if snapshot.project_file
+                                        else 'Link: ' + (snapshot.project_link or 'N/A'))
+        return msg_client, msg_admin
+
+    def _build_message(self, template, recipient, snapshot, **context):
+        """Randează un șablon (text + HTML) într-un mesaj MIME gata de pus în coadă"""
+        rendered = self.templates.render(template, **{**asdict(snapshot), **context})
+        
+        msg = MIMEMultipart('alternative')
+        msg.attach(MIMEText(rendered.text, 'plain', 'utf-8'))
+        msg.attach(MIMEText(rendered.html, 'html', 'utf-8'))
+        msg['From'] = self.email_config.email_from
+        msg['To'] = recipient
+        msg['Subject'] = rendered.subject
+        return msg
 
     def send_status_email(self, order_data, old_status, new_status):
-        """Trimite email cu notificare schimbare status"""
+        """Pune în coadă email-ul cu notificare schimbare status"""
         try:
-            smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-            smtp_port = int(os.getenv('SMTP_PORT', 587))
-            email_from = os.getenv('EMAIL_FROM', '')
-            email_password = os.getenv('EMAIL_PASSWORD', '')
-            
-            if not all([smtp_server, email_from, email_password]):
+            if not self.email_config.is_complete:
                 return False
             
-            status_messages = {
-                'pending': '⏳ În așteptare procesare',
-                'processing': '🚀 Procesare în curs', 
-                'completed': '✅ Finalizat'
-            }
-            
-            msg = MIMEMultipart()
-            msg.attach(MIMEText(f"""
-            🔔 ACTUALIZARE STATUS - Rendering #{order_data['id']}
-
-            Bună {order_data['student_name']},
-            
-            Statusul comenzii tale s-a actualizat!
-            
-            📊 **STATUS NOU:**
-            • De la: {status_messages.get(old_status, old_status)}
-            • La: {status_messages.get(new_status, new_status)}
-            
-            🎯 **DETALII COMANDA:**
-            • ID Comandă: #{order_data['id']}
-            • Software: {order_data['software']}
-            • Rezoluție: {order_data['resolution']}
-            • Număr randări: {order_data['render_count']}
-            • Progres curent: {order_data['progress']}%
-            
-            ⏰ **TERMEN ESTIMAT:**
-            Data estimată de finalizare: {order_data['deadline']}
-            
-            {'📥 **DESCĂRCARE:**' + chr(10) + 'Proiectul tău este gata! Poți descărca fișierele de aici:' + chr(10) + order_data['download_link'] if new_status == 'completed' and order_data.get('download_link') else ''}
-            
-            📞 **SUPPORT:**
-            • Email: bostiogstefania@gmail.com
-            • Telefon: +40 724 911 299
-            
-            Mulțumim pentru încredere!
-            🏗️ Echipa Rendering Service ARH
-            """, 'plain', 'utf-8'))
-            
-            msg['From'] = email_from
-            msg['To'] = order_data['email']
-            msg['Subject'] = f"🔔 Status Actualizat - Rendering #{order_data['id']} - {status_messages.get(new_status, new_status)}"
-            
-            server = smtplib.SMTP(smtp_server, smtp_port)
-            server.starttls()
-            server.login(email_from, email_password)
-            server.send_message(msg)
-            server.quit()
-            
-            return True
+            # Aceeași tranziție a aceleiași comenzi nu generează un al doilea email
+            queued = self.outbox.enqueue([(
+                'status', order_data['id'], self.build_status_email(order_data, old_status, new_status),
+                EmailOutbox.idempotency_key(order_data['id'], 'status', f"{old_status}>{new_status}")
+            )])
+            return queued[0] is not None
         except Exception as e:
-            print(f"⚠️ Eroare la trimiterea email-ului de status: {e}")
+            print(f"⚠️ Eroare la punerea în coadă a email-ului de status: {e}")
             return False
 
+    def build_status_email(self, order_data, old_status, new_status):
+        """Construiește email-ul de notificare schimbare status"""
+        snapshot = OrderSnapshot.from_order(order_data)
+        download_section = ""
+        if new_status == 'completed' and snapshot.download_link:
+            download_section = self.templates.fragment('download_ready', download_link=snapshot.download_link)
+        return self._build_message('status', snapshot.email, snapshot,
+                                   old_status_label=STATUS_LABELS.get(old_status, old_status),
+                                   new_status_label=STATUS_LABELS.get(new_status, new_status),
+                                   download_section=download_section)
+
     def send_progress_email(self, order_data, progress, current_stage, notes=""):
-        """Trimite email cu notificare progres către client"""
+        """Pune în coadă email-ul cu notificare progres către client"""
         try:
-            smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-            smtp_port = int(os.getenv('SMTP_PORT', 587))
-            email_from = os.getenv('EMAIL_FROM', '')
-            email_password = os.getenv('EMAIL_PASSWORD', '')
-            
-            if not all([smtp_server, email_from, email_password]):
+            if not self.email_config.is_complete:
                 return False
             
-            msg = MIMEMultipart()
-            msg.attach(MIMEText(f"""
-            🚀 PROCESARE ÎN CURS - Rendering #{order_data['id']}
-
-            Bună {order_data['student_name']},
-            
-            Procesarea rendering-ului tău a început!
-            
-            📊 **STADIUL ACTUAL:**
-            • Progres: {progress}%
-            • Etapă: {current_stage}
-            • Status: Procesare în curs
-            
-            🎯 **DETALII COMANDA:**
-            • ID Comandă: #{order_data['id']}
-            • Software: {order_data['software']}
-            • Rezoluție: {order_data['resolution']}
-            • Număr randări: {order_data['render_count']}
-            
-            ⏰ **TERMEN ESTIMAT:**
-            Data estimată de finalizare: {order_data['deadline']}
-            
-            📝 **DETALII PROIECT:**
-            {notes or 'Procesare în conformitate cu specificațiile tale'}
-            
-            🔔 **URMĂTOAREA NOTIFICARE:**
-            Vei primi un email când rendering-ul va fi complet finalizat și gata pentru descărcare.
-            
-            📞 **SUPPORT:**
-            • Email: bostiogstefania@gmail.com
-            • Telefon: +40 724 911 299
-            
-            Mulțumim pentru încredere!
-            🏗️ Echipa Rendering Service ARH
-            """, 'plain', 'utf-8'))
-            
-            msg['From'] = email_from
-            msg['To'] = order_data['email']
-            msg['Subject'] = f"🚀 Procesare Rendering #{order_data['id']} - În curs"
-            
-            server = smtplib.SMTP(smtp_server, smtp_port)
-            server.starttls()
-            server.login(email_from, email_password)
-            server.send_message(msg)
-            server.quit()
-            
-            return True
+            queued = self.outbox.enqueue([(
+                'progress', order_data['id'], self.build_progress_email(order_data, progress, current_stage, notes),
+                EmailOutbox.idempotency_key(order_data['id'], 'progress', 'started')
+            )])
+            return queued[0] is not None
         except Exception as e:
-            print(f"⚠️ Eroare la trimiterea email-ului de progres: {e}")
+            print(f"⚠️ Eroare la punerea în coadă a email-ului de progres: {e}")
             return False
 
+    def build_progress_email(self, order_data, progress, current_stage, notes=""):
+        """Construiește email-ul de notificare progres"""
+        snapshot = OrderSnapshot.from_order(order_data)
+        return self._build_message('progress', snapshot.email, snapshot,
+                                   progress=progress, current_stage=current_stage,
+                                   notes=notes or 'Procesare în conformitate cu specificațiile tale')
+
     def send_completion_email(self, order_data, download_link=None):
-        """Trimite email cu notificare finalizare către client"""
+        """Pune în coadă email-ul cu notificare finalizare către client"""
         try:
-            smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-            smtp_port = int(os.getenv('SMTP_PORT', 587))
-            email_from = os.getenv('EMAIL_FROM', '')
-            email_password = os.getenv('EMAIL_PASSWORD', '')
-            
-            if not all([smtp_server, email_from, email_password]):
+            if not self.email_config.is_complete:
                 return False
             
-            download_section = ""
-            if download_link:
-                download_section = f"""
-                📥 **DESCĂRCARE:**
-                Proiectul tău este gata! Poți descărca fișierele de aici:
-                {download_link}
-                """
-            else:
-                download_section = """
-                📥 **DESCĂRCARE:**
-                Proiectul tău este gata! Vei primi link-ul de descărcare în scurt timp.
-                """
-            
-            msg = MIMEMultipart()
-            msg.attach(MIMEText(f"""
-            ✅ RENDERING FINALIZAT - #{order_data['id']}
-
-            Bună {order_data['student_name']},
-            
-            Rendering-ul tău este finalizat și gata!
-            
-            🎉 **PROIECT FINALIZAT:**
-            • Status: 100% Complet
-            • Data finalizare: {datetime.now().strftime('%d.%m.%Y %H:%M')}
-            • Calitate: Conform specificațiilor
-            
-            🎯 **DETALII COMANDA:**
-            • ID Comandă: #{order_data['id']}
-            • Software: {order_data['software']}
-            • Rezoluție: {order_data['resolution']}
-            • Număr randări: {order_data['render_count']}
-            
-            {download_section}
-            
-            📋 **SPECIFICAȚII PROCESATE:**
-            {order_data['requirements'] or 'Toate specificațiile au fost respectate'}
-            
-            ⭐ **FEEDBACK:**
-            Dacă ești mulțumit de rezultat, te rugăm să ne lași un review!
-            
-            📞 **SUPPORT:**
-            • Email: bostiogstefania@gmail.com
-            • Telefon: +40 724 911 299
-            
-            Mulțumim că ai ales serviciile noastre!
-            🏗️ Echipa Rendering Service ARH
-            """, 'plain', 'utf-8'))
-            
-            msg['From'] = email_from
-            msg['To'] = order_data['email']
-            msg['Subject'] = f"✅ Rendering Finalizat #{order_data['id']} - Gata pentru descărcare"
-            
-            server = smtplib.SMTP(smtp_server, smtp_port)
-            server.starttls()
-            server.login(email_from, email_password)
-            server.send_message(msg)
-            server.quit()
-            
-            return True
+            queued = self.outbox.enqueue([(
+                'completion', order_data['id'], self.build_completion_email(order_data, download_link),
+                EmailOutbox.idempotency_key(order_data['id'], 'completion')
+            )])
+            return queued[0] is not None
         except Exception as e:
-            print(f"⚠️ Eroare la trimiterea email-ului de finalizare: {e}")
+            print(f"⚠️ Eroare la punerea în coadă a email-ului de finalizare: {e}")
             return False
     
-    def get_orders(self, status=None, include_deleted=False):
-        """Returnează toate comenzile"""
-        try:
-            conn = sqlite3.connect('rendering_orders.db')
-            
-            if status:
-                if include_deleted:
-                    df = pd.read_sql_query(
-                        "SELECT * FROM orders WHERE status = ? ORDER BY created_at DESC", 
-                        conn, params=[status]
-                    )
-                else:
-                    df = pd.read_sql_query(
-                        "SELECT * FROM orders WHERE status = ? AND is_deleted = 0 ORDER BY created_at DESC", 
-                        conn, params=[status]
-                    )
-            else:
-                if include_deleted:
-                    df = pd.read_sql_query(
-                        "SELECT * FROM orders ORDER BY created_at DESC", 
-                        conn
-                    )
-                else:
-                    df = pd.read_sql_query(
-                        "SELECT * FROM orders WHERE is_deleted = 0 ORDER BY created_at DESC", 
-                        conn
-                    )
+    def build_completion_email(self, order_data, download_link=None):
+        """Construiește email-ul de notificare finalizare"""
+        snapshot = OrderSnapshot.from_order(order_data)
+        if download_link:
+            download_section = self.templates.fragment('download_ready', download_link=download_link)
+        else:
+            download_section = self.templates.fragment('download_pending')
+        return self._build_message('completion', snapshot.email, snapshot,
+                                   completed_date=datetime.now().strftime('%d.%m.%Y %H:%M'),
+                                   download_section=download_section,
+                                   requirements=snapshot.requirements or 'Toate specificațiile au fost respectate',
+                                   closing="Mulțumim că ai ales serviciile noastre!")
+
+    def get_digest_data(self, since, deadline_days=None):
+        """Datele digest-ului: comenzi noi, termene apropiate/depășite și email-uri nelivrate"""
+        if deadline_days is None:
+            deadline_days = self.email_config.digest_deadline_days
+        with self.db.connection() as conn:
+            # idx_orders_created
+            new_orders = pd.read_sql_query('''
+                SELECT id, student_name, email, price_euro, deadline, is_urgent FROM orders
+                WHERE created_at > ? AND is_deleted = 0
+                ORDER BY created_at
+            ''', conn, params=[since])
+            # Index parțial: condițiile din WHERE trebuie să rămână identice cu cele ale indexului
+            deadline_orders = pd.read_sql_query('''
+                SELECT id, student_name, email, deadline, progress, status
+                FROM orders INDEXED BY idx_orders_open_deadline
+                WHERE is_deleted = 0 AND status != 'completed' AND deadline <= date('now', ?)
+                ORDER BY deadline
+            ''', conn, params=[f'+{int(deadline_days)} days'])
+            # Doar eșecurile de după digest-ul anterior: pentru un mesaj eșuat definitiv,
+            # `mark_failed` pune în `next_attempt_at` momentul eșecului
+            failed_emails = pd.read_sql_query('''
+                SELECT id, order_id, kind, recipient, attempts, last_error FROM email_outbox
+                WHERE status = 'failed' AND next_attempt_at > ?
+                ORDER BY id
+            ''', conn, params=[since])
+        return new_orders, deadline_orders, failed_emails
+    
+    def build_admin_digest(self, since, period):
+        """Construiește email-ul de digest; None dacă nu există nimic de raportat"""
+        new_orders, deadline_orders, failed_emails = self.get_digest_data(since)
+        if new_orders.empty and deadline_orders.empty and failed_emails.empty:
+            return None
+        
+        today = datetime.now().strftime('%Y-%m-%d')
+        
+        def listing(rows, describe):
+            lines = [describe(row) for _, row in rows.iterrows()]
+            if not lines:
+                return EmailFragment("• —", "<p>—</p>")
+            return EmailFragment(
+                "\n".join(f"• {line}" for line in lines),
+                "<ul>" + "".join(f"<li>{html.escape(line)}</li>" for line in lines) + "</ul>"
+            )
+        
+        rendered = self.templates.render(
+            'admin_digest',
+            period=period,
+            new_count=len(new_orders),
+            deadline_count=len(deadline_orders),
+            failed_count=len(failed_emails),
+            new_orders=listing(new_orders, lambda row: (
+                f"#{row['id']} {row['student_name']} ({row['email']}) - {row['price_euro']} EUR - "
+                f"termen {row['deadline']}{' - 🚀 URGENT' if row['is_urgent'] else ''}"
+            )),
+            deadline_orders=listing(deadline_orders, lambda row: (
+                f"#{row['id']} {row['student_name']} - termen {row['deadline']}"
+                f"{' (DEPĂȘIT)' if row['deadline'] < today else ''} - {row['progress']}% - {row['status']}"
+            )),
+            failed_emails=listing(failed_emails, lambda row: (
+                f"#{row['id']} {row['kind']} către {row['recipient']}"
+                f"{' (comanda #' + str(int(row['order_id'])) + ')' if pd.notna(row['order_id']) else ''}"
+                f" - {row['attempts']} încercări - {row['last_error']}"
+            )),
+            unread_notifications=self.notification_service.unread_count()
+        )
+        
+        msg = MIMEMultipart('alternative')
+        msg.attach(MIMEText(rendered.text, 'plain', 'utf-8'))
+        msg.attach(MIMEText(rendered.html, 'html', 'utf-8'))
+        msg['From'] = self.email_config.email_from
+        msg['To'] = self.email_config.admin_email
+        msg['Subject'] = rendered.subject
+        return msg
+    
+    def run_admin_digest_if_due(self, force=False):
+        """Pune în coadă digest-ul dacă a trecut intervalul configurat; returnează True dacă l-a trimis"""
+        interval_hours = self.email_config.digest_interval_hours
+        if not self.email_config.is_complete or (interval_hours <= 0 and not force):
+            return False
+        
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO job_state (name, last_run_at) VALUES ('admin_digest', datetime('now', ?))",
+                (f'-{interval_hours} hours',)
+            )
+            last_run = conn.execute("SELECT last_run_at FROM job_state WHERE name = 'admin_digest'").fetchone()[0]
+            due = conn.execute("SELECT datetime(?, ?) <= datetime('now')",
+                               (last_run, f'+{interval_hours} hours')).fetchone()[0]
+            if not (due or force):
+                return False
             
-            conn.close()
-            return df
+            # Marcajul rulării și punerea în coadă sunt atomice: un singur proces trimite digest-ul
+            now = conn.execute("SELECT datetime('now')").fetchone()[0]
+            conn.execute("UPDATE job_state SET last_run_at = ? WHERE name = 'admin_digest'", (now,))
+            msg = self.build_admin_digest(last_run, f"{last_run} → {now} UTC")
+            if msg is None:
+                return False
+            self.outbox.enqueue([('digest', None, msg)])
+        return True
+    
+    def digest_last_run(self):
+        """Momentul ultimului digest (UTC), sau None"""
+        with self.db.connection() as conn:
+            row = conn.execute("SELECT last_run_at FROM job_state WHERE name = 'admin_digest'").fetchone()
+        return row[0] if row else None
+    
+    def get_orders(self, status=None, include_deleted=False, page_size=None, cursor=None,
+                   urgent=None, created_from=None, created_to=None, broken_links=False):
+        """Returnează comenzile, opțional o singură pagină.
+
+        Paginarea este de tip keyset: `cursor` este perechea (created_at, id)
+        a ultimei comenzi din pagina anterioară (vezi `next_page_cursor`).
+        """
+        key = ('orders', status, include_deleted, page_size, cursor, urgent, created_from, created_to, broken_links)
+        try:
+            return self._cached_read(
+                key,
+                lambda: self._load_orders(status, include_deleted, page_size, cursor,
+                                          urgent, created_from, created_to, broken_links)
+            )
         except Error as e:
             st.error(f"❌ Eroare la citirea comenzilor: {e}")
             return pd.DataFrame()
     
+    def get_orders_by_email(self, email, include_deleted=False):
+        """Returnează comenzile unui client (email comparat fără diferențe de majuscule)"""
+        email = email.strip()
+        
+        def load():
+            query = "SELECT * FROM orders WHERE email = ? COLLATE NOCASE"
+            if not include_deleted:
+                query += " AND is_deleted = 0"
+            query += " ORDER BY created_at DESC, id DESC"
+            with self.db.connection() as conn:
+                return pd.read_sql_query(query, conn, params=[email])
+        
+        try:
+            return self._cached_read(('orders_by_email', email.lower(), include_deleted), load)
+        except Error as e:
+            st.error(f"❌ Eroare la căutarea comenzilor: {e}")
+            return pd.DataFrame()
+    
+    def order_exists(self, order_id, include_deleted=False):
+        """Verifică existența unei comenzi fără a o încărca"""
+        query = "SELECT 1 FROM orders WHERE id = ?"
+        if not include_deleted:
+            query += " AND is_deleted = 0"
+        
+        def load():
+            with self.db.connection() as conn:
+                return conn.execute(query, (int(order_id),)).fetchone() is not None
+        
+        try:
+            return self._cached_read(('order_exists', int(order_id), include_deleted), load)
+        except Error as e:
+            st.error(f"❌ Eroare la căutarea comenzii: {e}")
+            return False
+    
+    def count_orders(self, status=None, include_deleted=False, urgent=None,
+                     created_from=None, created_to=None, broken_links=False):
+        """Returnează numărul de comenzi care corespund filtrelor"""
+        key = ('count', status, include_deleted, urgent, created_from, created_to, broken_links)
+        where, params = self._order_filters(status, include_deleted, urgent, created_from, created_to, broken_links)
+        
+        def load():
+            with self.db.connection() as conn:
+                return conn.execute(f"SELECT COUNT(*) FROM orders {where}", params).fetchone()[0]
+        
+        try:
+            return self._cached_read(key, load)
+        except Error as e:
+            st.error(f"❌ Eroare la numărarea comenzilor: {e}")
+            return 0
+    
+    @staticmethod
+    def next_page_cursor(page_df):
+        """Cursorul pentru pagina care urmează după `page_df`"""
+        if page_df.empty:
+            return None
+        last = page_df.iloc[-1]
+        return (last['created_at'], int(last['id']))
+    
+    @staticmethod
+    def _order_filters(status, include_deleted, urgent, created_from, created_to, broken_links=False):
+        """Construiește clauza WHERE pentru filtrele de comenzi"""
+        clauses, params = [], []
+        if not include_deleted:
+            clauses.append("is_deleted = 0")
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if urgent is not None:
+            clauses.append("is_urgent = ?")
+            params.append(1 if urgent else 0)
+        if created_from:
+            clauses.append("created_at >= ?")
+            params.append(created_from.strftime('%Y-%m-%d'))
+        if created_to:
+            # Intervalul include toată ziua de final
+            clauses.append("created_at < ?")
+            params.append((created_to + timedelta(days=1)).strftime('%Y-%m-%d'))
+        if broken_links:
+            # Căutare pe indexul (order_id, status, checked_at) din `order_link_checks`
+            clauses.append('''EXISTS (SELECT 1 FROM order_link_checks
+                                      WHERE order_link_checks.order_id = orders.id
+                                        AND order_link_checks.status = 'broken')''')
+        
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+    
+    def _load_orders(self, status, include_deleted, page_size=None, cursor=None,
+                     urgent=None, created_from=None, created_to=None, broken_links=False):
+        """Citește comenzile direct din baza de date"""
+        where, params = self._order_filters(status, include_deleted, urgent, created_from, created_to, broken_links)
+        query = f"SELECT * FROM orders {where}"
+        
+        if cursor:
+            query += " AND " if where else " WHERE "
+            query += "(created_at, id) < (?, ?)"
+            params += [cursor[0], cursor[1]]
+        
+        query += " ORDER BY created_at DESC, id DESC"
+        if page_size:
+            query += " LIMIT ?"
+            params.append(int(page_size))
+        
+        with self.db.connection() as conn:
+            return pd.read_sql_query(query, conn, params=params)
+    
+    def get_order_stats(self):
+        """Returnează indicatorii pentru Dashboard și Statistici din tabela `order_stats`"""
+        try:
+            return self._cached_read(('stats',), self._load_order_stats)
+        except Error as e:
+            st.error(f"❌ Eroare la calcularea statisticilor: {e}")
+            return OrderStats(0, 0.0, 0.0, 0, {}, {}, {})
+    
+    def _load_order_stats(self):
+        """Citește agregatele menținute incremental (câteva rânduri, indiferent de numărul de comenzi)"""
+        with self.db.connection() as conn:
+            rows = conn.execute('''
+                SELECT status, software, resolution, is_urgent, order_count, revenue_sum, progress_sum
+                FROM order_stats
+            ''').fetchall()
+        
+        total_orders, total_revenue, total_progress, urgent_orders = 0, 0.0, 0, 0
+        by_status, by_software, by_resolution = {}, {}, {}
+        for status, software, resolution, is_urgent, count, revenue, progress in rows:
+            total_orders += count
+            total_revenue += revenue
+            total_progress += progress
+            if is_urgent:
+                urgent_orders += count
+            by_status[status] = by_status.get(status, 0) + count
+            by_software[software] = by_software.get(software, 0) + count
+            by_resolution[resolution] = by_resolution.get(resolution, 0) + count
+        
+        return OrderStats(
+            total_orders=total_orders,
+            total_revenue=total_revenue,
+            avg_progress=total_progress / total_orders if total_orders else 0.0,
+            urgent_orders=urgent_orders,
+            by_status=by_status,
+            by_software=by_software,
+            by_resolution=by_resolution
+        )
+    
+    def rebuild_order_stats(self):
+        """Reconstruiește de la zero tabela `order_stats` din `orders`"""
+        try:
+            with self.db.transaction() as conn:
+                conn.execute('DELETE FROM order_stats')
+                conn.execute(f'INSERT INTO order_stats {ORDER_STATS_RECOMPUTE_SQL}')
+            self._invalidate_cache()
+            return True
+        except Error as e:
+            st.error(f"❌ Eroare la reconstruirea statisticilor: {e}")
+            return False
+    
+    def check_order_stats(self):
+        """Compară `order_stats` cu o recalculare completă; returnează diferențele găsite"""
+        with self.db.transaction() as conn:
+            # Ambele citiri văd același snapshot
+            expected = {row[:4]: row[4:] for row in conn.execute(ORDER_STATS_RECOMPUTE_SQL)}
+            actual = {row[:4]: row[4:] for row in conn.execute('''
+                SELECT status, software, resolution, is_urgent, order_count, revenue_sum, progress_sum
+                FROM order_stats
+            ''')}
+        
+        mismatches = []
+        for key in sorted(set(expected) | set(actual)):
+            exp = expected.get(key, (0, 0, 0))
+            act = actual.get(key, (0, 0, 0))
+            if exp[0] != act[0] or abs(exp[1] - act[1]) > 1e-6 or exp[2] != act[2]:
+                mismatches.append({'group': key, 'expected': exp, 'actual': act})
+        return mismatches
+    
+    @staticmethod
+    def _fetch_order_row(conn, order_id):
+        """Citește o comandă ca dicționar pe conexiunea (și tranzacția) curentă"""
+        cursor = conn.execute("SELECT * FROM orders WHERE id = ?", (int(order_id),))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
     def update_order_status(self, order_id, status, download_link=None):
         """Actualizează statusul unei comenzi și trimite notificări"""
         try:
-            # Obține starea anterioară
-            order = self.get_order_by_id(order_id)
-            if order.empty:
-                return False
+            # Citirea stării anterioare, actualizarea, notificarea și punerea
+            # email-ului în coadă rulează într-o singură tranzacție, pe o conexiune
+            with self.db.transaction() as conn:
+                order_data = self._fetch_order_row(conn, order_id)
+                if order_data is None:
+                    return False
                 
-            old_status = order.iloc[0]['status']
-            order_data = order.iloc[0]
-            
-            conn = sqlite3.connect('rendering_orders.db')
-            cursor = conn.cursor()
-            
-            if download_link:
-                cursor.execute('''
-                    UPDATE orders 
-                    SET status = ?, completed_at = CURRENT_TIMESTAMP, download_link = ?
-                    WHERE id = ?
-                ''', (status, download_link, order_id))
-            else:
-                cursor.execute('''
-                    UPDATE orders 
-                    SET status = ? 
-                    WHERE id = ?
-                ''', (status, order_id))
-            
-            conn.commit()
-            conn.close()
-            
-            # Adaugă notificare pentru schimbarea statusului
-            self.notification_service.add_notification(
-                order_id,
-                f"📊 Status comanda actualizat: {old_status.upper()} → {status.upper()}",
-                "info",
-                order_data['email']
-            )
-            
-            # Trimite email de notificare status DOAR dacă statusul s-a schimbat
-            if old_status != status:
-                # Verifică dacă email-ul de status a fost deja trimis pentru această schimbare
-                if not order_data.get('status_email_sent', False) or True:  # Forțează trimiterea pentru testare
-                    email_sent = self.send_status_email(order_data, old_status, status)
-                    
-                    # Marchează că email-ul de status a fost trimis
-                    if email_sent:
-                        conn = sqlite3.connect('rendering_orders.db')
-                        cursor = conn.cursor()
-                        cursor.execute('UPDATE orders SET status_email_sent = 1 WHERE id = ?', (order_id,))
-                        conn.commit()
-                        conn.close()
+                old_status = order_data['status']
+                order_data['status'] = status
+                if download_link:
+                    order_data['download_link'] = download_link
+                
+                # Email de notificare status DOAR dacă statusul s-a schimbat
+                status_queued = old_status != status and self.send_status_email(order_data, old_status, status)
+                
+                if download_link:
+                    conn.execute('''
+                        UPDATE orders 
+                        SET status = ?, completed_at = CURRENT_TIMESTAMP, download_link = ?,
+                            status_email_sent = CASE WHEN ? THEN 1 ELSE status_email_sent END
+                        WHERE id = ?
+                    ''', (status, download_link, status_queued, order_id))
+                else:
+                    conn.execute('''
+                        UPDATE orders 
+                        SET status = ?,
+                            status_email_sent = CASE WHEN ? THEN 1 ELSE status_email_sent END
+                        WHERE id = ?
+                    ''', (status, status_queued, order_id))
+                
+                # Adaugă notificare pentru schimbarea statusului
+                self.notification_service.add_notification(
+                    order_id,
+                    f"📊 Status comanda actualizat: {old_status.upper()} → {status.upper()}",
+                    "info",
+                    order_data['email']
+                )
+            self._invalidate_cache()
             
             return True
         except Error as e:
@@ -726,102 +4301,220 @@ class RenderingService:
     def update_progress(self, order_id, progress, current_stage, notes=""):
         """Actualizează progresul unei comenzi și trimite notificări"""
         try:
-            conn = sqlite3.connect('rendering_orders.db')
-            cursor = conn.cursor()
-            
-            # Obține starea anterioară pentru a verifica dacă trebuie să trimitem email
-            order = self.get_order_by_id(order_id)
-            if order.empty:
-                return False
-                
-            previous_progress = order.iloc[0]['progress']
-            progress_email_sent = order.iloc[0]['progress_email_sent']
-            completed_email_sent = order.iloc[0]['completed_email_sent']
-            
             # Calculează numărul de etape completate
             stages_completed = int((progress / 100) * 6)  # 6 etape totale
             
-            cursor.execute('''
-                UPDATE orders 
-                SET progress = ?, current_stage = ?, stages_completed = ?
-                WHERE id = ?
-            ''', (progress, current_stage, stages_completed, order_id))
-            
-            # Salvează în istoricul progresului
-            cursor.execute('''
-                INSERT INTO progress_history (order_id, stage, progress, notes)
-                VALUES (?, ?, ?, ?)
-            ''', (order_id, current_stage, progress, notes))
-            
-            conn.commit()
-            conn.close()
-            
-            # Obține datele complete ale comenzii pentru email
-            order = self.get_order_by_id(order_id)
-            if not order.empty:
-                order_data = order.iloc[0]
+            with self.db.transaction() as conn:
+                # Starea anterioară este citită sub lock-ul de scriere al tranzacției
+                order_data = self._fetch_order_row(conn, order_id)
+                if order_data is None:
+                    return False
+                
+                # NOTIFICARE 1: Procesare începută (doar o dată)
+                send_progress = (progress >= 10 and not order_data['progress_email_sent']
+                                 and order_data['progress'] < 10)
+                # NOTIFICARE 2: Finalizare (doar o dată)
+                send_completion = progress == 100 and not order_data['completed_email_sent']
+                # Începutul procesării și finalizarea nu se comasează niciodată
+                milestone = order_data['progress'] < 10 <= progress or progress == 100
+                order_data.update(progress=progress, current_stage=current_stage, stages_completed=stages_completed)
+                
+                # Email-urile intră în coadă în aceeași tranzacție cu marcajul lor
+                progress_queued = send_progress and self.send_progress_email(order_data, progress, current_stage, notes)
+                completion_queued = send_completion and self.send_completion_email(order_data, order_data['download_link'])
                 
-                # Adaugă notificare pentru progres
+                conn.execute('''
+                    UPDATE orders 
+                    SET progress = ?, current_stage = ?, stages_completed = ?,
+                        progress_email_sent = CASE WHEN ? THEN 1 ELSE progress_email_sent END,
+                        completed_email_sent = CASE WHEN ? THEN 1 ELSE completed_email_sent END
+                    WHERE id = ?
+                ''', (progress, current_stage, stages_completed, progress_queued, completion_queued, order_id))
+                
+                # Salvează în istoricul progresului
+                conn.execute('''
+                    INSERT INTO progress_history (order_id, stage, progress, notes)
+                    VALUES (?, ?, ?, ?)
+                ''', (order_id, current_stage, progress, notes))
+                
+                # Adaugă notificare pentru progres (actualizările rapide se comasează)
                 self.notification_service.add_notification(
                     order_id,
                     f"📈 Progres actualizat: {progress}% - {current_stage}",
                     "info",
-                    order_data['email']
+                    order_data['email'],
+                    coalesce_key=None if milestone else 'progress'
                 )
-                
-                # NOTIFICARE 1: Procesare începută (doar o dată)
-                if progress >= 10 and not progress_email_sent and previous_progress < 10:
-                    success = self.send_progress_email(order_data, progress, current_stage, notes)
-                    if success:
-                        # Marchează că email-ul de progres a fost trimis
-                        conn = sqlite3.connect('rendering_orders.db')
-                        cursor = conn.cursor()
-                        cursor.execute('UPDATE orders SET progress_email_sent = 1 WHERE id = ?', (order_id,))
-                        conn.commit()
-                        conn.close()
-                        print(f"✅ Email progres trimis pentru comanda #{order_id}")
-                
-                # NOTIFICARE 2: Finalizare (doar o dată)
-                if progress == 100 and not completed_email_sent:
-                    download_link = order_data['download_link']
-                    success = self.send_completion_email(order_data, download_link)
-                    if success:
-                        # Marchează că email-ul de finalizare a fost trimis
-                        conn = sqlite3.connect('rendering_orders.db')
-                        cursor = conn.cursor()
-                        cursor.execute('UPDATE orders SET completed_email_sent = 1 WHERE id = ?', (order_id,))
-                        conn.commit()
-                        conn.close()
-                        print(f"✅ Email finalizare trimis pentru comanda #{order_id}")
+            self._invalidate_cache()
             
             return True
         except Error as e:
             st.error(f"❌ Eroare la actualizarea progresului: {e}")
             return False
 
+    @staticmethod
+    def _fetch_order_rows(conn, order_ids, chunk_size=500):
+        """Citește mai multe comenzi ca dicționare (în bucăți, sub limita de parametri SQLite)"""
+        rows = []
+        for start in range(0, len(order_ids), chunk_size):
+            chunk = order_ids[start:start + chunk_size]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor = conn.execute(f"SELECT * FROM orders WHERE id IN ({placeholders})", chunk)
+            columns = [column[0] for column in cursor.description]
+            rows.extend(dict(zip(columns, row)) for row in cursor.fetchall())
+        return rows
+
+    def bulk_update_status(self, order_ids, status):
+        """Schimbă statusul mai multor comenzi într-o singură tranzacție; returnează numărul de comenzi actualizate"""
+        order_ids = [int(order_id) for order_id in order_ids]
+        try:
+            with self.db.transaction() as conn:
+                orders = self._fetch_order_rows(conn, order_ids)
+                changed = [order for order in orders if order['status'] != status]
+                
+                # Email-urile intră în coadă în aceeași tranzacție cu marcajul lor
+                queue_emails = bool(changed) and self.email_config.is_complete
+                messages = []
+                for order in changed:
+                    old_status = order['status']
+                    order.update(status=status, old_status=old_status)
+                    if queue_emails:
+                        messages.append(('status', order['id'], self.build_status_email(order, old_status, status),
+                                         EmailOutbox.idempotency_key(order['id'], 'status', f"{old_status}>{status}")))
+                # Marcajul se pune doar pentru comenzile al căror email a intrat efectiv în coadă
+                queued = set()
+                if messages:
+                    outbox_ids = self.outbox.enqueue(messages)
+                    queued = {order_id for (_, order_id, *_), outbox_id in zip(messages, outbox_ids)
+                              if outbox_id is not None}
+                
+                conn.executemany('''
+                    UPDATE orders 
+                    SET status = ?, status_email_sent = CASE WHEN ? THEN 1 ELSE status_email_sent END,
+                        completed_at = CASE WHEN ? THEN CURRENT_TIMESTAMP ELSE completed_at END
+                    WHERE id = ?
+                ''', [(status, order['id'] in queued, status == 'completed', order['id']) for order in changed])
+                
+                self.notification_service.add_notifications([(
+                    order['id'],
+                    f"📊 Status comanda actualizat: {order['old_status'].upper()} → {status.upper()}",
+                    "info",
+                    order['email']
+                ) for order in changed])
+            self._invalidate_cache()
+        except Error as e:
+            st.error(f"❌ Eroare la actualizarea comenzilor: {e}")
+            return 0
+        
+        return len(changed)
+
+    def bulk_update_progress(self, order_ids, progress, current_stage, notes=""):
+        """Actualizează progresul mai multor comenzi într-o singură tranzacție; returnează numărul de comenzi actualizate"""
+        order_ids = [int(order_id) for order_id in order_ids]
+        stages_completed = int((progress / 100) * 6)  # 6 etape totale
+        queue_emails = self.email_config.is_complete
+        try:
+            with self.db.transaction() as conn:
+                orders = self._fetch_order_rows(conn, order_ids)
+                messages = []
+                notifications = []
+                for order in orders:
+                    milestone = order['progress'] < 10 <= progress or progress == 100
+                    notifications.append((
+                        order['id'],
+                        f"📈 Progres actualizat: {progress}% - {current_stage}",
+                        "info",
+                        order['email'],
+                        None if milestone else 'progress'
+                    ))
+                    send_progress = (queue_emails and progress >= 10 and not order['progress_email_sent']
+                                     and order['progress'] < 10)
+                    send_completion = queue_emails and progress == 100 and not order['completed_email_sent']
+                    order.update(progress=progress, current_stage=current_stage, stages_completed=stages_completed)
+                    if send_progress:
+                        messages.append(('progress', order['id'],
+                                         self.build_progress_email(order, progress, current_stage, notes),
+                                         EmailOutbox.idempotency_key(order['id'], 'progress', 'started')))
+                    if send_completion:
+                        messages.append(('completion', order['id'],
+                                         self.build_completion_email(order, order['download_link']),
+                                         EmailOutbox.idempotency_key(order['id'], 'completion')))
+                
+                # Email-urile intră în coadă în aceeași tranzacție cu marcajul lor;
+                # marcajul se pune doar pentru mesajele efectiv adăugate în coadă
+                queued = set()
+                if messages:
+                    outbox_ids = self.outbox.enqueue(messages)
+                    queued = {(kind, order_id) for (kind, order_id, *_), outbox_id in zip(messages, outbox_ids)
+                              if outbox_id is not None}
+                updates = [(progress, current_stage, stages_completed,
+                            ('progress', order['id']) in queued, ('completion', order['id']) in queued, order['id'])
+                           for order in orders]
+                
+                conn.executemany('''
+                    UPDATE orders 
+                    SET progress = ?, current_stage = ?, stages_completed = ?,
+                        progress_email_sent = CASE WHEN ? THEN 1 ELSE progress_email_sent END,
+                        completed_email_sent = CASE WHEN ? THEN 1 ELSE completed_email_sent END
+                    WHERE id = ?
+                ''', updates)
+                
+                conn.executemany('''
+                    INSERT INTO progress_history (order_id, stage, progress, notes)
+                    VALUES (?, ?, ?, ?)
+                ''', [(order['id'], current_stage, progress, notes) for order in orders])
+                
+                self.notification_service.add_notifications(notifications)
+            self._invalidate_cache()
+        except Error as e:
+            st.error(f"❌ Eroare la actualizarea progresului: {e}")
+            return 0
+        
+        return len(orders)
+
+    def bulk_permanently_delete(self, order_ids):
+        """Șterge definitiv mai multe comenzi într-o singură tranzacție; returnează numărul de comenzi șterse"""
+        order_ids = [int(order_id) for order_id in order_ids]
+        try:
+            blobs = []
+            with self.db.transaction() as conn:
+                for start in range(0, len(order_ids), 500):
+                    chunk = order_ids[start:start + 500]
+                    placeholders = ", ".join("?" * len(chunk))
+                    blobs.extend(row[0] for row in conn.execute(
+                        f'DELETE FROM orders WHERE id IN ({placeholders}) RETURNING project_blob_sha256', chunk
+                    ).fetchall())
+            self._invalidate_cache()
+            self._release_deleted_blobs(blobs)
+            return len(blobs)
+        except Error as e:
+            st.error(f"❌ Eroare la ștergerea definitivă a comenzilor: {e}")
+            return 0
+
     def get_order_by_id(self, order_id):
         """Returnează o comandă după ID"""
         try:
-            conn = sqlite3.connect('rendering_orders.db')
-            df = pd.read_sql_query(
-                "SELECT * FROM orders WHERE id = ?", 
-                conn, params=[order_id]
-            )
-            conn.close()
-            return df
+            return self._cached_read(('order', int(order_id)), lambda: self._load_order_by_id(order_id))
         except Error as e:
             st.error(f"❌ Eroare la citirea comenzii: {e}")
             return pd.DataFrame()
 
+    def _load_order_by_id(self, order_id):
+        """Citește o comandă direct din baza de date"""
+        with self.db.connection() as conn:
+            return pd.read_sql_query(
+                "SELECT * FROM orders WHERE id = ?", 
+                conn, params=[int(order_id)]
+            )
+
     def get_progress_history(self, order_id):
         """Returnează istoricul progresului pentru o comandă"""
         try:
-            conn = sqlite3.connect('rendering_orders.db')
-            df = pd.read_sql_query(
-                "SELECT * FROM progress_history WHERE order_id = ? ORDER BY timestamp DESC", 
-                conn, params=[order_id]
-            )
-            conn.close()
+            with self.db.connection() as conn:
+                df = pd.read_sql_query(
+                    "SELECT * FROM progress_history WHERE order_id = ? ORDER BY timestamp DESC", 
+                    conn, params=[order_id]
+                )
             return df
         except Error as e:
             st.error(f"❌ Eroare la citirea istoricului: {e}")
@@ -830,17 +4523,13 @@ class RenderingService:
     def delete_order(self, order_id, reason=""):
         """Marchează o comandă ca ștearsă"""
         try:
-            conn = sqlite3.connect('rendering_orders.db')
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                UPDATE orders 
-                SET is_deleted = 1, deleted_at = CURRENT_TIMESTAMP, deletion_reason = ?
-                WHERE id = ?
-            ''', (reason, order_id))
-            
-            conn.commit()
-            conn.close()
+            with self.db.transaction() as conn:
+                conn.execute('''
+                    UPDATE orders 
+                    SET is_deleted = 1, deleted_at = CURRENT_TIMESTAMP, deletion_reason = ?
+                    WHERE id = ?
+                ''', (reason, order_id))
+            self._invalidate_cache()
             return True
         except Error as e:
             st.error(f"❌ Eroare la ștergerea comenzii: {e}")
@@ -849,17 +4538,13 @@ class RenderingService:
     def restore_order(self, order_id):
         """Restabilește o comandă ștearsă"""
         try:
-            conn = sqlite3.connect('rendering_orders.db')
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                UPDATE orders 
-                SET is_deleted = 0, deleted_at = NULL, deletion_reason = NULL
-                WHERE id = ?
-            ''', (order_id,))
-            
-            conn.commit()
-            conn.close()
+            with self.db.transaction() as conn:
+                conn.execute('''
+                    UPDATE orders 
+                    SET is_deleted = 0, deleted_at = NULL, deletion_reason = NULL
+                    WHERE id = ?
+                ''', (order_id,))
+            self._invalidate_cache()
             return True
         except Error as e:
             st.error(f"❌ Eroare la restabilirea comenzii: {e}")
@@ -868,18 +4553,71 @@ class RenderingService:
     def permanently_delete_order(self, order_id):
         """Șterge definitiv o comandă din baza de date"""
         try:
-            conn = sqlite3.connect('rendering_orders.db')
-            cursor = conn.cursor()
-            
-            cursor.execute('DELETE FROM orders WHERE id = ?', (order_id,))
-            
-            conn.commit()
-            conn.close()
+            with self.db.transaction() as conn:
+                blobs = [row[0] for row in conn.execute(
+                    'DELETE FROM orders WHERE id = ? RETURNING project_blob_sha256', (int(order_id),)
+                ).fetchall()]
+            self._invalidate_cache()
+            self._release_deleted_blobs(blobs)
             return True
         except Error as e:
             st.error(f"❌ Eroare la ștergerea definitivă a comenzii: {e}")
             return False
 
+@st.cache_resource
+def get_rendering_service():
+    """Serviciul unic per proces, partajat de toate sesiunile Streamlit.
+
+    Schema bazei de date este verificată o singură dată, la prima creare,
+    nu la fiecare rerun al scriptului.
+    """
+    return RenderingService()
+
+def display_order_pagination(service, key, page_size=20, **filters):
+    """Afișează controalele de paginare și returnează (pagina curentă, total comenzi)"""
+    cursors_key = f"{key}_page_cursors"
+    filters_key = f"{key}_page_filters"
+    
+    # Schimbarea filtrelor readuce lista la prima pagină
+    if st.session_state.get(filters_key) != filters or cursors_key not in st.session_state:
+        st.session_state[filters_key] = filters
+        st.session_state[cursors_key] = [None]
+    cursors = st.session_state[cursors_key]
+    
+    total = service.count_orders(**filters)
+    page = service.get_orders(page_size=page_size, cursor=cursors[-1], **filters)
+    page_number = len(cursors)
+    page_count = max(1, -(-total // page_size))
+    
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if st.button("⬅️ Anterior", key=f"{key}_prev_page", disabled=page_number == 1):
+            cursors.pop()
+            st.rerun()
+    with col_info:
+        st.markdown(f"**Pagina {page_number} din {page_count}** • {total} comenzi")
+    with col_next:
+        has_next = page_number * page_size < total
+        if st.button("Următor ➡️", key=f"{key}_next_page", disabled=not has_next):
+            cursors.append(service.next_page_cursor(page))
+            st.rerun()
+    
+    return page, total
+
+def selected_order_ids(key, order_ids):
+    """Returnează ID-urile comenzilor bifate în lista `key`"""
+    return [int(order_id) for order_id in order_ids
+            if st.session_state.get(f"{key}_select_{order_id}", False)]
+
+def clear_order_selection(key, order_ids):
+    """Debifează comenzile după o acțiune în masă"""
+    for order_id in order_ids:
+        st.session_state.pop(f"{key}_select_{order_id}", None)
+
+def display_order_checkbox(key, order_id):
+    """Afișează caseta de selecție pentru acțiunile în masă"""
+    st.checkbox(f"Selectează #{order_id}", key=f"{key}_select_{order_id}")
+
 def display_progress_bar(progress, current_stage):
     """Afișează o bară de progres"""
     st.markdown(f"""
@@ -905,12 +4643,90 @@ def display_notification(message, type="info"):
     </div>
     """, unsafe_allow_html=True)
 
+def link_health_badge(health, url):
+    """Insigna de stare pentru un link verificat de `LinkHealthChecker`"""
+    if url not in health:
+        return "❔ neverificat"
+    ok, status_code, error, checked_at = health[url]
+    if ok:
+        return f"✅ {status_code}"
+    return " ".join(str(part) for part in ("❌", status_code, (error or "")[:60]) if part)
+
+def display_archive_summary(service, order):
+    """Afișează rezumatul arhivei proiectului (calculat la încărcare și salvat pe comandă)"""
+    summary = order.get('archive_summary')
+    if pd.isna(summary) or not summary:
+        if st.button("🔍 Inspectează arhiva", key=f"inspect_{order['id']}"):
+            if service.inspect_project_archive(order['id']) is not None:
+                st.rerun()
+        return
+    
+    summary = json.loads(summary)
+    if not summary.get('format'):
+        return
+    if summary.get('error'):
+        st.caption(f"🗜️ {summary['error']}")
+        return
+    
+    extensions = " · ".join(f"{extension} {count}" for extension, count in list(summary['extensions'].items())[:8])
+    st.caption(
+        f"🗜️ Arhivă {summary['format'].upper()}: {summary['files']} fișiere · "
+        f"{summary['total_size'] / 1024 ** 3:.2f} GB necomprimat · {summary['texture_count']} texturi · {extensions}"
+    )
+    if summary['scene_files']:
+        st.caption("🏗️ Scene: " + ", ".join(posixpath.basename(name) for name in summary['scene_files'][:5]))
+    if summary.get('missing_references'):
+        st.warning(f"🖼️ Texturi referite dar lipsă: {', '.join(summary['missing_references'][:10])}")
+    for warning in summary['warnings']:
+        st.warning(warning)
+
+def display_link_fetch_status(service, order):
+    """Afișează starea preluării automate a link-ului extern al unei comenzi"""
+    status = order.get('link_fetch_status')
+    fetched_bytes = order.get('link_fetch_bytes')
+    fetched_mb = (fetched_bytes if pd.notna(fetched_bytes) else 0) / (1024 * 1024)
+    if status == 'done':
+        st.caption(f"📥 Preluat automat: {fetched_mb:.1f} MB · `{service.blob_store.path(order['project_blob_sha256'])}`")
+    elif status in ('pending', 'downloading'):
+        st.caption(f"⏳ Preluare în curs ({fetched_mb:.1f} MB descărcați)")
+    else:
+        if status == 'failed':
+            st.caption(f"❌ Preluare eșuată ({fetched_mb:.1f} MB descărcați): {order.get('link_fetch_error')}")
+        elif status == 'manual':
+            st.caption(f"✋ Fișierul nu poate fi preluat automat: {order.get('link_fetch_error')}")
+        if st.button("🔄 Preia fișierul din link", key=f"prefetch_{order['id']}"):
+            if service.retry_link_prefetch(order['id']):
+                st.success("✅ Preluarea a fost programată")
+                st.rerun()
+
+def mask_email(email):
+    """Adresa de email mascată pentru paginile publice (ex. a***@example.ro)"""
+    local, _, domain = str(email).partition('@')
+    return f"{local[:1]}***@{domain}" if domain else "***"
+
+def display_resumable_upload_instructions(service, order_id):
+    """Afișează datele de conectare pentru încărcarea reluabilă a fișierului comenzii"""
+    token = service.get_upload_token(order_id)
+    st.markdown("#### 📤 Încarcă fișierul proiectului")
+    st.write(f"**Adresă:** `{service.upload_url}` • **Comandă:** `{order_id}` • **Token:** `{token}`")
+    st.warning("⚠️ Salvează token-ul. Îl poți primi din nou din „📊 Tracking Progres”: este trimis doar pe email-ul comenzii.")
+    st.caption("Orice client tus 1.0 (de ex. tus-js-client, Uppy, tuspy) poate relua încărcarea după o întrerupere. "
+               "Trimite `order_id`, `token` și `filename` în Upload-Metadata.")
+    st.code(
+        "from tusclient import client\n"
+        f"uploader = client.TusClient('{service.upload_url}').uploader(\n"
+        "    'proiect.zip', chunk_size=8 * 1024 * 1024,\n"
+        f"    metadata={{'order_id': '{order_id}', 'token': '{token}', 'filename': 'proiect.zip'}})\n"
+        "uploader.upload()",
+        language="python"
+    )
+
 def main():
     st.markdown('<h1 class="main-header">🏗️ Rendering Service ARH</h1>', unsafe_allow_html=True)
     st.markdown("### Serviciu profesional de rendering pentru studenții la arhitectură")
     
-    # Inițializează serviciul
-    service = RenderingService()
+    # Serviciul este creat o singură dată per proces
+    service = get_rendering_service()
     
     # Sidebar pentru navigare
     with st.sidebar:
@@ -932,6 +4748,15 @@ def main():
             "📊 Tracking Progres"
         ])
         
+        # Badge cu notificările necitite, din contoarele ținute în memorie
+        unread_total = service.notification_service.unread_count()
+        if unread_total:
+            st.caption(f"🔔 {unread_total} notificări necitite")
+        if st.session_state.get('notifications_email'):
+            unread_customer = service.notification_service.unread_count(email=st.session_state.notifications_email)
+            if unread_customer:
+                st.caption(f"📬 {unread_customer} necitite pentru {st.session_state.notifications_email}")
+        
         st.markdown("---")
         st.markdown("**📞 Contact rapid:**")
         st.markdown("📧 bostiogstefania@gmail.com")
@@ -962,11 +4787,18 @@ def main():
                 
                 st.subheader("📤 Încarcă Proiectul")
                 
+                # Încărcarea reluabilă apare doar dacă serverul de încărcare rulează
+                upload_options = ["📎 Încarcă fișier", "🔗 Link extern"]
+                if service.upload_url:
+                    upload_options.append("📤 Fișier mare (încărcare reluabilă)")
+                if st.session_state.upload_option not in upload_options:
+                    st.session_state.upload_option = "📎 Încarcă fișier"
+                
                 # Radio button cu callback pentru a forța re-run
                 upload_option = st.radio(
-                    "Alege metoda de upload:", 
-                    ["📎 Încarcă fișier", "🔗 Link extern"],
-                    index=0 if st.session_state.upload_option == "📎 Încarcă fișier" else 1,
+                    "Alege metoda de upload:",
+                    upload_options,
+                    index=upload_options.index(st.session_state.upload_option),
                     key="upload_radio"
                 )
                 
@@ -984,6 +4816,11 @@ def main():
                     )
                     project_link = None
                     st.info("💡 **Formate acceptate:** .skp, .rvt, .max, .blend, .dwg, .zip, .rar")
+                elif st.session_state.upload_option == "📤 Fișier mare (încărcare reluabilă)":
+                    project_file = None
+                    project_link = None
+                    st.info("💡 După finalizarea comenzii primești adresa și token-ul pentru încărcare. "
+                            "Încărcarea poate fi reluată oricând de unde a rămas, fără limita de 200 MB a formularului.")
                 else:
                     project_link = st.text_input(
                         "Link descărcare proiect*", 
@@ -1051,25 +4888,30 @@ def main():
                 elif st.session_state.upload_option == "🔗 Link extern" and not project_link:
                     st.error("⚠️ Te rog adaugă link-ul de descărcare!")
                 else:
-                    # Salvează datele în session state
-                    st.session_state.form_data = {
-                        'student_name': student_name,
-                        'email': email,
-                        'contact_phone': contact_phone,
-                        'faculty': faculty,
-                        'project_file': project_file.name if project_file else None,
-                        'project_link': project_link,
-                        'software': software,
-                        'resolution': resolution,
-                        'render_count': render_count,
-                        'is_urgent': is_urgent,
-                        'requirements': requirements,
-                        'price_euro': price_euro,
-                        'estimated_days': estimated_days,
-                        'delivery_date': delivery_date
-                    }
-                    st.session_state.order_submitted = True
-                    st.rerun()
+                    # Fișierul este salvat acum: după rerun, widget-ul de încărcare nu mai este afișat
+                    project_blob_sha256, project_blob_size = service.store_project_file(project_file)
+                    if project_file is None or project_blob_sha256:
+                        # Salvează datele în session state
+                        st.session_state.form_data = {
+                            'student_name': student_name,
+                            'email': email,
+                            'contact_phone': contact_phone,
+                            'faculty': faculty,
+                            'project_file': project_file.name if project_file else None,
+                            'project_blob_sha256': project_blob_sha256,
+                            'project_blob_size': project_blob_size,
+                            'project_link': project_link,
+                            'software': software,
+                            'resolution': resolution,
+                            'render_count': render_count,
+                            'is_urgent': is_urgent,
+                            'requirements': requirements,
+                            'price_euro': price_euro,
+                            'estimated_days': estimated_days,
+                            'delivery_date': delivery_date
+                        }
+                        st.session_state.order_submitted = True
+                        st.rerun()
         
         else:
             # PAGINA DE PLATĂ (după submit formular)
@@ -1143,6 +4985,8 @@ def main():
                                 'student_name': form_data['student_name'],
                                 'email': form_data['email'],
                                 'project_file': form_data['project_file'],
+                                'project_blob_sha256': form_data.get('project_blob_sha256'),
+                                'project_blob_size': form_data.get('project_blob_size'),
                                 'project_link': form_data['project_link'],
                                 'software': form_data['software'],
                                 'resolution': form_data['resolution'],
@@ -1184,6 +5028,10 @@ def main():
                                 **📞 Pentru întrebări:** bostiogstefania@gmail.com
                                 """)
                                 
+                                if st.session_state.upload_option == "📤 Fișier mare (încărcare reluabilă)":
+                                    display_resumable_upload_instructions(service, order_id)
+                                    service.send_upload_token_email(order_id)
+                                
                                 # Reset form
                                 st.session_state.order_submitted = False
                                 st.session_state.form_data = {}
@@ -1246,38 +5094,52 @@ def main():
         with col2:
             search_type = st.radio("Caută după:", ["ID Comandă", "Email"], horizontal=True)
         
+        order_search = order_search.strip()
         if order_search:
             if search_type == "ID Comandă":
                 try:
                     order_id = int(order_search)
-                    orders = service.get_orders()
-                    order = orders[orders['id'] == order_id]
-                    if not order.empty:
+                    if service.order_exists(order_id):
                         notifications = service.notification_service.get_notifications(order_id=order_id)
+                        notifications_title = f"📬 Notificări pentru Comanda #{order_id}"
                     else:
                         st.error("❌ Comanda nu a fost găsită!")
                         notifications = pd.DataFrame()
-                except:
+                except ValueError:
                     st.error("❌ ID invalid! Te rog introdu un număr valid.")
                     notifications = pd.DataFrame()
             else:
-                orders = service.get_orders()
-                order = orders[orders['email'] == order_search]
-                if not order.empty:
-                    order_id = order.iloc[0]['id']
-                    notifications = service.notification_service.get_notifications(order_id=order_id)
+                customer_orders = service.get_orders_by_email(order_search)
+                if not customer_orders.empty:
+                    # Notificările tuturor comenzilor clientului, într-o singură interogare
+                    notifications = service.notification_service.get_notifications_for_email(order_search)
+                    notifications_title = f"📬 Notificări pentru {order_search} ({len(customer_orders)} comenzi)"
                 else:
                     st.error("❌ Nu s-au găsit comenzi pentru acest email!")
                     notifications = pd.DataFrame()
             
             if not notifications.empty:
-                st.subheader(f"📬 Notificări pentru Comanda #{order_id}")
+                st.subheader(notifications_title)
+                
+                # Contorul vine din memorie; marcarea tuturor este un singur UPDATE
+                if search_type == "ID Comandă":
+                    unread = service.notification_service.unread_count(order_id=order_id)
+                else:
+                    unread = service.notification_service.unread_count(email=order_search)
+                    st.session_state.notifications_email = order_search
+                if unread:
+                    if st.button(f"✓ Marchează toate cele {unread} notificări necitite", key="read_all"):
+                        if search_type == "ID Comandă":
+                            service.notification_service.mark_all_read(order_id=order_id)
+                        else:
+                            service.notification_service.mark_all_read(email=order_search)
+                        st.rerun()
                 
                 for _, notification in notifications.iterrows():
                     col1, col2 = st.columns([4, 1])
                     with col1:
                         display_notification(
-                            f"**{notification['timestamp']}** - {notification['message']}",
+                            f"**{notification['timestamp']}** - Comanda #{notification['order_id']} - {notification['message']}",
                             notification['type']
                         )
                     with col2:
@@ -1290,8 +5152,11 @@ def main():
         
         # Notificări generale pentru administrator
         st.subheader("📢 Notificări Sistem")
-        all_notifications = service.notification_service.get_notifications(unread_only=True)
+        unread_total = service.notification_service.unread_count()
+        all_notifications = service.notification_service.get_notifications(unread_only=True, limit=20) if unread_total else pd.DataFrame()
         if not all_notifications.empty:
+            if unread_total > len(all_notifications):
+                st.caption(f"Cele mai recente {len(all_notifications)} din {unread_total} notificări necitite")
             for _, notification in all_notifications.iterrows():
                 display_notification(
                     f"**Comanda #{notification['order_id']}** - {notification['message']}",
@@ -1333,7 +5198,7 @@ def main():
                 
                 st.subheader(f"📈 Progres Comanda #{order_id}")
                 st.write(f"**👤 Client:** {order_data['student_name']}")
-                st.write(f"**📧 Email:** {order_data['email']}")
+                st.write(f"**📧 Email:** {mask_email(order_data['email'])}")
                 st.write(f"**🛠️ Software:** {order_data['software']}")
                 st.write(f"**🎯 Rezoluție:** {order_data['resolution']}")
                 
@@ -1376,6 +5241,16 @@ def main():
                 else:
                     st.info("📝 Încă nu există istoric de progres.")
                 
+                # Token-ul de încărcare nu se afișează aici: este trimis doar pe email-ul comenzii
+                if service.upload_url:
+                    with st.expander("📤 Încarcă fișierul proiectului (încărcare reluabilă)"):
+                        st.caption("Datele de încărcare (adresă și token) sunt trimise doar pe adresa de email a comenzii.")
+                        if st.button("📧 Trimite datele de încărcare pe email", key=f"send_token_{order_id}"):
+                            if service.send_upload_token_email(order_id):
+                                st.success(f"✅ Email trimis către {mask_email(order_data['email'])}.")
+                            else:
+                                st.info("ℹ️ Datele au fost deja trimise recent sau email-ul nu este configurat.")
+                
                 # Buton pentru refresh
                 if st.button("🔄 Actualizează Progres"):
                     st.rerun()
@@ -1402,7 +5277,7 @@ def main():
             
             # Submeniu în administrare
             admin_menu = st.radio("Alege secțiunea:", 
-                                ["📊 Dashboard Comenzi", "🎯 Gestionare Comenzi", "📈 Statistici", "🗑️ Comenzi Șterse", "🚀 Management Progres"],
+                                ["📊 Dashboard Comenzi", "🎯 Gestionare Comenzi", "📈 Statistici", "🗑️ Comenzi Șterse", "🚀 Management Progres", "📧 Outbox Email"],
                                 horizontal=True)
             
             if admin_menu == "🚀 Management Progres":
@@ -1410,9 +5285,37 @@ def main():
                 
                 orders_df = service.get_orders()
                 active_orders = orders_df[orders_df['status'].isin(['pending', 'processing'])]
+                stages = [
+                    "În așteptare",
+                    "📥 Prelucrare fișier",
+                    "🎨 Setup scenă", 
+                    "💡 Configurare iluminare",
+                    "🛠️ Optimizare materiale",
+                    "🚀 Rendering",
+                    "✅ Finalizare și verificare"
+                ]
                 
                 if not active_orders.empty:
+                    # Actualizare progres în masă pentru comenzile bifate
+                    selected_ids = selected_order_ids("progress", active_orders['id'])
+                    if selected_ids:
+                        st.markdown(f"**☑️ {len(selected_ids)} comenzi selectate**")
+                        col_bulk_progress, col_bulk_stage, col_bulk_apply = st.columns([2, 2, 1])
+                        with col_bulk_progress:
+                            bulk_progress = st.slider("Progres nou", 0, 100, 0, key="progress_bulk_value")
+                        with col_bulk_stage:
+                            bulk_stage = st.selectbox("Stadiu nou", stages, key="progress_bulk_stage")
+                        with col_bulk_apply:
+                            if st.button("💾 Aplică selectatelor", key="progress_bulk_apply"):
+                                updated = service.bulk_update_progress(selected_ids, bulk_progress, bulk_stage)
+                                clear_order_selection("progress", selected_ids)
+                                st.success(f"✅ Progresul a fost actualizat pentru {updated} comenzi!")
+                                time.sleep(1)
+                                st.rerun()
+                        st.divider()
+                    
                     for _, order in active_orders.iterrows():
+                        display_order_checkbox("progress", order['id'])
                         with st.expander(f"#{order['id']} - {order['student_name']} - Progres: {order['progress']}%"):
                             col1, col2 = st.columns(2)
                             
@@ -1429,15 +5332,6 @@ def main():
                             with col2:
                                 # Actualizare progres
                                 new_progress = st.slider(f"Progres #{order['id']}", 0, 100, order['progress'])
-                                stages = [
-                                    "În așteptare",
-                                    "📥 Prelucrare fișier",
-                                    "🎨 Setup scenă", 
-                                    "💡 Configurare iluminare",
-                                    "🛠️ Optimizare materiale",
-                                    "🚀 Rendering",
-                                    "✅ Finalizare și verificare"
-                                ]
                                 new_stage = st.selectbox(f"Stadiu #{order['id']}", stages, 
                                                        index=stages.index(order['current_stage']) if order['current_stage'] in stages else 0)
                                 notes = st.text_area(f"Notițe #{order['id']}", placeholder="Detalii despre progres...")
@@ -1468,10 +5362,30 @@ def main():
             elif admin_menu == "🎯 Gestionare Comenzi":
                 st.subheader("🎯 Gestionare Comenzi")
                 
-                orders_df = service.get_orders()
+                orders_df, total_orders = display_order_pagination(service, "manage")
                 
-                if not orders_df.empty:
+                if total_orders:
+                    # Schimbare de status în masă pentru comenzile bifate
+                    selected_ids = selected_order_ids("manage", orders_df['id'])
+                    if selected_ids:
+                        col_bulk_status, col_bulk_apply = st.columns([3, 1])
+                        with col_bulk_status:
+                            bulk_status = st.selectbox(
+                                f"☑️ Status nou pentru {len(selected_ids)} comenzi selectate:",
+                                ["pending", "processing", "completed"],
+                                key="manage_bulk_status"
+                            )
+                        with col_bulk_apply:
+                            if st.button("💾 Aplică selectatelor", key="manage_bulk_apply"):
+                                updated = service.bulk_update_status(selected_ids, bulk_status)
+                                clear_order_selection("manage", selected_ids)
+                                st.success(f"✅ {updated} comenzi au fost mutate în {bulk_status}!")
+                                time.sleep(1)
+                                st.rerun()
+                        st.divider()
+                    
                     for _, order in orders_df.iterrows():
+                        display_order_checkbox("manage", order['id'])
                         with st.expander(f"#{order['id']} - {order['student_name']} - {order['price_euro']} EUR - {order['status']}"):
                             col1, col2 = st.columns(2)
                             
@@ -1489,10 +5403,20 @@ def main():
                                 project_file = order.get('project_file')
                                 project_link = order.get('project_link')
                                 
-                                if project_file and project_file != 'None':
+                                if pd.notna(project_file) and project_file and project_file != 'None':
                                     st.write(f"**📦 Fișier încărcat:** {project_file}")
-                                elif project_link and project_link != 'None':
+                                    blob_sha256 = order.get('project_blob_sha256')
+                                    if pd.notna(blob_sha256) and blob_sha256:
+                                        blob_size = order.get('project_blob_size')
+                                        blob_size = blob_size if pd.notna(blob_size) else 0
+                                        st.caption(f"💾 {blob_size / (1024 * 1024):.1f} MB · SHA-256 `{blob_sha256[:16]}…` · "
+                                                   f"`{service.blob_store.path(blob_sha256)}`")
+                                        display_archive_summary(service, order)
+                                elif pd.notna(project_link) and project_link and project_link != 'None':
                                     st.write(f"**🔗 Link proiect:** {project_link}")
+                                    display_link_fetch_status(service, order)
+                                    if order.get('link_fetch_status') == 'done':
+                                        display_archive_summary(service, order)
                                 else:
                                     st.write("**📦 Proiect:** Niciun fișier/link furnizat")
                                 
@@ -1523,6 +5447,9 @@ def main():
                                             st.success(f"✅ Comanda #{order['id']} actualizată!")
                                             time.sleep(1)
                                             st.rerun()
+                                    if service.upload_url and st.button("♻️ Token nou de încărcare", key=f"reissue_token_{order['id']}"):
+                                        if service.reissue_upload_token(order['id']):
+                                            st.success("✅ Token nou trimis pe email-ul clientului; încărcările neterminate au fost anulate.")
                                 
                                 with col_btn2:
                                     # Gestionare ștergere
@@ -1561,42 +5488,61 @@ def main():
             elif admin_menu == "📊 Dashboard Comenzi":
                 st.subheader("📊 Dashboard Comenzi")
                 
-                orders_df = service.get_orders()
+                stats = service.get_order_stats()
                 
-                if not orders_df.empty:
-                    # Statistici extinse
-                    total_orders = len(orders_df)
-                    total_revenue = orders_df['price_euro'].sum()
-                    pending_orders = len(orders_df[orders_df['status'] == 'pending'])
-                    processing_orders = len(orders_df[orders_df['status'] == 'processing'])
-                    completed_orders = len(orders_df[orders_df['status'] == 'completed'])
-                    
-                    # Progres mediu
-                    avg_progress = orders_df['progress'].mean()
-                    
+                if stats.total_orders:
+                    # Statistici extinse, calculate în SQL
                     col1, col2, col3, col4, col5 = st.columns(5)
                     with col1:
-                        st.metric("Total Comenzi", total_orders)
+                        st.metric("Total Comenzi", stats.total_orders)
                     with col2:
-                        st.metric("Venit Total", f"{total_revenue:.0f} EUR")
+                        st.metric("Venit Total", f"{stats.total_revenue:.0f} EUR")
                     with col3:
-                        st.metric("În Așteptare", pending_orders)
+                        st.metric("În Așteptare", stats.status_count('pending'))
                     with col4:
-                        st.metric("În Procesare", processing_orders)
+                        st.metric("În Procesare", stats.status_count('processing'))
                     with col5:
-                        st.metric("Progres Mediu", f"{avg_progress:.1f}%")
+                        st.metric("Progres Mediu", f"{stats.avg_progress:.1f}%")
                     
-                    # Filtre
-                    col1, col2 = st.columns(2)
+                    # Filtre (aplicate în SQL)
+                    col1, col2, col3, col4 = st.columns(4)
                     with col1:
                         status_filter = st.selectbox("Filtrează după status:", 
                                                    ["Toate", "pending", "processing", "completed"])
                     with col2:
+                        urgent_filter = st.selectbox("Urgență:", ["Toate", "🚀 Doar urgente", "Fără urgente"])
+                    with col3:
+                        date_range = st.date_input("Plasate în perioada:", value=(), format="DD.MM.YYYY")
+                    with col4:
                         if st.button("🔄 Actualizează Dashboard"):
                             st.rerun()
                     
-                    # Afișare comenzi cu progres
-                    filtered_df = orders_df if status_filter == "Toate" else orders_df[orders_df['status'] == status_filter]
+                    col1, col2 = st.columns([3, 1])
+                    # Verificarea rulează înaintea afișării statisticilor, ca ele să includă rezultatul
+                    with col2:
+                        if st.button("🩺 Verifică link-urile"):
+                            with st.spinner("Se verifică link-urile..."):
+                                checked = service.check_links(force=True)
+                            st.success(f"✅ {checked} link-uri verificate")
+                    with col1:
+                        broken_links_filter = st.checkbox("🔗 Doar comenzi cu link-uri nefuncționale")
+                        link_stats = service.link_checker.stats()
+                        st.caption(f"🩺 {link_stats['checked']} link-uri verificate • {link_stats['broken']} nefuncționale • "
+                                   f"rezultatele sunt păstrate {service.link_checker.ttl_seconds // 60} minute")
+                    
+                    # Afișare comenzi cu progres, câte o pagină
+                    filtered_df, _ = display_order_pagination(
+                        service,
+                        "dashboard",
+                        status=None if status_filter == "Toate" else status_filter,
+                        urgent={"Toate": None, "🚀 Doar urgente": True, "Fără urgente": False}[urgent_filter],
+                        created_from=date_range[0] if len(date_range) > 0 else None,
+                        created_to=date_range[1] if len(date_range) > 1 else None,
+                        broken_links=broken_links_filter
+                    )
+                    link_health = service.get_link_health(
+                        list(filtered_df['download_link']) + list(filtered_df['project_link'])
+                    ) if not filtered_df.empty else {}
                     
                     for _, order in filtered_df.iterrows():
                         with st.container():
@@ -1627,8 +5573,11 @@ def main():
                                               unsafe_allow_html=True)
                             
                             with col3:
-                                if order['download_link']:
+                                if pd.notna(order['download_link']) and order['download_link']:
                                     st.markdown(f"[📥 Download]({order['download_link']})")
+                                    st.caption(link_health_badge(link_health, order['download_link']))
+                                if pd.notna(order['project_link']) and order['project_link']:
+                                    st.caption(f"🔗 Proiect: {link_health_badge(link_health, order['project_link'])}")
                                 created = datetime.strptime(order['created_at'][:10], '%Y-%m-%d')
                                 days_passed = (datetime.now() - created).days
                                 days_left = max(0, order['estimated_days'] - days_passed)
@@ -1671,45 +5620,68 @@ def main():
             elif admin_menu == "📈 Statistici":
                 st.subheader("📈 Statistici Avansate")
                 
-                orders_df = service.get_orders()
+                stats = service.get_order_stats()
                 
-                if not orders_df.empty:
-                    total_revenue = orders_df['price_euro'].sum()
-                    completed_orders = len(orders_df[orders_df['status'] == 'completed'])
-                    urgent_orders = len(orders_df[orders_df['is_urgent'] == True])
-                    processing_orders = len(orders_df[orders_df['status'] == 'processing'])
-                    avg_progress = orders_df['progress'].mean()
-                    
+                if stats.total_orders:
                     col1, col2, col3, col4, col5 = st.columns(5)
                     with col1:
-                        st.metric("Venit Total", f"{total_revenue:.0f} EUR")
+                        st.metric("Venit Total", f"{stats.total_revenue:.0f} EUR")
                     with col2:
-                        st.metric("Comenzi Finalizate", completed_orders)
+                        st.metric("Comenzi Finalizate", stats.status_count('completed'))
                     with col3:
-                        st.metric("Comenzi Urgente", urgent_orders)
+                        st.metric("Comenzi Urgente", stats.urgent_orders)
                     with col4:
-                        st.metric("În Procesare", processing_orders)
+                        st.metric("În Procesare", stats.status_count('processing'))
                     with col5:
-                        st.metric("Progres Mediu", f"{avg_progress:.1f}%")
+                        st.metric("Progres Mediu", f"{stats.avg_progress:.1f}%")
                     
                     # Statistici pe software
                     st.subheader("📊 Statistici pe Software")
-                    software_stats = orders_df['software'].value_counts()
-                    st.bar_chart(software_stats)
+                    st.bar_chart(pd.Series(stats.by_software, name="count").sort_values(ascending=False))
                     
                     # Statistici pe rezoluție
                     st.subheader("🎯 Statistici pe Rezoluție")
-                    resolution_stats = orders_df['resolution'].value_counts()
-                    st.bar_chart(resolution_stats)
+                    st.bar_chart(pd.Series(stats.by_resolution, name="count").sort_values(ascending=False))
                     
-                    # Export date
+                    # Export date (toate comenzile se încarcă doar la cerere)
                     st.subheader("📤 Export Date")
-                    csv = orders_df.to_csv(index=False)
-                    st.download_button(
-                        "📥 Exportă CSV cu toate comenzile",
-                        data=csv,
-                        file_name=f"comenzi_rendering_{datetime.now().strftime('%Y%m%d')}.csv",
-                        mime="text/csv"
+                    if st.button("📤 Pregătește exportul CSV"):
+                        st.session_state.orders_csv = service.get_orders().to_csv(index=False)
+                    if 'orders_csv' in st.session_state:
+                        st.download_button(
+                            "📥 Exportă CSV cu toate comenzile",
+                            data=st.session_state.orders_csv,
+                            file_name=f"comenzi_rendering_{datetime.now().strftime('%Y%m%d')}.csv",
+                            mime="text/csv"
+                        )
+                    
+                    with st.expander("🔧 Întreținere statistici"):
+                        col_check, col_rebuild = st.columns(2)
+                        with col_check:
+                            if st.button("🔍 Verifică consistența"):
+                                mismatches = service.check_order_stats()
+                                if mismatches:
+                                    st.error(f"❌ {len(mismatches)} grupuri diferă de recalcularea completă")
+                                    st.dataframe(pd.DataFrame(mismatches))
+                                else:
+                                    st.success("✅ Statisticile corespund comenzilor")
+                        with col_rebuild:
+                            if st.button("♻️ Reconstruiește de la zero"):
+                                if service.rebuild_order_stats():
+                                    st.success("✅ Statisticile au fost reconstruite")
+                    
+                    cache = service.cache_stats()
+                    st.caption(
+                        f"🗄️ Cache comenzi: {cache['hits']} hit-uri • {cache['misses']} miss-uri • "
+                        f"{cache['entries']} intrări • generația {cache['generation']}"
+                    )
+                    queue = service.notification_service.metrics()
+                    st.caption(
+                        f"🔔 Buffer notificări: {queue['depth']}/{queue['capacity']} • {queue['flushes']} loturi scrise "
+                        f"({queue['written']} notificări) • flush mediu {queue['avg_flush_ms']} ms, maxim {queue['max_flush_ms']} ms • "
+                        f"așteptare maximă în buffer {queue['max_wait_ms']} ms • {queue['direct_writes']} scrieri directe la buffer plin • "
+                        f"{queue['coalesced']} scrieri economisite prin comasarea progresului • "
+                        f"{queue['failed_writes']} loturi eșuate, {queue['retry_pending']} notificări de reîncercat"
                     )
                 
                 else:
@@ -1725,11 +5697,21 @@ def main():
                 if not deleted_orders.empty:
                     st.info(f"📭 Sunt {len(deleted_orders)} comenzi șterse în sistem.")
                     
+                    selected_ids = selected_order_ids("deleted", deleted_orders['id'])
+                    if selected_ids:
+                        if st.button(f"🗑️ Șterge definitiv cele {len(selected_ids)} comenzi selectate", key="deleted_bulk_purge"):
+                            purged = service.bulk_permanently_delete(selected_ids)
+                            clear_order_selection("deleted", selected_ids)
+                            st.success(f"✅ {purged} comenzi șterse definitiv!")
+                            time.sleep(1)
+                            st.rerun()
+                    
                     for _, order in deleted_orders.iterrows():
                         with st.container():
                             col1, col2, col3 = st.columns([3, 2, 1])
                             
                             with col1:
+                                display_order_checkbox("deleted", order['id'])
                                 st.markdown(f'<div class="deleted"><h4>#{order["id"]} - {order["student_name"]}</h4></div>', 
                                           unsafe_allow_html=True)
                                 st.write(f"**📧 {order['email']}** • **📱 {order.get('contact_phone', 'Nespecificat')}**")
@@ -1770,10 +5752,7 @@ def main():
                             st.session_state.confirm_all_deleted = False
                         
                         if st.session_state.confirm_all_deleted:
-                            success_count = 0
-                            for order_id in deleted_orders['id']:
-                                if service.permanently_delete_order(order_id):
-                                    success_count += 1
+                            success_count = service.bulk_permanently_delete(deleted_orders['id'])
                             st.success(f"✅ {success_count} comenzi șterse definitiv!")
                             st.session_state.confirm_all_deleted = False
                             time.sleep(1)
@@ -1785,6 +5764,80 @@ def main():
                 else:
                     st.info("🎉 Nu există comenzi șterse în sistem.")
         
+            elif admin_menu == "📧 Outbox Email":
+                st.subheader("📧 Outbox Email")
+                
+                counts = service.outbox.status_counts()
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("⏳ În așteptare", counts.get('pending', 0))
+                with col2:
+                    st.metric("📤 În curs de trimitere", counts.get('sending', 0))
+                with col3:
+                    st.metric("✅ Trimise", counts.get('sent', 0))
+                with col4:
+                    st.metric("❌ Eșuate", counts.get('failed', 0))
+                
+                if not service.email_config.is_complete:
+                    st.warning("⚠️ Configurația email nu este completă; mesajele rămân în coadă.")
+                
+                limiter = service.email_rate_limiter.stats()
+                col_rate, col_tokens, col_deferred, col_today = st.columns(4)
+                with col_rate:
+                    st.metric("📈 Trimise în ultimul minut", limiter['sent_last_minute'],
+                              help=f"Limita: {limiter['rate_per_minute']} / minut")
+                with col_tokens:
+                    st.metric("🪙 Tokeni disponibili", f"{limiter['tokens']:.1f} / {limiter['burst']}")
+                with col_deferred:
+                    st.metric("⏸️ Amânate de limitator", service.email_worker.deferred)
+                with col_today:
+                    st.metric("📅 Trimise azi", f"{limiter['sent_today']} / {limiter['daily_limit'] or '∞'}")
+                
+                col_process, col_retry = st.columns(2)
+                with col_process:
+                    if st.button("▶️ Procesează coada acum"):
+                        service.outbox.wakeup.set()
+                        st.success("✅ Worker-ul de email a fost notificat")
+                with col_retry:
+                    if counts.get('failed') and st.button(f"🔁 Reîncearcă cele {counts['failed']} mesaje eșuate"):
+                        retried = service.outbox.retry()
+                        st.success(f"✅ {retried} mesaje repuse în coadă")
+                        time.sleep(1)
+                        st.rerun()
+                
+                if service.outbox.duplicates_skipped:
+                    st.caption(f"🛡️ Email-uri duplicate evitate prin registrul de idempotență: {service.outbox.duplicates_skipped}")
+                
+                transport = service.mail_transport
+                transport_stats = " • ".join(f"{key}: {value}" for key, value in transport.stats().items())
+                st.caption(f"🔌 Transport email: {transport.name} • {transport_stats}")
+                templates_cache = service.templates.cache_info()
+                st.caption(
+                    f"🧩 Cache șabloane email: {templates_cache.hits} hit-uri • {templates_cache.misses} miss-uri • "
+                    f"{templates_cache.currsize} randări păstrate"
+                )
+                
+                with st.expander("📰 Digest pentru administrator"):
+                    interval = service.email_config.digest_interval_hours
+                    if interval > 0:
+                        st.write(f"Digest-ul este trimis la fiecare **{interval:g} ore** către {service.email_config.admin_email}.")
+                    else:
+                        st.write("Digest-ul periodic este dezactivat (`ADMIN_DIGEST_INTERVAL_HOURS=0`).")
+                    st.caption(f"Ultima rulare: {service.digest_last_run() or 'niciodată'} (UTC)")
+                    if st.button("📨 Trimite digest acum"):
+                        if service.run_admin_digest_if_due(force=True):
+                            st.success("✅ Digest-ul a fost pus în coadă")
+                        else:
+                            st.info("ℹ️ Nu există nimic de raportat sau configurația email nu este completă")
+                
+                outbox_status = st.selectbox("Filtrează după status:", ["Toate", "pending", "sending", "sent", "failed"],
+                                             key="outbox_status")
+                messages_df = service.outbox.get_messages(status=None if outbox_status == "Toate" else outbox_status)
+                if not messages_df.empty:
+                    st.dataframe(messages_df, use_container_width=True, hide_index=True)
+                else:
+                    st.info("📭 Nu există mesaje în coadă.")
+        
         elif admin_password and admin_password != correct_password:
             st.error("❌ Parolă incorectă!")
     
@@ -0,0 +1,103 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('MAIL_TRANSPORT', 'memory')
+os.environ.setdefault('UPLOAD_SERVER_PORT', '0')
+
+import streamlit_app as app  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = app.DatabaseManager(str(tmp_path / 'rendering_orders.db'))
+    manager.migrate(app.SCHEMA_MIGRATIONS)
+    yield manager
+    manager.close_all()
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch, db):
+    monkeypatch.chdir(tmp_path)
+    rendering = app.RenderingService(
+        email_config=app.EmailConfig.from_env(),
+        db=db,
+        start_email_worker=False,
+        blob_store=app.BlobStore(str(tmp_path / 'project_blobs')),
+        upload_port=0,
+        start_link_prefetch=False,
+        start_link_checker=False,
+        start_blob_gc=False,
+    )
+    yield rendering
+    rendering.archive_executor.shutdown(wait=True)
+    rendering.notification_service.stop()
+
+
+def order_data(**overrides):
+    data = dict(student_name='Ana', email='ana@example.ro', project_file='proiect.zip', project_link=None,
+                software='Revit', resolution='4-6K', render_count=3, deadline='2030-01-01', requirements='',
+                price_euro=100, estimated_days=3, is_urgent=False, contact_phone='0700000000', faculty='UAUIM')
+    data.update(overrides)
+    return data
+
+
+class StubServer:
+    """Server HTTP local pentru teste; `routes` asociază unei căi o funcție (handler) -> None"""
+    
+    def __init__(self):
+        import http.server
+        stub = self
+        self.routes = {}
+        self.requests = []
+        
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def log_message(self, format, *args):
+                pass
+            
+            def _dispatch(self):
+                stub.requests.append((self.command, self.path, dict(self.headers)))
+                route = stub.routes.get(self.path.split('?')[0])
+                if route is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                route(self)
+            
+            do_GET = do_HEAD = do_POST = _dispatch
+        
+        self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+    
+    def url(self, path):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}{path}"
+    
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def respond(handler, status=200, body=b'', headers=None):
+    """Trimite un răspuns complet dintr-o rută a `StubServer`"""
+    handler.send_response(status)
+    for name, value in (headers or {}).items():
+        handler.send_header(name, str(value))
+    handler.send_header('Content-Length', str(len(body)))
+    handler.end_headers()
+    if handler.command != 'HEAD':
+        handler.wfile.write(body)
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    yield server
+    server.stop()
@@ -0,0 +1,40 @@
+import email
+from email.mime.text import MIMEText
+
+import streamlit_app as app
+
+
+def fail_email(db, recipient):
+    outbox = app.EmailOutbox(db, max_attempts=1)
+    msg = MIMEText('text')
+    msg['To'] = recipient
+    msg['Subject'] = 'Status'
+    outbox.enqueue([('status', None, msg)])
+    [row] = outbox.claim_due()
+    outbox.mark_failed([(row, 'SMTP indisponibil')])
+
+
+def email_text(message):
+    parts = email.message_from_string(message).walk()
+    return ''.join(part.get_payload(decode=True).decode() for part in parts if not part.is_multipart())
+
+
+def queued_digests(db):
+    with db.connection() as conn:
+        return [email_text(row[0]) for row in conn.execute("SELECT message FROM email_outbox WHERE kind = 'digest' ORDER BY id")]
+
+
+def test_digest_reports_only_failures_since_last_run(service):
+    fail_email(service.db, 'vechi@example.ro')
+    with service.db.transaction() as conn:
+        conn.execute("UPDATE email_outbox SET next_attempt_at = datetime('now', '-2 hours')")
+        conn.execute("INSERT INTO job_state (name, last_run_at) VALUES ('admin_digest', datetime('now', '-1 hours'))")
+    fail_email(service.db, 'nou@example.ro')
+    
+    assert service.run_admin_digest_if_due(force=True)
+    [digest] = queued_digests(service.db)
+    assert 'nou@example.ro' in digest and 'vechi@example.ro' not in digest
+    
+    # Nimic nou de la ultimul digest: eșecul nu este raportat din nou
+    assert not service.run_admin_digest_if_due(force=True)
+    assert len(queued_digests(service.db)) == 1
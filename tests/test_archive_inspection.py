@@ -0,0 +1,79 @@
+import io
+import json
+import threading
+import zipfile
+
+import streamlit_app as app
+from conftest import order_data
+
+
+def make_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def wait_for_inspections(service):
+    # Un singur worker: o sarcină nouă se termină după cele programate înainte
+    service.archive_executor.submit(lambda: None).result(timeout=10)
+
+
+def archive_summary(db, order_id):
+    with db.connection() as conn:
+        value = conn.execute('SELECT archive_summary FROM orders WHERE id = ?', (order_id,)).fetchone()[0]
+    return json.loads(value) if value else None
+
+
+def add_order_with_archive(service, content):
+    sha256, size = service.blob_store.put(io.BytesIO(content))
+    return service.add_order(order_data(project_blob_sha256=sha256, project_blob_size=size))
+
+
+def test_unreadable_material_file_is_recorded_as_uninspectable(tmp_path, monkeypatch):
+    path = tmp_path / 'proiect.zip'
+    path.write_bytes(make_zip({'scena.obj': 'o scena', 'scena.mtl': 'map_Kd lemn.jpg', 'lemn.jpg': 'x'}))
+    original_open = zipfile.ZipFile.open
+    
+    def unsupported(self, name, *args, **kwargs):
+        if str(name).endswith('.mtl'):
+            raise NotImplementedError("That compression method is not supported")
+        return original_open(self, name, *args, **kwargs)
+    monkeypatch.setattr(zipfile.ZipFile, 'open', unsupported)
+    
+    summary = app.ArchiveInspector().inspect(str(path))
+    
+    assert summary['uninspectable'] == ['scena.mtl']
+    assert summary['files'] == 3 and summary['missing_references'] == []
+    assert any('nu au putut fi citite' in warning for warning in summary['warnings'])
+
+
+def test_add_order_returns_before_inspection_runs(service):
+    release = threading.Event()
+    inspect = service.archive_inspector.inspect
+    
+    def slow_inspect(path):
+        release.wait(10)
+        return inspect(path)
+    service.archive_inspector.inspect = slow_inspect
+    
+    order_id = add_order_with_archive(service, make_zip({'scena.skp': 'model'}))
+    
+    assert order_id is not None
+    assert archive_summary(service.db, order_id) is None
+    release.set()
+    wait_for_inspections(service)
+    assert archive_summary(service.db, order_id)['scene_files'] == ['scena.skp']
+
+
+def test_add_order_survives_archive_that_cannot_be_inspected(service):
+    def broken(path):
+        raise RuntimeError("unrar lipsește")
+    service.archive_inspector.inspect = broken
+    
+    order_id = add_order_with_archive(service, b'Rar!\x1a\x07\x00 arhiva')
+    wait_for_inspections(service)
+    
+    assert order_id is not None
+    assert 'nu a putut fi inspectată' in archive_summary(service.db, order_id)['error']
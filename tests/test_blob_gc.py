@@ -0,0 +1,59 @@
+import io
+import os
+import time
+
+from conftest import order_data
+
+
+def store(service, content):
+    sha256, size = service.store_project_file(io.BytesIO(content))
+    return sha256, size
+
+
+def age(service, sha256, seconds):
+    past = time.time() - seconds
+    os.utime(service.blob_store.path(sha256), (past, past))
+
+
+def test_abandoned_upload_is_collected_after_ttl(service):
+    sha256, _ = store(service, b'formular abandonat')
+    
+    assert service.collect_orphan_blobs() == 0
+    assert service.blob_store.exists(sha256)
+    
+    age(service, sha256, service.blob_ttl_seconds + 1)
+    assert service.collect_orphan_blobs() == 1
+    assert not service.blob_store.exists(sha256)
+
+
+def test_reupload_refreshes_pending_blob(service):
+    sha256, _ = store(service, b'acelasi proiect')
+    age(service, sha256, service.blob_ttl_seconds + 1)
+    store(service, b'acelasi proiect')
+    
+    assert service.collect_orphan_blobs() == 0
+    assert service.blob_store.exists(sha256)
+
+
+def test_permanent_delete_releases_blob_when_last_reference_goes(service):
+    sha256, size = store(service, b'proiect comun')
+    blob = dict(project_blob_sha256=sha256, project_blob_size=size)
+    first = service.add_order(order_data(**blob))
+    second = service.add_order(order_data(email='ion@example.ro', **blob))
+    age(service, sha256, service.blob_ttl_seconds + 1)
+    
+    assert service.permanently_delete_order(first)
+    assert service.blob_store.exists(sha256)
+    
+    assert service.bulk_permanently_delete([second]) == 1
+    assert not service.blob_store.exists(sha256)
+
+
+def test_soft_deleted_order_keeps_blob(service):
+    sha256, size = store(service, b'proiect in cos')
+    order_id = service.add_order(order_data(project_blob_sha256=sha256, project_blob_size=size))
+    service.delete_order(order_id, 'test')
+    age(service, sha256, service.blob_ttl_seconds + 1)
+    
+    assert service.collect_orphan_blobs() == 0
+    assert service.blob_store.exists(sha256)
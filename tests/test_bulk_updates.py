@@ -0,0 +1,48 @@
+import streamlit_app as app
+from conftest import order_data
+
+
+def email_flags(db, order_id):
+    with db.connection() as conn:
+        return conn.execute('SELECT status_email_sent, progress_email_sent, completed_email_sent FROM orders '
+                            'WHERE id = ?', (order_id,)).fetchone()
+
+
+def mark_already_queued(db, order_id, kind, transition=None):
+    with db.transaction() as conn:
+        conn.execute('INSERT INTO sent_emails (idempotency_key, order_id, kind) VALUES (?, ?, ?)',
+                     (app.EmailOutbox.idempotency_key(order_id, kind, transition), order_id, kind))
+
+
+def test_bulk_progress_flags_only_orders_whose_email_was_queued(service, db):
+    first = service.add_order(order_data())
+    second = service.add_order(order_data(email='ion@example.ro'))
+    mark_already_queued(db, second, 'progress', 'started')
+    
+    assert service.bulk_update_progress([first, second], 100, 'Livrare') == 2
+    
+    assert email_flags(db, first)[1:] == (1, 1)
+    assert email_flags(db, second)[1:] == (0, 1)
+
+
+def test_bulk_status_flags_only_orders_whose_email_was_queued(service, db):
+    first = service.add_order(order_data())
+    second = service.add_order(order_data(email='ion@example.ro'))
+    mark_already_queued(db, second, 'status', 'pending>processing')
+    
+    assert service.bulk_update_status([first, second], 'processing') == 2
+    
+    assert email_flags(db, first)[0] == 1
+    assert email_flags(db, second)[0] == 0
+
+
+def test_bulk_status_completed_sets_completed_at(service, db):
+    first = service.add_order(order_data())
+    second = service.add_order(order_data(email='ion@example.ro'))
+    
+    assert service.bulk_update_status([first], 'completed') == 1
+    
+    with db.connection() as conn:
+        completed_at = dict(conn.execute('SELECT id, completed_at FROM orders WHERE id IN (?, ?)', (first, second)))
+    assert completed_at[first] is not None
+    assert completed_at[second] is None
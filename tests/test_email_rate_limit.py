@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta, timezone
+
+import streamlit_app as app
+
+
+def insert_outbox(db, status, sent_at):
+    with db.transaction() as conn:
+        conn.execute('''
+            INSERT INTO email_outbox (order_id, kind, recipient, subject, message, status, sent_at)
+            VALUES (1, 'status', 'ana@example.ro', 'Status', '', ?, ?)
+        ''', (status, sent_at.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S') if sent_at else None))
+
+
+def test_daily_cap_survives_restart(db):
+    midnight = datetime.combine(datetime.now().date(), datetime.min.time())
+    now = datetime.now()
+    for _ in range(3):
+        insert_outbox(db, 'sent', now)
+    insert_outbox(db, 'sent', midnight - timedelta(minutes=1))
+    insert_outbox(db, 'pending', None)
+    
+    bucket = app.TokenBucket(rate_per_minute=60, burst=10, daily_limit=4)
+    bucket.seed_sent_today(app.EmailOutbox(db).sent_since(bucket.day_start()))
+    
+    assert bucket.stats()['sent_today'] == 3
+    assert bucket.available() == 1
+    bucket.consume(1)
+    assert bucket.available() == 0
+    assert bucket.seconds_until_available() > 0
+
+
+def test_service_seeds_rate_limiter_from_outbox(db, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    insert_outbox(db, 'sent', datetime.now())
+    insert_outbox(db, 'sent', datetime.now())
+    
+    service = app.RenderingService(db=db, start_email_worker=False, blob_store=app.BlobStore(str(tmp_path / 'blobs')),
+                                   upload_port=0, start_link_prefetch=False, start_link_checker=False)
+    try:
+        assert service.email_rate_limiter.stats()['sent_today'] == 2
+    finally:
+        service.notification_service.stop()
@@ -0,0 +1,122 @@
+import time
+
+import pytest
+import requests
+
+import streamlit_app as app
+from conftest import order_data, respond
+
+
+@pytest.fixture
+def make_checker(service):
+    sessions = []
+    
+    def make(**kwargs):
+        options = dict(workers=4, timeout=0.5, allow_private=True)
+        options.update(kwargs)
+        session = requests.Session()
+        sessions.append(session)
+        return app.LinkHealthChecker(service.db, session, **options)
+    
+    yield make
+    for session in sessions:
+        session.close()
+
+
+def slow(handler):
+    time.sleep(1.5)
+    respond(handler, body=b'prea tarziu')
+
+
+def no_head(handler):
+    if handler.command == 'HEAD':
+        respond(handler, 405)
+    else:
+        respond(handler, 206, body=b'P', headers={'Content-Range': 'bytes 0-0/100'})
+
+
+def deliver(service, download_link):
+    order_id = service.add_order(order_data())
+    with service.db.transaction() as conn:
+        conn.execute("UPDATE orders SET status = 'completed', download_link = ? WHERE id = ?",
+                     (download_link, order_id))
+    return order_id
+
+
+@pytest.mark.parametrize('path, ok, status_code', [
+    ('/ok', True, 200),
+    ('/lipsa', False, 404),
+    ('/lent', False, None),
+    ('/mutat', True, 200),
+    ('/fara-head', True, 206),
+])
+def test_probe_classifies_responses(make_checker, stub_server, path, ok, status_code):
+    stub_server.routes.update({
+        '/ok': lambda handler: respond(handler, body=b'fisier'),
+        '/lent': slow,
+        '/mutat': lambda handler: respond(handler, 302, headers={'Location': '/ok'}),
+        '/fara-head': no_head,
+    })
+    
+    result = make_checker().probe(stub_server.url(path))
+    
+    assert result[:2] == (ok, status_code)
+    assert (result[2] is None) == ok
+
+
+def test_redirect_to_internal_address_is_not_probed(make_checker, stub_server, monkeypatch):
+    monkeypatch.setattr(app, 'is_public_address', lambda address: not address.startswith('169.254.'))
+    stub_server.routes['/mutat'] = lambda handler: respond(
+        handler, 302, headers={'Location': 'http://169.254.169.254/latest/meta-data/'})
+    
+    ok, status_code, error, _ = make_checker(allow_private=False).probe(stub_server.url('/mutat'))
+    
+    assert not ok and status_code is None and '169.254.169.254' in error
+    assert [path for _, path, _ in stub_server.requests] == ['/mutat']
+
+
+def test_results_are_cached_until_ttl_expires(service, make_checker, stub_server):
+    stub_server.routes['/ok'] = lambda handler: respond(handler, body=b'fisier')
+    checker = make_checker(ttl_seconds=3600)
+    url = stub_server.url('/ok')
+    
+    assert checker.check_urls([url]) == 1
+    assert checker.check_urls([url]) == 0 and checker.stats()['cache_hits'] == 1
+    with service.db.transaction() as conn:
+        conn.execute("UPDATE link_checks SET checked_at = datetime('now', '-2 hours')")
+    assert checker.check_urls([url]) == 1
+    assert len(stub_server.requests) == 2
+
+
+def test_broken_links_filter_uses_order_link_checks(service, make_checker, stub_server):
+    stub_server.routes['/ok'] = lambda handler: respond(handler, body=b'fisier')
+    deliver(service, stub_server.url('/ok'))
+    broken = deliver(service, stub_server.url('/lipsa'))
+    
+    make_checker().check_orders()
+    service._invalidate_cache()
+    
+    assert service.get_orders(broken_links=True)['id'].tolist() == [broken]
+    assert service.count_orders(broken_links=True) == 1
+    # Un link nou nu moștenește starea celui vechi
+    with service.db.transaction() as conn:
+        conn.execute('UPDATE orders SET download_link = ? WHERE id = ?', (stub_server.url('/ok'), broken))
+    service._invalidate_cache()
+    assert service.count_orders(broken_links=True) == 0
+
+
+def test_check_orders_notifies_once_after_sync(service, stub_server):
+    stub_server.routes['/ok'] = lambda handler: respond(handler, body=b'fisier')
+    order_id = deliver(service, stub_server.url('/ok'))
+    synced = []
+    
+    def on_checked():
+        with service.db.connection() as conn:
+            synced.append(conn.execute('SELECT COUNT(*) FROM order_link_checks WHERE order_id = ?',
+                                       (order_id,)).fetchone()[0])
+    checker = app.LinkHealthChecker(service.db, requests.Session(), on_checked=on_checked, allow_private=True)
+    
+    checker.check_orders()
+    checker.session.close()
+    
+    assert synced == [1]
@@ -0,0 +1,299 @@
+import io
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import streamlit_app as app
+from conftest import order_data, respond
+
+
+@pytest.fixture
+def make_prefetcher(service):
+    created = []
+    
+    def make(**kwargs):
+        options = dict(workers=0, retry_delay=0, timeout=5, allow_private=True)
+        options.update(kwargs)
+        prefetcher = app.LinkPrefetcher(service.db, service.blob_store, **options)
+        created.append(prefetcher)
+        return prefetcher
+    
+    yield make
+    for prefetcher in created:
+        prefetcher.session.close()
+
+
+def fetch_state(db, order_id):
+    with db.connection() as conn:
+        return conn.execute('SELECT link_fetch_status, link_fetch_error, project_blob_sha256 FROM orders WHERE id = ?',
+                            (order_id,)).fetchone()
+
+
+def link_order(service, url):
+    return service.add_order(order_data(project_file=None, project_link=url))
+
+
+@pytest.mark.parametrize('url', [
+    'http://127.0.0.1/proiect.zip',
+    'http://169.254.169.254/latest/meta-data/',
+    'http://[::1]/proiect.zip',
+    'http://10.1.2.3/proiect.zip',
+    'http://192.168.0.10/proiect.zip',
+    'http://[::ffff:127.0.0.1]/proiect.zip',
+    'file:///etc/passwd',
+    'ftp://example.com/proiect.zip',
+])
+def test_internal_or_non_http_links_are_refused(url):
+    with pytest.raises(app.UnsafeURLError):
+        app.check_public_url(url)
+
+
+def test_prefetch_refuses_loopback_link_without_request(service, make_prefetcher, stub_server):
+    stub_server.routes['/proiect.zip'] = lambda handler: respond(handler, body=b'date')
+    order_id = link_order(service, stub_server.url('/proiect.zip'))
+    
+    make_prefetcher(allow_private=False)._fetch(order_id)
+    
+    status, error, sha256 = fetch_state(service.db, order_id)
+    assert status == 'failed' and 'adresă internă' in error and sha256 is None
+    assert stub_server.requests == []
+
+
+def test_redirect_to_internal_address_is_refused(service, make_prefetcher, stub_server, monkeypatch):
+    # Serverul de test (pe loopback) trece drept public; ținta redirecționării nu
+    monkeypatch.setattr(app, 'is_public_address', lambda address: not address.startswith('169.254.'))
+    stub_server.routes['/share'] = lambda handler: respond(
+        handler, 302, headers={'Location': 'http://169.254.169.254/latest/meta-data/'})
+    order_id = link_order(service, stub_server.url('/share'))
+    
+    make_prefetcher(allow_private=False)._fetch(order_id)
+    
+    status, error, _ = fetch_state(service.db, order_id)
+    assert status == 'failed' and '169.254.169.254' in error
+    assert [path for _, path, _ in stub_server.requests] == ['/share']
+
+
+def test_connection_to_internal_address_is_refused_after_resolution(service, make_prefetcher, stub_server,
+                                                                    monkeypatch):
+    # DNS rebinding: verificarea dinaintea cererii trece, dar conexiunea ajunge la loopback
+    monkeypatch.setattr(app, 'check_public_url', lambda url, allow_private=False: None)
+    stub_server.routes['/proiect.zip'] = lambda handler: respond(handler, body=b'date')
+    order_id = link_order(service, stub_server.url('/proiect.zip'))
+    
+    make_prefetcher(allow_private=False)._fetch(order_id)
+    
+    status, error, _ = fetch_state(service.db, order_id)
+    assert status == 'failed' and 'adresa internă 127.0.0.1' in error
+    assert stub_server.requests == []
+
+
+def test_redirects_are_followed_when_every_hop_is_allowed(service, make_prefetcher, stub_server):
+    stub_server.routes['/share'] = lambda handler: respond(handler, 302, headers={'Location': '/proiect.zip'})
+    stub_server.routes['/proiect.zip'] = lambda handler: respond(
+        handler, body=b'PK fisier', headers={'Content-Type': 'application/zip'})
+    order_id = link_order(service, stub_server.url('/share'))
+    
+    make_prefetcher()._fetch(order_id)
+    
+    status, _, sha256 = fetch_state(service.db, order_id)
+    assert status == 'done'
+    with service.blob_store.open(sha256) as blob:
+        assert blob.read() == b'PK fisier'
+
+
+def serve_file(stub_server, path, body, content_length=True):
+    def route(handler):
+        if not content_length:
+            # Fără Content-Length: limita se aplică doar în timpul transferului
+            handler.send_response(200)
+            handler.send_header('Connection', 'close')
+            handler.end_headers()
+            handler.wfile.write(body)
+            handler.close_connection = True
+        else:
+            respond(handler, body=body, headers={'Content-Type': 'application/zip'})
+    stub_server.routes[path] = route
+
+
+@pytest.mark.parametrize('content_length', [True, False])
+def test_file_over_per_order_cap_is_refused(service, make_prefetcher, stub_server, content_length):
+    serve_file(stub_server, '/mare.zip', b'x' * 2048, content_length)
+    order_id = link_order(service, stub_server.url('/mare.zip'))
+    prefetcher = make_prefetcher(max_bytes=1024)
+    prefetcher.READ_SIZE = 256
+    
+    prefetcher._fetch(order_id)
+    
+    status, error, sha256 = fetch_state(service.db, order_id)
+    assert status == 'failed' and 'per comandă' in error and sha256 is None
+    assert not os.path.exists(prefetcher._partial_path(order_id))
+
+
+def test_total_blob_store_budget_is_enforced(service, make_prefetcher, stub_server):
+    service.blob_store.put(io.BytesIO(b'y' * 900))
+    serve_file(stub_server, '/proiect.zip', b'x' * 200)
+    order_id = link_order(service, stub_server.url('/proiect.zip'))
+    
+    make_prefetcher(total_budget=1000)._fetch(order_id)
+    
+    status, error, _ = fetch_state(service.db, order_id)
+    assert status == 'failed' and 'bugetul total' in error
+
+
+def test_per_submitter_limit_counts_other_orders_of_same_email(service, make_prefetcher, stub_server):
+    serve_file(stub_server, '/a.zip', b'a' * 600)
+    serve_file(stub_server, '/b.zip', b'b' * 600)
+    first = link_order(service, stub_server.url('/a.zip'))
+    second = service.add_order(order_data(project_file=None, project_link=stub_server.url('/b.zip'),
+                                          email='ANA@example.ro'))
+    prefetcher = make_prefetcher(per_submitter_bytes=1000)
+    
+    prefetcher._fetch(first)
+    prefetcher._fetch(second)
+    
+    assert fetch_state(service.db, first)[0] == 'done'
+    status, error, _ = fetch_state(service.db, second)
+    assert status == 'failed' and 'cota de descărcare' in error
+
+
+def test_download_is_refused_when_free_space_is_low(service, make_prefetcher, stub_server, monkeypatch):
+    monkeypatch.setattr(app.shutil, 'disk_usage', lambda path: SimpleNamespace(total=10 ** 9, used=10 ** 9 - 500, free=500))
+    serve_file(stub_server, '/proiect.zip', b'x' * 10)
+    order_id = link_order(service, stub_server.url('/proiect.zip'))
+    
+    make_prefetcher(min_free_bytes=1000)._fetch(order_id)
+    
+    status, error, _ = fetch_state(service.db, order_id)
+    assert status == 'failed' and 'Spațiu liber insuficient' in error
+    assert stub_server.requests == []
+
+
+def test_blob_store_tracks_used_bytes(service):
+    store = service.blob_store
+    assert store.used_bytes() == 0
+    sha256, _ = store.put(io.BytesIO(b'z' * 300))
+    store.put(io.BytesIO(b'z' * 300))
+    assert store.used_bytes() == 300
+    store.delete(sha256)
+    assert store.used_bytes() == 0
+
+
+def test_interrupted_download_resumes_with_range(service, make_prefetcher, stub_server):
+    def route(handler):
+        if handler.headers.get('Range') == 'bytes=4-':
+            respond(handler, 206, body=b'5678', headers={'Content-Range': 'bytes 4-7/8'})
+        else:
+            respond(handler, body=b'12345678')
+    stub_server.routes['/proiect.zip'] = route
+    order_id = link_order(service, stub_server.url('/proiect.zip'))
+    prefetcher = make_prefetcher()
+    with open(prefetcher._partial_path(order_id), 'wb') as partial:
+        partial.write(b'1234')
+    
+    prefetcher._fetch(order_id)
+    
+    status, _, sha256 = fetch_state(service.db, order_id)
+    assert status == 'done' and prefetcher.stats()['resumed'] == 1
+    with service.blob_store.open(sha256) as blob:
+        assert blob.read() == b'12345678'
+
+
+def test_unknown_html_page_needs_manual_download(service, make_prefetcher, stub_server):
+    stub_server.routes['/pagina'] = lambda handler: respond(
+        handler, body=b'<html><body>Autentificare</body></html>', headers={'Content-Type': 'text/html'})
+    order_id = link_order(service, stub_server.url('/pagina'))
+    
+    make_prefetcher()._fetch(order_id)
+    
+    status, error, sha256 = fetch_state(service.db, order_id)
+    assert status == 'manual' and 'manual' in error and sha256 is None
+
+
+def test_drive_virus_scan_warning_is_confirmed(service, make_prefetcher, stub_server):
+    warning = f'''<html><body>
+        <form id="download-form" action="{stub_server.url('/download')}" method="get">
+            <input type="hidden" name="id" value="abc">
+            <input type="hidden" name="export" value="download">
+            <input type="hidden" name="confirm" value="t">
+            <input type="hidden" name="uuid" value="u-1">
+        </form></body></html>'''.encode()
+    stub_server.routes['/uc'] = lambda handler: respond(handler, body=warning,
+                                                        headers={'Content-Type': 'text/html; charset=utf-8'})
+    
+    def download(handler):
+        query = parse_qs(urlsplit(handler.path).query)
+        if query.get('confirm') == ['t'] and query.get('uuid') == ['u-1'] and query.get('id') == ['abc']:
+            respond(handler, body=b'PK drive', headers={'Content-Type': 'application/octet-stream'})
+        else:
+            respond(handler, 403)
+    stub_server.routes['/download'] = download
+    order_id = link_order(service, stub_server.url('/uc?export=download&id=abc'))
+    prefetcher = make_prefetcher()
+    prefetcher.DRIVE_HOSTS = ('127.0.0.1',)
+    
+    prefetcher._fetch(order_id)
+    
+    status, _, sha256 = fetch_state(service.db, order_id)
+    assert status == 'done'
+    with service.blob_store.open(sha256) as blob:
+        assert blob.read() == b'PK drive'
+
+
+def test_wetransfer_page_is_resolved_through_api(service, make_prefetcher, stub_server):
+    payloads = []
+    stub_server.routes['/t-abc'] = lambda handler: respond(
+        handler, 302, headers={'Location': '/downloads/tid/hash1'})
+    stub_server.routes['/downloads/tid/hash1'] = lambda handler: respond(
+        handler, body=b'<html></html>', headers={'Content-Type': 'text/html'})
+    
+    def api(handler):
+        payloads.append(json.loads(handler.rfile.read(int(handler.headers['Content-Length']))))
+        body = json.dumps({'direct_link': stub_server.url('/fisier.zip')}).encode()
+        respond(handler, body=body, headers={'Content-Type': 'application/json'})
+    stub_server.routes['/api/tid'] = api
+    stub_server.routes['/fisier.zip'] = lambda handler: respond(handler, body=b'PK wetransfer')
+    order_id = link_order(service, stub_server.url('/t-abc'))
+    prefetcher = make_prefetcher()
+    prefetcher.WETRANSFER_HOSTS = ('127.0.0.1',)
+    prefetcher.WETRANSFER_API = stub_server.url('/api/{}')
+    
+    prefetcher._fetch(order_id)
+    
+    status, _, sha256 = fetch_state(service.db, order_id)
+    assert status == 'done'
+    assert payloads == [{'security_hash': 'hash1', 'intent': 'entire_transfer'}]
+    with service.blob_store.open(sha256) as blob:
+        assert blob.read() == b'PK wetransfer'
+
+
+def test_downloads_per_host_are_limited(service, make_prefetcher, stub_server):
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+    
+    def slow(handler):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.3)
+        with lock:
+            active[0] -= 1
+        respond(handler, body=handler.path.encode())
+    for index in range(4):
+        stub_server.routes[f'/fisier-{index}.zip'] = slow
+    order_ids = [link_order(service, stub_server.url(f'/fisier-{index}.zip')) for index in range(4)]
+    prefetcher = make_prefetcher(workers=4, per_host=2)
+    
+    prefetcher.start()
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline and any(fetch_state(service.db, order_id)[0] != 'done' for order_id in order_ids):
+        time.sleep(0.05)
+    prefetcher.stop()
+    
+    assert all(fetch_state(service.db, order_id)[0] == 'done' for order_id in order_ids)
+    assert peak[0] == 2
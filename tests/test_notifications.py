@@ -0,0 +1,73 @@
+import sqlite3
+import threading
+
+import pytest
+
+import streamlit_app as app
+
+
+@pytest.fixture
+def notifications(db):
+    service = app.NotificationService(db, flush_interval=0.05, retry_delay=0.01, max_retry_delay=0.05)
+    yield service
+    service.stop()
+
+
+def saved_messages(db):
+    with db.connection() as conn:
+        return [row[0] for row in conn.execute('SELECT message FROM notifications ORDER BY id')]
+
+
+def test_notifications_from_rolled_back_transaction_are_dropped(db, notifications):
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            notifications.add_notification(1, 'anulată')
+            raise RuntimeError('rollback')
+    with db.transaction():
+        notifications.add_notification(1, 'confirmată')
+    
+    assert notifications.flush()
+    assert saved_messages(db) == ['confirmată']
+
+
+def test_failed_batch_is_retried_in_order(db, notifications, monkeypatch):
+    original = notifications.save_notifications_to_db
+    failures = iter([sqlite3.OperationalError('database is locked')])
+    
+    def flaky_save(batch):
+        error = next(failures, None)
+        if error:
+            raise error
+        original(batch)
+    
+    monkeypatch.setattr(notifications, 'save_notifications_to_db', flaky_save)
+    notifications.add_notifications([(1, 'prima', 'info', None), (1, 'a doua', 'info', None)])
+    notifications.add_notification(1, 'a treia')
+    
+    assert notifications.flush(timeout=5)
+    assert saved_messages(db) == ['prima', 'a doua', 'a treia']
+    assert notifications.metrics()['failed_writes'] == 1
+
+
+def test_flush_returns_after_deadline_when_writes_keep_failing(db, notifications, monkeypatch):
+    def failing_save(batch):
+        raise sqlite3.OperationalError('disk I/O error')
+    
+    monkeypatch.setattr(notifications, 'save_notifications_to_db', failing_save)
+    notifications.add_notification(1, 'blocată')
+    
+    finished = threading.Event()
+    result = []
+    threading.Thread(target=lambda: (result.append(notifications.flush(timeout=0.3)), finished.set())).start()
+    assert finished.wait(5)
+    assert result == [False]
+    assert notifications.metrics()['retry_pending'] == 1
+
+
+def test_full_buffer_writes_overflow_directly(db):
+    service = app.NotificationService(db, max_pending=1, start_consumer=False)
+    service.add_notifications([(1, 'în buffer', 'info', None), (1, 'directă', 'info', None)])
+    
+    assert saved_messages(db) == ['directă']
+    assert service.metrics()['direct_writes'] == 1
+    assert service.notification_queue.qsize() == 1
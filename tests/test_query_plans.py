@@ -0,0 +1,80 @@
+import pytest
+
+import streamlit_app as app
+
+
+def query_plan(db, query, params=()):
+    with db.connection() as conn:
+        return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {query}', params)]
+
+
+def assert_uses_index(plan, index):
+    assert any(f'USING INDEX {index}' in step or f'USING COVERING INDEX {index}' in step for step in plan), plan
+    assert not any('USE TEMP B-TREE FOR ORDER BY' in step for step in plan), plan
+
+
+def orders_query(status=None, include_deleted=False):
+    where, params = app.RenderingService._order_filters(status, include_deleted, None, None, None)
+    return f'SELECT * FROM orders {where} ORDER BY created_at DESC, id DESC LIMIT 20', params
+
+
+@pytest.mark.parametrize('status, include_deleted, index', [
+    (None, False, 'idx_orders_deleted_created'),
+    ('processing', False, 'idx_orders_deleted_status_created'),
+    ('completed', True, 'idx_orders_status_created'),
+    (None, True, 'idx_orders_created'),
+])
+def test_order_listing_uses_index(db, status, include_deleted, index):
+    query, params = orders_query(status, include_deleted)
+    assert_uses_index(query_plan(db, query, params), index)
+
+
+def test_order_count_by_status_uses_index(db):
+    where, params = app.RenderingService._order_filters('pending', False, None, None, None)
+    plan = query_plan(db, f'SELECT COUNT(*) FROM orders {where}', params)
+    assert any('idx_orders_deleted_status_created' in step for step in plan), plan
+
+
+def test_broken_links_filter_searches_order_link_checks(db):
+    where, params = app.RenderingService._order_filters(None, False, None, None, None, broken_links=True)
+    plan = query_plan(db, f'SELECT * FROM orders {where} ORDER BY created_at DESC, id DESC LIMIT 20', params)
+    assert any(step.startswith('SEARCH order_link_checks') and 'idx_order_link_checks_status (order_id=? AND status=?)' in step
+               for step in plan), plan
+    assert not any(step.startswith('SCAN link_checks') for step in plan), plan
+
+
+def test_orders_by_email_uses_index(db):
+    plan = query_plan(
+        db,
+        'SELECT * FROM orders WHERE email = ? COLLATE NOCASE AND is_deleted = 0 ORDER BY created_at DESC, id DESC',
+        ('ana@example.ro',)
+    )
+    assert any('SEARCH orders USING INDEX idx_orders_email_nocase' in step for step in plan), plan
+
+
+@pytest.mark.parametrize('query, params, index', [
+    ('SELECT * FROM notifications WHERE order_id = ? ORDER BY timestamp DESC', (1,),
+     'idx_notifications_order_timestamp'),
+    ('SELECT * FROM notifications WHERE order_id = ? AND read = 0 ORDER BY timestamp DESC', (1,),
+     'idx_notifications_order_read_timestamp'),
+    ('SELECT * FROM notifications WHERE read = 0 ORDER BY timestamp DESC', (),
+     'idx_notifications_read_timestamp'),
+    ('SELECT * FROM progress_history WHERE order_id = ? ORDER BY timestamp DESC', (1,),
+     'idx_progress_history_order_timestamp'),
+])
+def test_notification_and_history_queries_use_index(db, query, params, index):
+    plan = query_plan(db, query, params)
+    assert any(f'SEARCH {query.split()[3]} USING INDEX {index}' in step for step in plan), plan
+    assert not any('USE TEMP B-TREE FOR ORDER BY' in step for step in plan), plan
+
+
+def test_migrations_upgrade_existing_database_in_place(tmp_path):
+    db = app.DatabaseManager(str(tmp_path / 'legacy.db'))
+    db.migrate(app.SCHEMA_MIGRATIONS[:1])
+    assert db.schema_version() == 1
+    assert db.migrate(app.SCHEMA_MIGRATIONS) == app.SCHEMA_MIGRATIONS[-1][0]
+    with db.connection() as conn:
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_orders_deleted_status_created', 'idx_notifications_order_read_timestamp',
+            'idx_progress_history_order_timestamp'} <= indexes
+    db.close_all()
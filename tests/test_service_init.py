@@ -0,0 +1,27 @@
+import streamlit_app as app
+
+
+def test_background_threads_start_after_service_state_exists(tmp_path, monkeypatch, db):
+    monkeypatch.chdir(tmp_path)
+    started = []
+    
+    # Thread-urile pornite apelează imediat înapoi în serviciu, ca un worker rapid
+    def prefetcher_start(prefetcher):
+        started.append('prefetch')
+        prefetcher.on_change(0)
+    
+    def job_start(job):
+        started.append(job.name)
+        job.func()
+    
+    monkeypatch.setattr(app.LinkPrefetcher, 'start', prefetcher_start)
+    monkeypatch.setattr(app.LinkHealthChecker, 'check_orders', lambda checker: checker.on_checked())
+    monkeypatch.setattr(app.PeriodicJob, 'start', job_start)
+    monkeypatch.setattr(app.EmailOutboxWorker, 'start', lambda worker: started.append('email'))
+    
+    service = app.RenderingService(db=db, blob_store=app.BlobStore(str(tmp_path / 'blobs')), upload_port=0)
+    try:
+        assert started == ['email', 'admin-digest', 'prefetch', 'link-health', 'blob-gc']
+        assert service.cache_stats()['generation'] >= 2
+    finally:
+        service.notification_service.stop()
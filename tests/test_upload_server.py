@@ -0,0 +1,143 @@
+import email
+import hashlib
+import http.client
+import io
+
+import pytest
+
+import streamlit_app as app
+from conftest import order_data
+
+
+@pytest.fixture
+def upload_server(service):
+    server = app.UploadServer(service.uploads, port=0, allowed_origins={'https://archirender.example.ro'})
+    server.start()
+    yield server
+    server.stop()
+
+
+def options(server, origin):
+    conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+    conn.request('OPTIONS', '/files/', headers={'Origin': origin})
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    return response.status, dict(response.getheaders())
+
+
+def test_upload_server_binds_loopback_by_default(upload_server):
+    assert upload_server.httpd.server_address[0] == '127.0.0.1'
+
+
+def test_cors_only_for_app_origin(upload_server):
+    status, headers = options(upload_server, 'https://archirender.example.ro')
+    assert status == 204
+    assert headers['Access-Control-Allow-Origin'] == 'https://archirender.example.ro'
+    
+    status, headers = options(upload_server, 'https://evil.example.com')
+    assert status == 204
+    assert 'Access-Control-Allow-Origin' not in headers
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://upload.example.ro/files', 'https://upload.example.ro/files/'),
+    ('http://localhost:8502/files/', 'http://localhost:8502/files/'),
+    ('http://upload.example.ro/files/', None),
+    ('ftp://upload.example.ro/files/', None),
+    (None, None),
+])
+def test_public_url_requires_tls(url, expected):
+    assert app.UploadServer.public_url(url) == expected
+
+
+def test_service_without_public_url_does_not_start_upload_server(tmp_path, monkeypatch, db):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv('UPLOAD_PUBLIC_URL', raising=False)
+    service = app.RenderingService(db=db, start_email_worker=False, blob_store=app.BlobStore(str(tmp_path / 'blobs')),
+                                   upload_port=1, start_link_prefetch=False, start_link_checker=False,
+                                   start_blob_gc=False)
+    try:
+        assert service.upload_server is None
+        assert service.upload_url is None
+    finally:
+        service.notification_service.stop()
+
+
+def test_origins_are_normalised():
+    assert app.UploadServer.origins('https://app.example.ro/path, http://localhost:8501,, nope') == {
+        'https://app.example.ro', 'http://localhost:8501'
+    }
+
+
+def email_text(message):
+    parts = email.message_from_string(message).walk()
+    return ''.join(part.get_payload(decode=True).decode() for part in parts if not part.is_multipart())
+
+
+def queued_token_emails(db, order_id):
+    with db.connection() as conn:
+        return [(recipient, email_text(message)) for recipient, message in conn.execute(
+            "SELECT recipient, message FROM email_outbox WHERE order_id = ? AND kind = 'upload_token' ORDER BY id",
+            (order_id,)
+        )]
+
+
+def test_upload_token_is_only_sent_to_order_email(service):
+    service.upload_url = 'https://upload.example.ro/files/'
+    order_id = service.add_order(order_data())
+    token = service.get_upload_token(order_id)
+    
+    assert service.send_upload_token_email(order_id)
+    # Apăsări repetate nu trimit același token de mai multe ori pe oră
+    assert not service.send_upload_token_email(order_id)
+    
+    [(recipient, message)] = queued_token_emails(service.db, order_id)
+    assert recipient == 'ana@example.ro'
+    assert token in message
+    assert app.mask_email('ana@example.ro') == 'a***@example.ro'
+
+
+def test_reissued_token_revokes_old_token_and_unfinished_uploads(service):
+    service.upload_url = 'https://upload.example.ro/files/'
+    order_id = service.add_order(order_data())
+    old_token = service.get_upload_token(order_id)
+    upload_id = service.uploads.create(order_id, old_token, 'proiect.zip', 10)
+    
+    assert service.reissue_upload_token(order_id)
+    
+    new_token = service.get_upload_token(order_id)
+    assert new_token != old_token
+    [(recipient, message)] = queued_token_emails(service.db, order_id)
+    assert recipient == 'ana@example.ro' and new_token in message and old_token not in message
+    assert service.uploads.get(upload_id) is None
+    with pytest.raises(app.UploadError) as error:
+        service.uploads.create(order_id, old_token, 'proiect.zip', 10)
+    assert error.value.status == 403
+    assert service.uploads.create(order_id, new_token, 'proiect.zip', 10)
+
+
+def test_failed_attach_keeps_upload_resumable(service):
+    order_id = service.add_order(order_data())
+    uploads = service.uploads
+    upload_id = uploads.create(order_id, service.get_upload_token(order_id), 'proiect.zip', 4)
+    attach = uploads.on_complete
+    
+    def failing_attach(*args):
+        raise RuntimeError("baza de date indisponibilă")
+    uploads.on_complete = failing_attach
+    with pytest.raises(RuntimeError):
+        uploads.append(upload_id, 0, io.BytesIO(b'date'), 4)
+    
+    upload = uploads.get(upload_id)
+    assert upload['status'] == 'uploading' and upload['offset'] == 4
+    assert not service.blob_store.exists(hashlib.sha256(b'date').hexdigest())
+    
+    # Un PATCH gol la offset-ul final reia finalizarea
+    uploads.on_complete = attach
+    assert uploads.append(upload_id, 4, io.BytesIO(b''), 0) == 4
+    upload = uploads.get(upload_id)
+    assert upload['status'] == 'completed'
+    with service.blob_store.open(upload['sha256']) as blob:
+        assert blob.read() == b'date'
+    assert service.get_order_by_id(order_id).iloc[0]['project_blob_sha256'] == upload['sha256']